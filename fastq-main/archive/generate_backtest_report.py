@@ -23,6 +23,7 @@ sys.path.insert(0, str(Path(__file__).parent))
 
 from src.strategy.hybrid_optimized_strategy import HybridOptimizedStrategy
 from src.indicators.indicators import Indicators
+from src.backtesting.engine import BacktestEngine
 from src.data.data_fetcher import DataFetcher
 from loguru import logger
 import warnings
@@ -140,41 +141,8 @@ def run_backtest(symbol: str, aggressiveness: int = 1, timeframe: str = '1m', da
         data_5m={symbol: data_5m}
     )
 
-    # 重采样5分钟数据 Resample 5m data
-    data_5m_resampled = data_5m.reindex(data_main.index, method='ffill')
-
-    # 运行回测 Run backtest
-    equity_curve = [10000]  # 资金曲线 Equity curve
-
-    for i in range(50, len(data_main)):
-        current_time = data_main.index[i]
-
-        # 检查现有持仓 Check existing positions
-        if symbol in strategy.positions:
-            position = strategy.positions[symbol]
-            should_exit, exit_price, reason = strategy.check_exit(
-                position,
-                data_main.iloc[:i+1],
-                current_time
-            )
-            if should_exit:
-                pnl = strategy.close_position(position, exit_price, current_time, reason)
-                equity_curve.append(equity_curve[-1] + pnl)
-
-        # 检查新信号 Check for new signals
-        if symbol not in strategy.positions:
-            signal = strategy.generate_signals(
-                data_main.iloc[:i+1],
-                data_5m_resampled.iloc[:i+1],
-                symbol,
-                current_time
-            )
-            if signal:
-                strategy.open_position(signal)
-
-        # 更新资金曲线 Update equity curve
-        if len(equity_curve) <= i - 49:
-            equity_curve.append(equity_curve[-1])
+    # 运行回测 Run backtest (资金曲线 Equity curve)
+    equity_curve = BacktestEngine(strategy, symbol).run(data_main, data_5m)
 
     # 获取统计信息 Get statistics
     stats = strategy.get_statistics()
@@ -17,6 +17,7 @@ sys.path.insert(0, str(Path(__file__).parent))
 
 from src.strategy.hybrid_optimized_strategy import HybridOptimizedStrategy
 from src.indicators.indicators import Indicators
+from src.backtesting.engine import BacktestEngine
 from src.data.data_fetcher import DataFetcher
 from loguru import logger
 import warnings
@@ -85,27 +86,7 @@ def run_backtest(symbol: str, aggressiveness: int = 1, timeframe: str = '1m', da
     }
 
     strategy = HybridOptimizedStrategy(config=config, data_1m={symbol: data_main}, data_5m={symbol: data_5m})
-    data_5m_resampled = data_5m.reindex(data_main.index, method='ffill')
-
-    equity_curve = [10000]
-
-    for i in range(50, len(data_main)):
-        current_time = data_main.index[i]
-
-        if symbol in strategy.positions:
-            position = strategy.positions[symbol]
-            should_exit, exit_price, reason = strategy.check_exit(position, data_main.iloc[:i+1], current_time)
-            if should_exit:
-                pnl = strategy.close_position(position, exit_price, current_time, reason)
-                equity_curve.append(equity_curve[-1] + pnl)
-
-        if symbol not in strategy.positions:
-            signal = strategy.generate_signals(data_main.iloc[:i+1], data_5m_resampled.iloc[:i+1], symbol, current_time)
-            if signal:
-                strategy.open_position(signal)
-
-        if len(equity_curve) <= i - 49:
-            equity_curve.append(equity_curve[-1])
+    equity_curve = BacktestEngine(strategy, symbol).run(data_main, data_5m)
 
     stats = strategy.get_statistics()
     if not stats:
@@ -17,8 +17,10 @@ import json
 sys.path.insert(0, str(Path(__file__).parent))
 
 from src.strategy.hybrid_optimized_strategy import HybridOptimizedStrategy
-from src.indicators.indicators import Indicators
+from src.backtesting.engine import BacktestEngine
+from src.backtesting.runner import MultiSymbolRunner
 from src.data.data_fetcher import DataFetcher
+from src.store import IndicatorCache
 from loguru import logger
 import warnings
 warnings.filterwarnings('ignore')
@@ -26,6 +28,9 @@ warnings.filterwarnings('ignore')
 plt.rcParams['font.sans-serif'] = ['Arial Unicode MS', 'SimHei', 'DejaVu Sans']
 plt.rcParams['axes.unicode_minus'] = False
 
+# 指标磁盘缓存: 重复运行和被更长窗口覆盖的短窗口不再重算
+INDICATOR_CACHE = IndicatorCache()
+
 
 def prepare_data(symbol: str, timeframe: str = '5m', days: int = 15):
     """准备数据 Prepare Data"""
@@ -51,22 +56,24 @@ def prepare_data(symbol: str, timeframe: str = '5m', days: int = 15):
     print(f"  ✓ Got {len(data_main)} bars ({timeframe}), {len(data_5m)} bars (5m)")
 
     # Calculate indicators
-    data_main = Indicators.calculate_all_indicators(
-        data_main,
+    data_main = INDICATOR_CACHE.calculate_all_indicators(
+        symbol, timeframe, data_main,
         zigzag_depth=25,
         keltner_params={'ma_period': 15, 'atr_period': 10, 'atr_multiple': 0.5, 'ma_method': 1, 'ma_price': 4},
         bollinger_params={'length': 15, 'deviation': 1.0},
         rsi_period=14,
         macd_params={'fast_period': 12, 'slow_period': 26, 'signal_period': 9},
         supertrend_params={'period': 10, 'multiplier': 3.0},
-        cci_period=20
+        cci_period=20,
+        columns=HybridOptimizedStrategy.REQUIRED_COLUMNS_1M
     )
 
-    data_5m = Indicators.calculate_all_indicators(
-        data_5m,
+    data_5m = INDICATOR_CACHE.calculate_all_indicators(
+        symbol, '5m', data_5m,
         zigzag_depth=12,
         cci_period=20,
-        macd_params={'fast_period': 12, 'slow_period': 26, 'signal_period': 9}
+        macd_params={'fast_period': 12, 'slow_period': 26, 'signal_period': 9},
+        columns=HybridOptimizedStrategy.REQUIRED_COLUMNS_5M
     )
 
     return data_main, data_5m
@@ -83,10 +90,24 @@ def get_position_size(symbol: str) -> float:
     return sizes.get(symbol, 0.5)
 
 
-def run_backtest(symbol: str, days: int = 15, timeframe: str = '5m'):
-    """运行回测 Run Backtest"""
+def load_5m_data(symbol: str, days: int):
+    """加载 5m 数据 (MultiSymbolRunner 的 load_data)"""
+    return prepare_data(symbol, '5m', days)
+
+
+def backtest_5m_window(symbol: str, days: int, data_main: pd.DataFrame, data_5m: pd.DataFrame):
+    """回测切好的 5m 窗口 (MultiSymbolRunner 的 run_window)"""
+    return run_backtest(symbol, days=days, timeframe='5m', data=(data_main, data_5m))
+
 
-    data_main, data_5m = prepare_data(symbol, timeframe, days)
+def run_backtest(symbol: str, days: int = 15, timeframe: str = '5m', data: tuple = None):
+    """
+    运行回测 Run Backtest
+
+    data: 已准备好的 (data_main, data_5m), None 时自己获取
+    """
+
+    data_main, data_5m = data if data is not None else prepare_data(symbol, timeframe, days)
     if data_main is None:
         return None
 
@@ -109,8 +130,10 @@ def run_backtest(symbol: str, days: int = 15, timeframe: str = '5m'):
         },
         'backtesting': {
             'initial_capital': 10000,
-            'commission': 0.0001,
-            'slippage': 0.00005
+            'execution': 'bar_close',     # 'intrabar': high/low fills with the costs below
+            'commission': 0.000035,       # Fraction of notional per side
+            'slippage': {'XAUUSD': 0.10, 'default': 0.00002},  # Price units
+            'spread': {'XAUUSD': 0.30, 'default': 0.00010}
         },
         'risk': {
             'max_daily_loss': 1000,
@@ -124,52 +147,7 @@ def run_backtest(symbol: str, days: int = 15, timeframe: str = '5m'):
         data_5m={symbol: data_5m}
     )
 
-    data_5m_resampled = data_5m.reindex(data_main.index, method='ffill')
-    equity_curve = [10000]
-
-    # Track daily stats
-    daily_stats = []
-    last_date = None
-
-    for i in range(50, len(data_main)):
-        current_time = data_main.index[i]
-        current_date = current_time.date()
-
-        # Track daily equity
-        if last_date is None:
-            last_date = current_date
-        if current_date != last_date:
-            daily_stats.append({
-                'date': last_date,
-                'equity': equity_curve[-1]
-            })
-            last_date = current_date
-
-        # Check exit
-        if symbol in strategy.positions:
-            position = strategy.positions[symbol]
-            should_exit, exit_price, reason = strategy.check_exit(
-                position,
-                data_main.iloc[:i+1],
-                current_time
-            )
-            if should_exit:
-                pnl = strategy.close_position(position, exit_price, current_time, reason)
-                equity_curve.append(equity_curve[-1] + pnl)
-
-        # Check entry
-        if symbol not in strategy.positions:
-            signal = strategy.generate_signals(
-                data_main.iloc[:i+1],
-                data_5m_resampled.iloc[:i+1],
-                symbol,
-                current_time
-            )
-            if signal:
-                strategy.open_position(signal)
-
-        if len(equity_curve) <= i - 49:
-            equity_curve.append(equity_curve[-1])
+    equity_curve = BacktestEngine(strategy, symbol).run(data_main, data_5m)
 
     stats = strategy.get_statistics()
     if not stats:
@@ -425,27 +403,23 @@ def main():
 
     results = []
     total_tests = len(symbols) * len(periods)
-    current_test = 0
-
-    for period in periods:
-        for symbol in symbols:
-            current_test += 1
-            print(f"\n{'='*120}")
-            print(f"📊 Test {current_test}/{total_tests}: {symbol} - {period} days")
-            print(f"{'='*120}")
-
-            try:
-                result = run_backtest(symbol, days=period, timeframe='5m')
-                if result:
-                    results.append(result)
-                    print(f"\n✅ {symbol} ({period}d): Trades={result['total_trades']} | "
-                          f"PF={result['profit_factor']:.2f} | WR={result['win_rate']*100:.1f}% | "
-                          f"Return={result['return_pct']:.1f}%")
-                else:
-                    print(f"\n⚠️  {symbol} ({period}d): No trades generated")
-            except Exception as e:
-                print(f"\n❌ {symbol} ({period}d): Error - {e}")
-                logger.error(f"Error backtesting {symbol} {period}d: {e}")
+
+    # 每个 (品种, 窗口) 在工作进程里各自加载并回测, 结果按完成顺序打印
+    runner = MultiSymbolRunner(load_5m_data, backtest_5m_window)
+    for current_test, job in enumerate(runner.run(symbols, periods), start=1):
+        label = f"{job.symbol} ({job.days}d)"
+        if job.error is not None:
+            print(f"❌ [{current_test}/{total_tests}] {label}: Error - {job.error}")
+            logger.error(f"Error backtesting {job.symbol} {job.days}d: {job.error}")
+        elif job.result:
+            results.append(job.result)
+            print(f"✅ [{current_test}/{total_tests}] {label}: Trades={job.result['total_trades']} | "
+                  f"PF={job.result['profit_factor']:.2f} | WR={job.result['win_rate']*100:.1f}% | "
+                  f"Return={job.result['return_pct']:.1f}%")
+        else:
+            print(f"⚠️  [{current_test}/{total_tests}] {label}: No trades generated")
+
+    results.sort(key=lambda r: (r['requested_days'], symbols.index(r['symbol'])))
 
     # Generate reports
     print("\n" + "="*120)
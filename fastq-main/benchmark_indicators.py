@@ -0,0 +1,334 @@
+"""
+指标性能基准 Indicator Performance Benchmark
+对比旧版逐K线实现与新版数组内核 (结果必须完全一致)
+Compares the legacy per-bar implementations against the array kernels
+(outputs must be bit-identical)
+
+用法 Usage:
+    python benchmark_indicators.py
+    python benchmark_indicators.py --sizes 10000 100000 1000000 --max-legacy-bars 100000
+    python benchmark_indicators.py --indicators cci --sizes 370000   # ~1 year of 1m XAUUSD
+    python benchmark_indicators.py --pipeline --sizes 1000000
+"""
+
+import argparse
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from src.indicators.indicators import Indicators
+from src.indicators.kernels import supertrend_kernel
+
+
+def make_ohlc(n_bars: int, seed: int = 42) -> pd.DataFrame:
+    """生成模拟XAUUSD 1分钟K线 Generate synthetic XAUUSD-like 1m bars"""
+    rng = np.random.default_rng(seed)
+    close = 2000 + np.cumsum(rng.normal(0, 0.35, n_bars))
+    open_ = np.r_[close[0], close[:-1]]
+    spread = np.abs(rng.normal(0, 0.25, n_bars))
+    high = np.maximum(open_, close) + spread
+    low = np.minimum(open_, close) - spread
+    index = pd.date_range('2024-01-01', periods=n_bars, freq='1min')
+    # Quote to 2 decimals like the broker feed, so equal highs/lows actually occur
+    return pd.DataFrame({
+        'open': open_.round(2),
+        'high': high.round(2),
+        'low': low.round(2),
+        'close': close.round(2),
+        'volume': rng.integers(1, 500, n_bars)
+    }, index=index)
+
+
+# ============================================================================
+# 旧版实现 Legacy implementations (reference for correctness and timing)
+# ============================================================================
+
+def legacy_zigzag(high: pd.Series, low: pd.Series, depth: int = 35) -> pd.Series:
+    """Original per-bar window scan, O(n * depth)"""
+    zigzag = pd.Series(0, index=high.index)
+    last_pivot = None
+    last_pivot_type = None
+    trend = 0
+
+    for i in range(depth, len(high)):
+        swing_high = high.iloc[i - depth:i + 1].max()
+        swing_low = low.iloc[i - depth:i + 1].min()
+
+        current_high = high.iloc[i]
+        current_low = low.iloc[i]
+
+        if current_high == swing_high:
+            if last_pivot_type == 'low' or last_pivot is None:
+                if last_pivot is None or current_high > last_pivot:
+                    last_pivot = current_high
+                    last_pivot_type = 'high'
+                    trend = -1
+
+        elif current_low == swing_low:
+            if last_pivot_type == 'high' or last_pivot is None:
+                if last_pivot is None or current_low < last_pivot:
+                    last_pivot = current_low
+                    last_pivot_type = 'low'
+                    trend = 1
+
+        zigzag.iloc[i] = trend
+
+    return zigzag
+
+
+def legacy_supertrend(data: pd.DataFrame, period: int = 10, multiplier: float = 3.0):
+    """Original per-bar .iloc loop over four Series"""
+    atr = Indicators.atr(data, period=period)
+
+    high = data['high']
+    low = data['low']
+    close = data['close']
+
+    hl_avg = (high + low) / 2
+    upper_band = hl_avg + (multiplier * atr)
+    lower_band = hl_avg - (multiplier * atr)
+
+    supertrend = pd.Series(0.0, index=data.index)
+    direction = pd.Series(1, index=data.index)
+
+    for i in range(1, len(data)):
+        if close.iloc[i-1] <= upper_band.iloc[i-1]:
+            upper_band.iloc[i] = min(upper_band.iloc[i], upper_band.iloc[i-1])
+
+        if close.iloc[i-1] >= lower_band.iloc[i-1]:
+            lower_band.iloc[i] = max(lower_band.iloc[i], lower_band.iloc[i-1])
+
+        if close.iloc[i] <= upper_band.iloc[i]:
+            direction.iloc[i] = -1
+            supertrend.iloc[i] = upper_band.iloc[i]
+        else:
+            direction.iloc[i] = 1
+            supertrend.iloc[i] = lower_band.iloc[i]
+
+        if direction.iloc[i] == 1 and direction.iloc[i-1] == -1:
+            supertrend.iloc[i] = lower_band.iloc[i]
+        elif direction.iloc[i] == -1 and direction.iloc[i-1] == 1:
+            supertrend.iloc[i] = upper_band.iloc[i]
+
+    return supertrend, direction
+
+
+def legacy_cci(data: pd.DataFrame, period: int = 20) -> pd.Series:
+    """Original CCI with a Python lambda per bar for the mean deviation"""
+    tp = (data['high'] + data['low'] + data['close']) / 3
+    sma_tp = tp.rolling(window=period).mean()
+    mad = tp.rolling(window=period).apply(lambda x: np.abs(x - x.mean()).mean())
+    return (tp - sma_tp) / (0.015 * mad)
+
+
+def legacy_atr(data: pd.DataFrame, period: int = 14) -> pd.Series:
+    """Original ATR: true range via concat + row-wise max"""
+    high = data['high']
+    low = data['low']
+    close = data['close']
+
+    tr1 = high - low
+    tr2 = abs(high - close.shift())
+    tr3 = abs(low - close.shift())
+
+    tr = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
+    return tr.rolling(window=period).mean()
+
+
+def legacy_calculate_all_indicators(data: pd.DataFrame) -> pd.DataFrame:
+    """
+    Original pipeline shape: copy the frame, run every indicator independently
+    (ATR three times, EMAs per indicator) and grow the frame column by column
+    """
+    df = data.copy()
+    df['zigzag'] = Indicators.zigzag(df['high'], df['low'], depth=35)
+
+    price = df['close']
+    kc_mid = price.ewm(span=20, adjust=False).mean()
+    kc_atr = legacy_atr(df, period=10)
+    df['kc_mid'] = kc_mid
+    df['kc_upper'] = kc_mid + (kc_atr * 0.5)
+    df['kc_lower'] = kc_mid - (kc_atr * 0.5)
+
+    bb_mid = df['close'].rolling(window=34).mean()
+    bb_std = df['close'].rolling(window=34).std()
+    df['bb_mid'] = bb_mid
+    df['bb_upper'] = bb_mid + bb_std
+    df['bb_lower'] = bb_mid - bb_std
+
+    df['rsi'] = Indicators.rsi(df['close'], period=14)
+    df['rsi_crossover'] = Indicators.rsi_crossover(df['rsi'])
+
+    ema_fast = df['close'].ewm(span=12, adjust=False).mean()
+    ema_slow = df['close'].ewm(span=26, adjust=False).mean()
+    macd_line = ema_fast - ema_slow
+    signal_line = macd_line.ewm(span=9, adjust=False).mean()
+    df['macd'] = macd_line
+    df['macd_signal'] = signal_line
+    df['macd_histogram'] = macd_line - signal_line
+    df['macd_crossover'] = Indicators.macd_crossover(macd_line, signal_line)
+
+    st_atr = legacy_atr(df, period=10)
+    hl_avg = (df['high'] + df['low']) / 2
+    upper_band = hl_avg + (3.0 * st_atr)
+    lower_band = hl_avg - (3.0 * st_atr)
+    supertrend, direction = supertrend_kernel(
+        df['close'].to_numpy(dtype=np.float64),
+        upper_band.to_numpy(dtype=np.float64, copy=True),
+        lower_band.to_numpy(dtype=np.float64, copy=True)
+    )
+    df['supertrend'] = supertrend
+    df['supertrend_direction'] = direction
+
+    df['cci'] = Indicators.cci(df, period=20)
+    df['atr'] = legacy_atr(df, period=14)
+
+    return df
+
+
+# ============================================================================
+# 基准测试 Benchmark cases: name -> (legacy_fn, new_fn, compare_fn)
+# ============================================================================
+
+def _assert_series_equal(expected: pd.Series, actual: pd.Series):
+    pd.testing.assert_series_equal(expected, actual, check_exact=True, check_names=False)
+
+
+def _assert_tuple_equal(expected: tuple, actual: tuple):
+    for e, a in zip(expected, actual):
+        _assert_series_equal(e, a)
+
+
+BENCHMARKS = {
+    'zigzag': (
+        lambda df, depth: legacy_zigzag(df['high'], df['low'], depth=depth),
+        lambda df, depth: Indicators.zigzag(df['high'], df['low'], depth=depth),
+        _assert_series_equal,
+    ),
+    'supertrend': (
+        lambda df, period: legacy_supertrend(df, period=period, multiplier=3.0),
+        lambda df, period: Indicators.supertrend(df, period=period, multiplier=3.0),
+        _assert_tuple_equal,
+    ),
+    'cci': (
+        lambda df, period: legacy_cci(df, period=period),
+        lambda df, period: Indicators.cci(df, period=period),
+        _assert_series_equal,
+    ),
+}
+
+
+def _time_call(func, *args, repeat: int = 1):
+    """Best-of-N wall time"""
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def run_benchmark(name: str, sizes: list, max_legacy_bars: int, param):
+    """运行单项基准 Run one benchmark across sizes"""
+    legacy_fn, new_fn, compare_fn = BENCHMARKS[name]
+
+    # Warm up (numba compilation / disk cache load)
+    new_fn(make_ohlc(500), param)
+
+    print(f"\n{'─'*80}")
+    print(f"📊 {name} (param={param})")
+    print(f"{'─'*80}")
+    print(f"{'Bars':>10} {'Legacy (s)':>14} {'New (s)':>12} {'Speedup':>10}  {'Identical':<10}")
+
+    for n_bars in sizes:
+        df = make_ohlc(n_bars)
+        new_time, new_result = _time_call(new_fn, df, param, repeat=3)
+
+        if n_bars <= max_legacy_bars:
+            legacy_time, legacy_result = _time_call(legacy_fn, df, param)
+            compare_fn(legacy_result, new_result)
+            legacy_label = f"{legacy_time:>14.3f}"
+            identical = "✅ yes"
+        else:
+            # Legacy cost is linear in bars for a fixed param; estimate from the largest measured run
+            probe = min(max_legacy_bars, n_bars)
+            probe_df = df.iloc[:probe]
+            legacy_time, legacy_result = _time_call(legacy_fn, probe_df, param)
+            compare_fn(legacy_result, new_fn(probe_df, param))
+            legacy_time *= n_bars / probe
+            legacy_label = f"{'~' + format(legacy_time, '.3f'):>14}"
+            identical = f"✅ first {probe}"
+
+        speedup = legacy_time / new_time if new_time > 0 else float('inf')
+        print(f"{n_bars:>10} {legacy_label} {new_time:>12.4f} {speedup:>9.0f}x  {identical:<10}")
+
+
+def run_pipeline_benchmark(sizes: list):
+    """对比整体指标计算 Compare the full calculate_all_indicators pass: time and peak memory"""
+    legacy_calculate_all_indicators(make_ohlc(500))
+    Indicators.calculate_all_indicators(make_ohlc(500))
+
+    print(f"\n{'─'*80}")
+    print("📊 calculate_all_indicators (all columns, default params)")
+    print(f"{'─'*80}")
+    print(f"{'Bars':>10} {'Before (s)':>12} {'After (s)':>12} {'Before peak':>14} {'After peak':>14}")
+
+    for n_bars in sizes:
+        df = make_ohlc(n_bars)
+        row = []
+        for func in (legacy_calculate_all_indicators, Indicators.calculate_all_indicators):
+            elapsed, result = _time_call(func, df, repeat=3)
+            del result
+            tracemalloc.start()
+            result = func(df)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            row.append((elapsed, peak, result))
+
+        pd.testing.assert_frame_equal(row[0][2], row[1][2], check_exact=True)
+        print(f"{n_bars:>10} {row[0][0]:>12.3f} {row[1][0]:>12.3f} "
+              f"{row[0][1] / 1e6:>12.1f}MB {row[1][1] / 1e6:>12.1f}MB")
+
+
+def main():
+    """主函数 Main Function"""
+    parser = argparse.ArgumentParser(description='Indicator kernel benchmark')
+    parser.add_argument('--indicators', nargs='+', default=list(BENCHMARKS), choices=list(BENCHMARKS))
+    parser.add_argument('--sizes', nargs='+', type=int, default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--max-legacy-bars', type=int, default=100_000,
+                        help='Run the legacy path at most this many bars, extrapolate above')
+    parser.add_argument('--zigzag-depth', type=int, default=25)
+    parser.add_argument('--supertrend-period', type=int, default=10)
+    parser.add_argument('--cci-period', type=int, default=20)
+    parser.add_argument('--pipeline', action='store_true',
+                        help='Benchmark the whole calculate_all_indicators pass instead')
+    args = parser.parse_args()
+
+    params = {
+        'zigzag': args.zigzag_depth,
+        'supertrend': args.supertrend_period,
+        'cci': args.cci_period,
+    }
+
+    print("\n" + "="*80)
+    print("🚀 INDICATOR KERNEL BENCHMARK")
+    print("="*80)
+
+    if args.pipeline:
+        run_pipeline_benchmark(args.sizes)
+    else:
+        for name in args.indicators:
+            run_benchmark(name, args.sizes, args.max_legacy_bars, params[name])
+
+    print("\n" + "="*80 + "\n")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+"""
+实盘运行时压力测试 Live Runtime Load Test
+用模拟 MT5 终端 (src/live/mock_mt5.py) 和合成品种测量每个周期的耗时
+Measures the per-bar cycle time of LiveRuntime against a local MT5 stand-in
+
+用法 Usage:
+    python benchmark_live_runtime.py
+    python benchmark_live_runtime.py --symbols 50 --cycles 5 --latency 0.01 --workers 1 8 32
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+import yaml
+from loguru import logger
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from src.live.bar_feed import LiveBarFeed, indicator_params
+from src.live.mock_mt5 import MockMT5, mock_symbols
+from src.live.runtime import LiveRuntime
+from src.mt4.mt4_connector import MT4Connector
+from src.strategy.hybrid_optimized_strategy import HybridOptimizedStrategy
+
+
+def make_config(base_config: dict, symbols: list) -> dict:
+    """合成品种的配置 Config trading the synthetic symbols"""
+    config = dict(base_config)
+    config['trading'] = dict(base_config['trading'], symbols=symbols,
+                             position_sizes={symbol: 0.1 for symbol in symbols})
+    return config
+
+
+async def run_load_test(config: dict, n_symbols: int, cycles: int, latency: float, workers: int) -> dict:
+    """一组参数的压力测试 Run `cycles` bar closes over `n_symbols` symbols"""
+    symbols = mock_symbols(n_symbols)
+    config = make_config(config, symbols)
+    mt5 = MockMT5(symbols, latency=latency)
+    connector = MT4Connector(config, mt5_api=mt5)
+    connector.connect()
+    feed = LiveBarFeed(
+        mt5,
+        clock=lambda: mt5.now.timestamp(),  # 模拟时钟 (估算新K线数) Simulated clock
+        params={timeframe: indicator_params(config, timeframe) for timeframe in ('1m', '5m')},
+        columns={'1m': HybridOptimizedStrategy.REQUIRED_COLUMNS_1M, '5m': HybridOptimizedStrategy.REQUIRED_COLUMNS_5M}
+    )
+    runtime = LiveRuntime(config, feed, connector, max_workers=workers)
+
+    try:
+        for cycle in range(cycles + 1):  # 第 0 个周期加载历史 Cycle 0 loads the history
+            if cycle == 1:
+                warmup_bars = feed.rows_fetched
+            mt5.advance(60)  # 新的一根K线 A new bar for every symbol
+            errors = await runtime.run_cycle(time.time())
+            failed = [symbol for symbol, error in errors.items() if error is not None]
+            if failed:
+                raise RuntimeError(f"{len(failed)} symbols failed, e.g. {failed[0]}: {errors[failed[0]]}")
+    finally:
+        runtime.close()
+
+    samples = list(runtime.cycle_latency.samples)
+    return {
+        'workers': workers,
+        'warmup_s': samples[0],
+        'mean_s': sum(samples[1:]) / cycles,
+        'max_s': max(samples[1:]),
+        'mt5_calls': mt5.calls,
+        'bars_per_cycle': (feed.rows_fetched - warmup_bars) / cycles,
+        'orders': runtime.order_latency.count,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Live runtime load test')
+    parser.add_argument('--config', default='config/config_hybrid_level1.yaml', help='Base config file')
+    parser.add_argument('--symbols', type=int, default=50, help='Number of synthetic symbols')
+    parser.add_argument('--cycles', type=int, default=5, help='Bar closes to simulate after the warm-up cycle')
+    parser.add_argument('--latency', type=float, default=0.01, help='Seconds per mock MT5 call')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 8, 32], help='Executor sizes to compare')
+    args = parser.parse_args()
+
+    logger.remove()
+    logger.add(sys.stderr, level='WARNING')
+
+    with open(args.config) as f:
+        config = yaml.safe_load(f)
+
+    print(f"{args.symbols} symbols x {args.cycles} cycles, {args.latency * 1000:.0f}ms per MT5 call")
+    print(f"{'Workers':>8} {'Warmup':>8} {'Cycle mean':>11} {'Cycle max':>10} {'MT5 calls':>10} "
+          f"{'Bars/cycle':>11} {'Orders':>7}")
+    for workers in args.workers:
+        result = asyncio.run(run_load_test(config, args.symbols, args.cycles, args.latency, workers))
+        print(f"{result['workers']:>8} {result['warmup_s']:>7.2f}s {result['mean_s']:>10.2f}s {result['max_s']:>9.2f}s "
+              f"{result['mt5_calls']:>10} {result['bars_per_cycle']:>11.0f} {result['orders']:>7}")
+
+
+if __name__ == '__main__':
+    main()
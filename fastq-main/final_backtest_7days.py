@@ -16,8 +16,9 @@ import json
 sys.path.insert(0, str(Path(__file__).parent))
 
 from src.strategy.hybrid_optimized_strategy import HybridOptimizedStrategy
-from src.indicators.indicators import Indicators
+from src.backtesting.engine import BacktestEngine
 from src.data.data_fetcher import DataFetcher
+from src.store import IndicatorCache
 from loguru import logger
 import warnings
 warnings.filterwarnings('ignore')
@@ -25,6 +26,9 @@ warnings.filterwarnings('ignore')
 plt.rcParams['font.sans-serif'] = ['Arial Unicode MS', 'SimHei', 'DejaVu Sans']
 plt.rcParams['axes.unicode_minus'] = False
 
+# 指标磁盘缓存: 重复运行和被更长窗口覆盖的短窗口不再重算
+INDICATOR_CACHE = IndicatorCache()
+
 
 def prepare_data(symbol: str, timeframe: str = '1m', days: int = 7):
     """准备数据 Prepare Data"""
@@ -45,22 +49,24 @@ def prepare_data(symbol: str, timeframe: str = '1m', days: int = 7):
         logger.error(f"Failed to load data for {symbol}")
         return None, None
 
-    data_main = Indicators.calculate_all_indicators(
-        data_main,
+    data_main = INDICATOR_CACHE.calculate_all_indicators(
+        symbol, timeframe, data_main,
         zigzag_depth=25,
         keltner_params={'ma_period': 15, 'atr_period': 10, 'atr_multiple': 0.5, 'ma_method': 1, 'ma_price': 4},
         bollinger_params={'length': 15, 'deviation': 1.0},
         rsi_period=14,
         macd_params={'fast_period': 12, 'slow_period': 26, 'signal_period': 9},
         supertrend_params={'period': 10, 'multiplier': 3.0},
-        cci_period=20
+        cci_period=20,
+        columns=HybridOptimizedStrategy.REQUIRED_COLUMNS_1M
     )
 
-    data_5m = Indicators.calculate_all_indicators(
-        data_5m,
+    data_5m = INDICATOR_CACHE.calculate_all_indicators(
+        symbol, '5m', data_5m,
         zigzag_depth=12,
         cci_period=20,
-        macd_params={'fast_period': 12, 'slow_period': 26, 'signal_period': 9}
+        macd_params={'fast_period': 12, 'slow_period': 26, 'signal_period': 9},
+        columns=HybridOptimizedStrategy.REQUIRED_COLUMNS_5M
     )
 
     return data_main, data_5m
@@ -76,32 +82,14 @@ def run_backtest(symbol: str, aggressiveness: int = 1, timeframe: str = '1m', da
     config = {
         'trading': {'position_sizes': {'XAUUSD': 0.3, 'EURUSD': 0.9}},
         'strategy': {'aggressiveness': aggressiveness, 'trailing_activation': 0.8, 'trailing_distance': 1.0},
-        'backtesting': {'initial_capital': 10000, 'commission': 0.0001, 'slippage': 0.00005},
+        'backtesting': {'initial_capital': 10000, 'execution': 'bar_close', 'commission': 0.000035,
+                        'slippage': {'XAUUSD': 0.10, 'default': 0.00002},
+                        'spread': {'XAUUSD': 0.30, 'default': 0.00010}},
         'risk': {'max_daily_loss': max_daily_loss, 'max_drawdown': max_drawdown}
     }
 
     strategy = HybridOptimizedStrategy(config=config, data_1m={symbol: data_main}, data_5m={symbol: data_5m})
-    data_5m_resampled = data_5m.reindex(data_main.index, method='ffill')
-
-    equity_curve = [10000]
-
-    for i in range(50, len(data_main)):
-        current_time = data_main.index[i]
-
-        if symbol in strategy.positions:
-            position = strategy.positions[symbol]
-            should_exit, exit_price, reason = strategy.check_exit(position, data_main.iloc[:i+1], current_time)
-            if should_exit:
-                pnl = strategy.close_position(position, exit_price, current_time, reason)
-                equity_curve.append(equity_curve[-1] + pnl)
-
-        if symbol not in strategy.positions:
-            signal = strategy.generate_signals(data_main.iloc[:i+1], data_5m_resampled.iloc[:i+1], symbol, current_time)
-            if signal:
-                strategy.open_position(signal)
-
-        if len(equity_curve) <= i - 49:
-            equity_curve.append(equity_curve[-1])
+    equity_curve = BacktestEngine(strategy, symbol).run(data_main, data_5m)
 
     stats = strategy.get_statistics()
     if not stats:
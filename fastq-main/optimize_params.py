@@ -0,0 +1,174 @@
+"""
+参数优化 Parameter Optimization
+在参数网格或随机搜索空间上并行回测, 输出按盈利因子排名的结果表
+Parallel sweep over strategy / indicator parameters, ranked by profit factor
+
+--walk-forward: 滚动训练/测试窗口, 每折样本内选参, 样本外评估
+"""
+
+from pathlib import Path
+import sys
+import argparse
+from datetime import datetime, timedelta
+
+import yaml
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from src.backtesting.optimizer import ParameterOptimizer, grid_search_space, random_search_space
+from src.backtesting.walk_forward import WalkForwardOptimizer
+from src.data.data_fetcher import DataFetcher
+from src.store import BarStore
+from loguru import logger
+
+
+# 默认搜索网格 Default grid (点路径对应 YAML 配置)
+DEFAULT_GRID = {
+    'strategy.aggressiveness': [1, 2, 3],
+    'strategy.trailing_activation': [0.5, 0.8, 1.0, 1.2],
+    'strategy.trailing_distance': [0.5, 1.0, 1.5],
+    'strategy.keltner.ma_period': [10, 15, 20],
+    'strategy.bollinger.length': [10, 15, 20],
+    'strategy.cci.period': [14, 20],
+}
+
+# 默认随机搜索空间 Default random space: (low, high) ranges or candidate lists
+DEFAULT_RANDOM_SPACE = {
+    'strategy.aggressiveness': [1, 2, 3],
+    'strategy.trailing_activation': (0.4, 1.5),
+    'strategy.trailing_distance': (0.5, 2.0),
+    'strategy.keltner.ma_period': (8, 30),
+    'strategy.bollinger.length': (8, 30),
+    'strategy.cci.period': (10, 30),
+}
+
+
+def prepare_data(symbol: str, days: int, source: str, store_root: str = 'data/bars'):
+    """
+    准备数据 Prepare 1m and 5m OHLC (指标在工作进程中按参数计算)
+
+    先读本地 BarStore, 只下载本地没有的首尾区间 (store_root=None 时直接下载)
+    """
+    fetcher = DataFetcher(source=source)
+    end_date = datetime.now()
+    start_date = end_date - timedelta(days=days)
+
+    print(f"  Loading {symbol} data ({days} days, {source})...")
+    if store_root:
+        store = BarStore(store_root)
+        data_1m = store.load(symbol, '1m', start_date, end_date, fetcher=fetcher)
+        data_5m = store.load(symbol, '5m', start_date, end_date, fetcher=fetcher)
+    else:
+        data_1m = fetcher.get_historical_data(symbol, '1m', start_date=start_date, end_date=end_date)
+        data_5m = fetcher.get_historical_data(symbol, '5m', start_date=start_date, end_date=end_date)
+
+    if data_1m is None or data_5m is None or data_1m.empty or data_5m.empty:
+        logger.error(f"Failed to load data for {symbol}")
+        return None, None
+
+    return data_1m, data_5m
+
+
+def run_walk_forward(args, config: dict, param_sets: list, data_1m, data_5m):
+    """滚动前向优化 Walk-forward run and report"""
+    wf = WalkForwardOptimizer(config, args.symbol, data_1m, data_5m, train_days=args.train_days,
+                              test_days=args.test_days, step_days=args.step_days,
+                              workers=args.workers, min_trades=args.min_trades)
+    report = wf.run(param_sets, rank_by=args.rank_by, ascending=(args.rank_by == 'max_drawdown'))
+    if not report:
+        return
+
+    output = Path(args.output or f'results/walk_forward_{args.symbol}.csv')
+    output.parent.mkdir(parents=True, exist_ok=True)
+    ParameterOptimizer.save(report['folds'], str(output))
+    ParameterOptimizer.save(report['stability'].reset_index(), str(output.with_name(output.stem + '_stability' + output.suffix)))
+    report['equity'].rename('equity').to_csv(output.with_name(output.stem + '_equity.csv'))
+
+    oos = report['oos_metrics']
+    print("\n" + "="*80)
+    print(f"📈 WALK-FORWARD ({len(report['folds'])} folds, {args.train_days:g}d train / {args.test_days:g}d test)")
+    print("="*80)
+    print(report['folds'].to_string(index=False))
+    print("-"*80)
+    print(report['stability'].to_string())
+    print("-"*80)
+    print(f"样本外 Out-of-sample: Trades: {oos['total_trades']} | PF: {oos['profit_factor']:.2f} | "
+          f"Win Rate: {oos['win_rate']*100:.1f}% | Return: {oos['return_pct']:.1f}% | "
+          f"Max DD: {oos['max_drawdown']:.1f}% | Sharpe: {oos['sharpe']:.2f}")
+    print(f"📄 Results: {output}")
+    print("="*80 + "\n")
+
+
+def main():
+    """主函数 Main Function"""
+    parser = argparse.ArgumentParser(description='Parallel parameter sweep for HybridOptimizedStrategy')
+    parser.add_argument('--config', default='config/config_hybrid_level1.yaml', help='Base YAML config')
+    parser.add_argument('--symbol', default='XAUUSD')
+    parser.add_argument('--days', type=int, default=30)
+    parser.add_argument('--search', choices=['grid', 'random'], default='grid')
+    parser.add_argument('--samples', type=int, default=200, help='Random search samples')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--grid', help='YAML file with {path: [values]} (grid) or {path: [low, high]} (random)')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: all cores)')
+    parser.add_argument('--rank-by', default='profit_factor')
+    parser.add_argument('--output', default=None, help='.csv or .parquet (default: results/optimization_<symbol>.csv)')
+    parser.add_argument('--walk-forward', action='store_true', help='Rolling train/test optimization')
+    parser.add_argument('--train-days', type=float, default=20)
+    parser.add_argument('--test-days', type=float, default=5)
+    parser.add_argument('--step-days', type=float, default=None, help='Window step (default: test days)')
+    parser.add_argument('--min-trades', type=int, default=10, help='Min train trades for a config to be picked')
+    parser.add_argument('--store', default='data/bars', help="Local bar store root ('' to always download)")
+    args = parser.parse_args()
+
+    logger.remove()
+    logger.add(sys.stdout, level='WARNING')
+
+    with open(args.config, 'r') as f:
+        config = yaml.safe_load(f)
+
+    if args.grid:
+        with open(args.grid, 'r') as f:
+            space = yaml.safe_load(f)
+        if args.search == 'random':
+            # YAML 没有元组: 两个数字的列表当作 (low, high) 区间
+            space = {path: tuple(values) if len(values) == 2 and all(isinstance(v, (int, float)) for v in values)
+                     else values for path, values in space.items()}
+    else:
+        space = DEFAULT_GRID if args.search == 'grid' else DEFAULT_RANDOM_SPACE
+
+    if args.search == 'grid':
+        param_sets = grid_search_space(space)
+    else:
+        param_sets = random_search_space(space, args.samples, seed=args.seed)
+
+    print("\n" + "="*80)
+    print(f"🔍 参数优化 Parameter Optimization: {args.symbol} | {len(param_sets)} configs | {args.search}")
+    print("="*80 + "\n")
+
+    data_1m, data_5m = prepare_data(args.symbol, args.days, config.get('data', {}).get('source', 'yfinance'),
+                                    store_root=args.store)
+    if data_1m is None:
+        return
+
+    if args.walk_forward:
+        run_walk_forward(args, config, param_sets, data_1m, data_5m)
+        return
+
+    optimizer = ParameterOptimizer(config, args.symbol, data_1m, data_5m, workers=args.workers)
+    results = optimizer.run(param_sets, rank_by=args.rank_by, ascending=(args.rank_by == 'max_drawdown'))
+
+    output = args.output or f'results/optimization_{args.symbol}.csv'
+    Path(output).parent.mkdir(parents=True, exist_ok=True)
+    optimizer.save(results, output)
+
+    print("\n" + "="*80)
+    print(f"🏆 TOP 10 (by {args.rank_by})")
+    print("="*80)
+    print(results.head(10).to_string(index=False))
+    print("="*80)
+    print(f"📄 Results: {output}")
+    print("="*80 + "\n")
+
+
+if __name__ == '__main__':
+    main()
@@ -3,10 +3,9 @@
 使用MT4/MT5执行实时交易 Execute trades in real-time using MT4/MT5
 """
 
+import asyncio
 import yaml
 import sys
-import time
-import pandas as pd
 from pathlib import Path
 from datetime import datetime, timedelta
 from loguru import logger
@@ -14,10 +13,11 @@ from loguru import logger
 # Add src to path
 sys.path.insert(0, str(Path(__file__).parent))
 
-from src.data.data_fetcher import DataFetcher
-from src.indicators.indicators import Indicators
-from src.strategy.hybrid_optimized_strategy import HybridOptimizedStrategy
+from src.live.bar_feed import LiveBarFeed, indicator_params
+from src.live.runtime import LiveRuntime
+from src.live.scheduler import BarCloseScheduler
 from src.mt4.mt4_connector import MT4Connector
+from src.strategy.hybrid_optimized_strategy import HybridOptimizedStrategy
 
 
 def load_config(config_path: str = "config/config.yaml") -> dict:
@@ -38,16 +38,44 @@ class LiveTrader:
         self.position_sizes = config['trading']['position_sizes']
 
         # 初始化组件 Initialize components
-        self.data_fetcher = DataFetcher(source="mt5")
         self.mt4 = MT4Connector(config)
-
-        # 初始化策略 (需要1m和5m数据) Initialize strategy (needs 1m and 5m data)
-        self.strategy = None  # Will be initialized after first data fetch
+        live_config = config.get('live', {})
+
+        # 增量K线 + 流式指标 (每个周期只取新K线) Incremental bars with streaming indicators
+        self.bar_feed = LiveBarFeed(
+            self.mt4.mt5,
+            bars=live_config.get('window_bars', 200),
+            warmup=live_config.get('warmup_bars', 500),
+            params={timeframe: indicator_params(config, timeframe) for timeframe in ('1m', '5m')},
+            columns={'1m': HybridOptimizedStrategy.REQUIRED_COLUMNS_1M, '5m': HybridOptimizedStrategy.REQUIRED_COLUMNS_5M}
+        )
 
         self.running = False
         self.tick_count = 0
         self.last_print_time = None  # 上次打印时间
 
+        # K线收盘调度 Bar-close scheduling (收盘后 bar_close_offset 秒处理)
+        self.scheduler = BarCloseScheduler(self.timeframe, offset=live_config.get('bar_close_offset', 1.0))
+        self.bar_close = None  # 当前周期的K线收盘时间 (epoch 秒)
+
+        # 按品种并发的流水线 (策略在第一批数据到达时初始化, 需要1m和5m数据)
+        # Per-symbol concurrent pipelines; the strategy is created from the first data fetch
+        self.runtime = LiveRuntime(config, self.bar_feed, self.mt4,
+                                   max_workers=live_config.get('max_workers', 8))
+
+    @property
+    def strategy(self):
+        """共享策略 Shared strategy (None before the first data fetch)"""
+        return self.runtime.strategy
+
+    @property
+    def order_latency(self):
+        return self.runtime.order_latency
+
+    @property
+    def cycle_latency(self):
+        return self.runtime.cycle_latency
+
     def start(self):
         """Start live trading"""
 
@@ -65,12 +93,30 @@ class LiveTrader:
         print("Press Ctrl+C to stop")
         print("="*80 + "\n")
 
+        try:
+            asyncio.run(self._run())
+        except KeyboardInterrupt:
+            print("\n" + "="*80)
+            print("⚠️  STOPPING LIVE TRADING...")
+            print("="*80)
+        except Exception as e:
+            logger.error(f"Error in trading loop: {e}")
+            print(f"\n❌ ERROR: {e}")
+        finally:
+            self.stop()
+
+    async def _run(self):
+        """主循环 Main loop: one concurrent cycle per bar close"""
         try:
             while self.running:
+                # 等到K线收盘 Wait for the bar close (wall-clock aligned, no drift)
+                self.bar_close = await asyncio.to_thread(self.scheduler.wait)
+                if self.bar_close is None:
+                    break
                 self.tick_count += 1
 
-                # Main trading loop
-                self._process_tick()
+                # 所有品种并发处理 Main trading cycle, all symbols concurrently
+                await self.runtime.run_cycle(self.bar_close)
 
                 # Print status every tick (real-time)
                 self._print_realtime_status()
@@ -78,172 +124,20 @@ class LiveTrader:
                 # Detailed log every 10 ticks
                 if self.tick_count % 10 == 0:
                     self._log_status()
-
-                # Sleep for timeframe interval
-                time.sleep(60)  # 1 minute for 1m timeframe
-
-        except KeyboardInterrupt:
-            print("\n" + "="*80)
-            print("⚠️  STOPPING LIVE TRADING...")
-            print("="*80)
-        except Exception as e:
-            logger.error(f"Error in trading loop: {e}")
-            print(f"\n❌ ERROR: {e}")
         finally:
-            self.stop()
+            self.scheduler.stop()  # 唤醒等待线程, 让 asyncio.run 能退出 Release the waiting thread
 
     def stop(self):
         """Stop live trading"""
         self.running = False
+        self.scheduler.stop()
+        self.runtime.close()
 
         # Close connections
-        self.data_fetcher.close()
         self.mt4.disconnect()
 
         logger.info("Live trading stopped")
 
-    def _process_tick(self):
-        """处理每个时间点 Process Each Tick/Bar"""
-
-        for symbol in self.symbols:
-            try:
-                # 获取最新数据 Fetch latest data (1m and 5m)
-                data_1m = self.data_fetcher.get_historical_data(
-                    symbol=symbol,
-                    timeframe='1m',
-                    bars=200
-                )
-
-                data_5m = self.data_fetcher.get_historical_data(
-                    symbol=symbol,
-                    timeframe='5m',
-                    bars=200
-                )
-
-                if data_1m.empty or data_5m.empty:
-                    logger.warning(f"No data for {symbol}")
-                    continue
-
-                # 计算指标 Calculate indicators
-                data_1m = Indicators.calculate_all_indicators(
-                    data_1m,
-                    zigzag_depth=self.config['strategy']['zigzag']['depth_1m'],
-                    keltner_params=self.config['strategy']['keltner'],
-                    bollinger_params=self.config['strategy']['bollinger'],
-                    rsi_period=self.config['strategy']['rsi']['period'],
-                    macd_params=self.config['strategy']['macd'],
-                    supertrend_params=self.config['strategy']['supertrend'],
-                    cci_period=self.config['strategy']['cci']['period']
-                )
-
-                data_5m = Indicators.calculate_all_indicators(
-                    data_5m,
-                    zigzag_depth=self.config['strategy']['zigzag']['depth_5m'],
-                    cci_period=self.config['strategy']['cci']['period'],
-                    macd_params=self.config['strategy']['macd']
-                )
-
-                data_1m = data_1m.dropna()
-                data_5m = data_5m.dropna()
-
-                if data_1m.empty or data_5m.empty:
-                    continue
-
-                # 初始化策略 (首次) Initialize strategy (first time)
-                if self.strategy is None:
-                    self.strategy = HybridOptimizedStrategy(
-                        config=self.config,
-                        data_1m={symbol: data_1m},
-                        data_5m={symbol: data_5m}
-                    )
-
-                # Resample 5m to 1m index
-                data_5m_resampled = data_5m.reindex(data_1m.index, method='ffill')
-
-                # 管理现有仓位 Check existing positions
-                self._manage_positions(symbol, data_1m)
-
-                # 检查新信号 Check for new signals
-                if symbol not in self.strategy.positions:
-                    self._check_entry_signals(symbol, data_1m, data_5m_resampled)
-
-            except Exception as e:
-                logger.error(f"Error processing {symbol}: {e}")
-
-    def _manage_positions(self, symbol: str, data: pd.DataFrame):
-        """管理现有仓位 Manage Existing Positions"""
-
-        # 获取MT4持仓 Get MT4 positions
-        mt4_positions = self.mt4.get_open_positions(symbol=symbol)
-
-        # 检查策略是否有持仓 Check if we have strategy position
-        if symbol in self.strategy.positions:
-            strategy_pos = self.strategy.positions[symbol]
-
-            # 检查出场条件 Check exit conditions
-            should_exit, exit_price, reason = self.strategy.check_exit(
-                strategy_pos,
-                data,
-                datetime.now()
-            )
-
-            if should_exit:
-                # 查找对应的MT4仓位 Find corresponding MT4 position
-                for mt4_pos in mt4_positions:
-                    if mt4_pos['symbol'] == symbol:
-                        # 平仓 Close position
-                        if self.mt4.close_position(mt4_pos['ticket']):
-                            # 在策略中记录 Record in strategy
-                            self.strategy.close_position(
-                                strategy_pos,
-                                exit_price,
-                                datetime.now(),
-                                reason
-                            )
-                            logger.info(f"Position closed: {symbol} | Reason: {reason}")
-                        break
-
-            # 更新追踪止损 Update trailing stop if needed
-            elif strategy_pos.trailing_active:
-                # 修改MT4仓位的止损 Modify MT4 position stop loss
-                for mt4_pos in mt4_positions:
-                    if mt4_pos['symbol'] == symbol:
-                        if mt4_pos['stop_loss'] != strategy_pos.stop_loss:
-                            self.mt4.modify_position(
-                                mt4_pos['ticket'],
-                                stop_loss=strategy_pos.stop_loss
-                            )
-                        break
-
-    def _check_entry_signals(self, symbol: str, data_1m: pd.DataFrame, data_5m: pd.DataFrame):
-        """检查入场信号 Check for Entry Signals"""
-
-        # 生成信号 Generate signal
-        signal = self.strategy.generate_signals(
-            data_1m,
-            data_5m,
-            symbol,
-            datetime.now()
-        )
-
-        if signal:
-            # 在MT4开仓 Open position on MT4
-            size = self.position_sizes.get(symbol, 0.1)
-
-            ticket = self.mt4.open_position(
-                symbol=symbol,
-                direction=signal.direction,
-                volume=size,
-                stop_loss=signal.stop_loss,
-                take_profit=signal.take_profit[0],  # 使用第一个止盈位 Use first TP level
-                comment=f"HybridStrategy_{signal.direction}"
-            )
-
-            if ticket:
-                # 在策略中记录 Record in strategy
-                self.strategy.open_position(signal)
-                logger.info(f"Position opened: {symbol} {signal.direction} @ {signal.entry_price}")
-
     def _print_realtime_status(self):
         """实时打印状态 Print Real-time Status"""
         from datetime import datetime as dt
@@ -337,11 +231,22 @@ class LiveTrader:
 
             print(f"📊 Statistics: Trades={total} | Wins={wins} | Losses={losses} | "
                   f"Win Rate={win_rate:.1f}% | PF={pf:.2f} | Total P&L=${total_pnl:+,.2f}")
+            print(f"   Expectancy=${stats['expectancy']:+,.2f} | Avg R={stats['avg_r']:+.2f} | "
+                  f"SQN={stats['sqn']:.2f} | Max Consecutive Losses={stats['max_consecutive_losses']}")
         else:
             print("📊 Statistics: No trades yet")
 
+        # 延迟 Latency since bar close
+        cycle = self.cycle_latency.summary()
+        if cycle:
+            order = self.order_latency.summary()
+            order_text = f"{order['mean']*1000:.0f}ms avg / {order['max']*1000:.0f}ms max" if order else "no orders yet"
+            print(f"⚡ Latency: Cycle={cycle['last']*1000:.0f}ms (p95 {cycle['p95']*1000:.0f}ms) | "
+                  f"Bar Close→Order={order_text}")
+
+        next_close = dt.fromtimestamp(self.scheduler.next_close() + self.scheduler.offset)
         print("="*100)
-        print(f"⏱️  Next update in 60 seconds... (Press Ctrl+C to stop)")
+        print(f"⏱️  Next update at {next_close.strftime('%H:%M:%S')} (bar close)... (Press Ctrl+C to stop)")
         print("="*100 + "\n")
 
     def _log_status(self):
@@ -366,6 +271,18 @@ class LiveTrader:
                 f"Total PnL: ${stats['total_pnl']:.2f}"
             )
 
+        # 延迟 Latency since bar close
+        cycle, order = self.cycle_latency.summary(), self.order_latency.summary()
+        if cycle:
+            logger.info(
+                f"Latency | Cycle: mean {cycle['mean']*1000:.0f}ms, p95 {cycle['p95']*1000:.0f}ms | "
+                f"Order: {order['mean']*1000:.0f}ms mean, {order['max']*1000:.0f}ms max ({order['count']} orders)"
+                if order else
+                f"Latency | Cycle: mean {cycle['mean']*1000:.0f}ms, p95 {cycle['p95']*1000:.0f}ms | No orders yet"
+            )
+        if self.scheduler.skipped:
+            logger.warning(f"Scheduler skipped {self.scheduler.skipped} bar(s) so far")
+
 
 def main():
     """Main live trading function"""
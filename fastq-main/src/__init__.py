@@ -5,4 +5,4 @@ Version: 1.0.0
 
 __version__ = "1.0.0"
 __author__ = "FastQ Trading Team"
-__all__ = ['data', 'indicators', 'strategy', 'backtesting', 'mt4']
+__all__ = ['data', 'indicators', 'strategy', 'backtesting', 'mt4', 'store', 'market', 'live']
@@ -1,3 +1,17 @@
-from .backtester import Backtester
+from .engine import BacktestEngine, BarRecord
+from .simulator import run_simulation, TRADE_LOG_DTYPE, EXIT_REASONS
+from .execution import run_execution, ExecutionModel, EXECUTION_LOG_DTYPE
+from .optimizer import ParameterOptimizer, grid_search_space, random_search_space
+from .walk_forward import WalkForwardOptimizer
+from .runner import MultiSymbolRunner, JobResult
 
-__all__ = ['Backtester']
+__all__ = ['BacktestEngine', 'BarRecord', 'run_simulation', 'TRADE_LOG_DTYPE', 'EXIT_REASONS',
+           'run_execution', 'ExecutionModel', 'EXECUTION_LOG_DTYPE',
+           'ParameterOptimizer', 'grid_search_space', 'random_search_space', 'WalkForwardOptimizer',
+           'MultiSymbolRunner', 'JobResult']
+
+try:
+    from .backtester import Backtester
+    __all__.append('Backtester')
+except ImportError:  # legacy Backtester needs src.strategy.strategy / seaborn
+    pass
@@ -0,0 +1,161 @@
+"""
+事件驱动回测引擎 Event-Driven Backtest Engine
+Feeds the strategy one bar at a time from preextracted column arrays
+
+旧的回测循环每根K线都用 data.iloc[:i+1] 切出前缀 DataFrame, 而策略只读
+最后一行, 整个回测是 O(n²). 这里把每列取成 NumPy 数组, 用一个游标
+(BarRecord) 指向当前行, 整个回测 O(n).
+"""
+
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+from ..market.alignment import AlignedFrame
+from ..strategy.hybrid_optimized_strategy import Signal
+from .execution import execution_mode, run_execution
+from .simulator import EXIT_REASONS
+
+
+class BarRecord:
+    """
+    单根K线视图 Per-bar view over column arrays
+
+    支持 bar['close'] 和 bar.get('atr', default), 与 DataFrame.iloc[-1]
+    返回的 pd.Series 用法相同. 引擎复用同一个对象并移动游标, 所以不要
+    在 K 线之间保存它 (需要的值请先取出).
+    """
+
+    __slots__ = ('_columns', 'index')
+
+    def __init__(self, columns: Dict[str, np.ndarray], index: int = 0):
+        self._columns = columns
+        self.index = index
+
+    @classmethod
+    def from_frame(cls, data: pd.DataFrame) -> 'BarRecord':
+        """Extract every column of `data` once as a NumPy array"""
+        return cls({name: data[name].to_numpy() for name in data.columns})
+
+    def __getitem__(self, key: str):
+        return self._columns[key][self.index]
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._columns
+
+    def get(self, key: str, default=None):
+        column = self._columns.get(key)
+        if column is None:
+            return default
+        return column[self.index]
+
+    def __len__(self) -> int:
+        return len(next(iter(self._columns.values()))) if self._columns else 0
+
+
+class BacktestEngine:
+    """
+    事件驱动回测 Event-Driven Backtest (single symbol)
+
+    每根K线: 先检查持仓出场, 再在空仓时检查入场信号, 与原来
+    backtest 脚本的循环顺序和资金曲线完全一致.
+    For each bar: check the open position for an exit, then look for an entry
+    when flat - same order and equity curve as the original script loops.
+
+    config['backtesting']['execution'] = 'intrabar' 时改用 run_execution
+    (K线内止损/止盈, 点差/滑点/手续费), 再把成交记录写回策略的统计.
+    """
+
+    def __init__(self, strategy, symbol: str, warmup: int = 50):
+        """
+        Args:
+            strategy: HybridOptimizedStrategy (generate_signal_frame / check_exit_for_bar)
+            symbol: 交易品种 Symbol
+            warmup: 预热K线数 Bars skipped before the first decision
+        """
+        self.strategy = strategy
+        self.symbol = symbol
+        self.warmup = warmup
+        self.equity_curve: List[float] = []
+
+    def run(self, data_main: pd.DataFrame, data_5m: pd.DataFrame) -> List[float]:
+        """
+        运行回测 Run Backtest
+
+        Args:
+            data_main: 入场周期数据 (含指标) Entry timeframe with indicators
+            data_5m: 5分钟数据 (含指标), 每根K线收盘时只看已收盘的5分钟K线
+
+        Returns:
+            资金曲线 Equity curve (初始资金 + 每根K线一个点)
+        """
+        if execution_mode(self.strategy.config) == 'intrabar':
+            return self._run_intrabar(data_main, data_5m)
+
+        strategy = self.strategy
+        symbol = self.symbol
+        positions = strategy.positions
+
+        # 每根K线只看已收盘的5分钟K线 (不复制5分钟数据)
+        data_5m_aligned = AlignedFrame.align(data_main, data_5m)
+        bar_main = BarRecord.from_frame(data_main)
+        # 入场条件一次性向量化计算, 循环只维护持仓状态
+        # Entry conditions are vectorized up front; the loop only tracks position state
+        signal_bar = BarRecord.from_frame(strategy.generate_signal_frame(data_main, data_5m_aligned))
+        timestamps = data_main.index.to_list()  # box Timestamps once, not per bar
+
+        equity = float(strategy.initial_capital)
+        equity_curve = [equity]
+
+        for i in range(self.warmup, len(data_main)):
+            current_time = timestamps[i]
+            bar_main.index = i
+            signal_bar.index = i
+
+            position = positions.get(symbol)
+            if position is not None:
+                should_exit, exit_price, reason = strategy.check_exit_for_bar(position, bar_main, current_time)
+                if should_exit:
+                    equity += strategy.close_position(position, exit_price, current_time, reason)
+
+            if symbol not in positions:
+                signal = strategy.signal_from_frame(signal_bar, bar_main, symbol, current_time)
+                if signal:
+                    strategy.open_position(signal)
+
+            equity_curve.append(equity)
+
+        self.equity_curve = equity_curve
+        return equity_curve
+
+    def _run_intrabar(self, data_main: pd.DataFrame, data_5m: pd.DataFrame) -> List[float]:
+        """
+        K线内成交回测, 成交记录写回策略 Run run_execution and replay its trades on the strategy
+
+        每笔成交按入场时间走 _check_risk_limits (按日重置当日盈亏) 和 open_position
+        (动态加仓), 再用成交价和手续费 close_position, 所以持仓记录 (含止盈目标)、
+        当日盈亏和风险账本与 bar_close 路径一样由策略自己维护.
+        """
+        strategy = self.strategy
+        trades, equity = run_execution(strategy, self.symbol, data_main, data_5m, warmup=self.warmup)
+
+        index = data_main.index
+        for trade in trades:
+            entry_time = index[trade['entry_index']]
+            strategy._check_risk_limits(entry_time)
+            position = strategy.open_position(Signal(
+                symbol=self.symbol,
+                direction='long' if trade['direction'] == 1 else 'short',
+                entry_price=float(trade['entry_price']),
+                stop_loss=float(trade['initial_stop_loss']),
+                take_profit=trade['take_profit'].tolist(),
+                timestamp=entry_time
+            ))
+            position.stop_loss = float(trade['stop_loss'])
+            position.trailing_active = bool(trade['trailing_active'])
+            strategy.close_position(position, float(trade['exit_price']), index[trade['exit_index']],
+                                    EXIT_REASONS[trade['reason']], costs=float(trade['commission']))
+
+        self.equity_curve = equity.tolist()
+        return self.equity_curve
@@ -0,0 +1,399 @@
+"""
+成交模拟 Intrabar Execution Simulator
+
+simulate_positions 只用收盘价判断出场; 这里用K线最高/最低价 (或逐笔成交)
+判断K线内触及的止损/止盈, 并计入点差、滑点和手续费:
+- 止损和止盈在同一根K线内都被触及时, 按 fill_order 决定先后:
+  stop_first (保守, 默认) / target_first / nearest_first (离开盘价近的先触及);
+  有该K线的逐笔数据时按真实顺序
+- 开盘跳空越过止损时按开盘价成交; 止盈是限价单, 按止盈价成交
+- 价格视为中间价: 每次成交付半个点差; 市价成交 (入场, 止损, 新闻) 另付滑点
+- 手续费按名义价值比例 (与 Backtester 相同), 开平仓各收一次
+- 追踪止损用K线的有利极值更新, 从下一根K线起生效
+入场信号、风险限制和动态加仓与 simulate_positions 相同.
+"""
+
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from ..indicators.kernels import njit
+from .simulator import (
+    EXIT_NEWS, EXIT_TRAILING_STOP, EXIT_STOP_LOSS, EXIT_TAKE_PROFIT, TRADE_LOG_DTYPE,
+    pack_trades, simulation_inputs, strategy_parameters
+)
+
+
+# 同一根K线内止损和止盈都触及时的成交顺序 Fill order when a bar touches both stop and target
+FILL_STOP_FIRST = 0
+FILL_TARGET_FIRST = 1
+FILL_NEAREST_FIRST = 2
+FILL_ORDERS = ('stop_first', 'target_first', 'nearest_first')
+
+# backtesting.execution: 收盘价出场 (run_simulation) 或K线内成交 (run_execution)
+EXECUTION_MODES = ('bar_close', 'intrabar')
+
+# 成交记录: 交易记录加手续费 (pnl 已扣除) 和入场时的止盈目标
+# Trade log with the commission paid and the take-profit targets set at entry
+EXECUTION_LOG_DTYPE = np.dtype(TRADE_LOG_DTYPE.descr + [('commission', np.float64),
+                                                        ('take_profit', np.float64, (3,))])
+
+_NS_PER_DAY = 86_400_000_000_000
+
+
+@dataclass
+class ExecutionModel:
+    """
+    成交成本模型 Per-symbol execution costs
+
+    spread / slippage 为价格单位, commission 为名义价值比例 (每边)
+    """
+    spread: float = 0.0
+    slippage: float = 0.0
+    commission: float = 0.0
+    fill_order: str = 'stop_first'
+
+    @classmethod
+    def from_config(cls, config: dict, symbol: str) -> 'ExecutionModel':
+        """
+        从 backtesting 配置段读取 From config['backtesting']
+
+        spread / slippage / commission 可以是数字或 {symbol: 数字} 字典 ('default' 为其他品种);
+        spread / slippage 为价格单位, commission 为名义价值比例 (每边)
+        """
+        backtesting = config.get('backtesting', {})
+
+        def value(key: str) -> float:
+            setting = backtesting.get(key, 0.0)
+            if isinstance(setting, dict):
+                setting = setting.get(symbol, setting.get('default', 0.0))
+            return float(setting)
+
+        return cls(spread=value('spread'), slippage=value('slippage'), commission=value('commission'),
+                   fill_order=backtesting.get('fill_order', 'stop_first'))
+
+
+def execution_mode(config: dict) -> str:
+    """回测成交方式 config['backtesting']['execution'] (默认 bar_close)"""
+    mode = config.get('backtesting', {}).get('execution', 'bar_close')
+    if mode not in EXECUTION_MODES:
+        raise ValueError(f"Unknown backtesting.execution: {mode} (expected one of {EXECUTION_MODES})")
+    return mode
+
+
+def align_ticks(bar_index: pd.DatetimeIndex, tick_times, tick_prices) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    逐笔数据按K线分组 Compact tick stream grouped by bar
+
+    K线按开盘时间标记: 第 i 根K线包含 [bar_index[i], bar_index[i+1]) 内的成交.
+
+    Args:
+        bar_index: K线时间 (升序)
+        tick_times: 成交时间 (升序, 与 bar_index 同一时区)
+        tick_prices: 成交价
+
+    Returns:
+        (prices, offsets): 第 i 根K线的成交是 prices[offsets[i]:offsets[i + 1]]
+    """
+    bar_ns = pd.DatetimeIndex(bar_index).as_unit('ns').asi8
+    tick_ns = pd.DatetimeIndex(tick_times).as_unit('ns').asi8
+    prices = np.ascontiguousarray(np.asarray(tick_prices, dtype=np.float64))
+
+    offsets = np.searchsorted(tick_ns, bar_ns, side='left').astype(np.int64)
+    # 最后一根K线到下一根的时间按前一根的间隔估计
+    bar_end = bar_ns[-1] + (bar_ns[-1] - bar_ns[-2] if len(bar_ns) > 1 else 0)
+    offsets = np.append(offsets, np.searchsorted(tick_ns, bar_end, side='left'))
+    return prices, offsets
+
+
+@njit(cache=True)
+def simulate_execution(open_, high, low, close, atr, long_signal, short_signal, stop_loss, take_profit,
+                       news_exit, day_id, time_ns, tick_prices, tick_offsets, warmup,
+                       initial_capital, base_size, multiplier, trailing_activation_r,
+                       trailing_distance_atr, max_daily_loss, max_drawdown_value, progressive_enabled,
+                       profit_threshold, lot_increase, increase_frequency_days,
+                       spread, slippage, commission_rate, fill_order):
+    """
+    K线内成交模拟 Single-symbol position walk with intrabar fills
+
+    Args:
+        open_, high, low, close, atr: float64 数组
+        long_signal ... time_ns: 同 simulate_positions
+        tick_prices, tick_offsets: align_ticks 的结果 (没有逐笔数据时传空数组)
+        warmup ... increase_frequency_days: 同 simulate_positions
+        spread, slippage: 价格单位; commission_rate: 名义价值比例 (每边)
+        fill_order: FILL_STOP_FIRST / FILL_TARGET_FIRST / FILL_NEAREST_FIRST
+
+    Returns:
+        (trade arrays..., commission, equity) - 由 run_execution 打包成 EXECUTION_LOG_DTYPE
+    """
+    n = close.shape[0]
+    n_tp = take_profit.shape[1]
+    has_ticks = tick_offsets.shape[0] == n + 1
+    half_spread = spread / 2.0
+
+    entry_index = np.empty(n, dtype=np.int64)
+    exit_index = np.empty(n, dtype=np.int64)
+    direction_log = np.empty(n, dtype=np.int8)
+    entry_log = np.empty(n, dtype=np.float64)
+    exit_log = np.empty(n, dtype=np.float64)
+    initial_sl_log = np.empty(n, dtype=np.float64)
+    sl_log = np.empty(n, dtype=np.float64)
+    size_log = np.empty(n, dtype=np.float64)
+    pnl_log = np.empty(n, dtype=np.float64)
+    reason_log = np.empty(n, dtype=np.int8)
+    trailing_log = np.empty(n, dtype=np.bool_)
+    commission_log = np.empty(n, dtype=np.float64)
+    n_trades = 0
+
+    equity = np.empty(max(n - warmup, 0) + 1, dtype=np.float64)
+    equity[0] = initial_capital
+    running_equity = initial_capital
+
+    # 持仓状态 Position state (direction 0 = flat)
+    direction = 0
+    entry_bar = 0
+    signal_price = 0.0  # 信号价 (止损/止盈和 R 倍数的基准)
+    entry_fill = 0.0
+    entry_commission = 0.0
+    initial_sl = 0.0
+    current_sl = 0.0
+    extreme_price = 0.0
+    trailing_active = False
+    size = base_size
+    pos_size = 0.0
+    tp_row = 0
+
+    # 风险状态 Risk state
+    trading_enabled = True
+    have_day = False
+    current_day = 0
+    daily_pnl = 0.0
+    closed_pnl = 0.0
+    peak_capital = initial_capital
+    have_last_increase = False
+    last_increase_ns = 0
+
+    for i in range(warmup, n):
+        if direction != 0:
+            level = 0.0
+            reason = -1
+            market = True
+
+            if news_exit[i]:
+                level = close[i]
+                reason = EXIT_NEWS
+            else:
+                stop_reason = EXIT_TRAILING_STOP if trailing_active else EXIT_STOP_LOSS
+
+                if has_ticks and tick_offsets[i + 1] > tick_offsets[i]:
+                    # 逐笔: 第一笔越过止损或止盈的成交决定出场 Ticks give the true order
+                    for t in range(tick_offsets[i], tick_offsets[i + 1]):
+                        price = tick_prices[t]
+                        if (direction == 1 and price <= current_sl) or (direction == -1 and price >= current_sl):
+                            level = price  # 止损按市价成交 (可能比止损价更差)
+                            reason = stop_reason
+                            break
+                        for k in range(n_tp):
+                            tp = take_profit[tp_row, k]
+                            if (direction == 1 and price >= tp) or (direction == -1 and price <= tp):
+                                level = tp
+                                reason = EXIT_TAKE_PROFIT
+                                market = False
+                                break
+                        if reason >= 0:
+                            break
+                else:
+                    # K线最高/最低价 Bar extremes
+                    if direction == 1:
+                        stop_hit = low[i] <= current_sl
+                        gap_stop = open_[i] <= current_sl
+                    else:
+                        stop_hit = high[i] >= current_sl
+                        gap_stop = open_[i] >= current_sl
+
+                    tp_level = 0.0
+                    tp_hit = False
+                    for k in range(n_tp):
+                        tp = take_profit[tp_row, k]
+                        if (direction == 1 and high[i] >= tp) or (direction == -1 and low[i] <= tp):
+                            tp_level = tp
+                            tp_hit = True
+                            break
+
+                    stop_first = stop_hit
+                    if stop_hit and tp_hit and not gap_stop:
+                        gap_target = (direction == 1 and open_[i] >= tp_level) or \
+                                     (direction == -1 and open_[i] <= tp_level)
+                        if gap_target or fill_order == FILL_TARGET_FIRST:
+                            stop_first = False
+                        elif fill_order == FILL_NEAREST_FIRST:
+                            stop_first = abs(open_[i] - current_sl) <= abs(tp_level - open_[i])
+
+                    if stop_first:
+                        level = open_[i] if gap_stop else current_sl
+                        reason = stop_reason
+                    elif tp_hit:
+                        level = tp_level
+                        reason = EXIT_TAKE_PROFIT
+                        market = False
+
+            if reason >= 0:
+                # 平仓方向与持仓相反: 多单卖出 (减半点差), 空单买入
+                cost = half_spread + (slippage if market else 0.0)
+                exit_fill = level - cost if direction == 1 else level + cost
+                exit_commission = commission_rate * pos_size * multiplier * exit_fill
+                pnl = (exit_fill - entry_fill) * direction * pos_size * multiplier
+                pnl -= entry_commission + exit_commission
+
+                entry_index[n_trades] = entry_bar
+                exit_index[n_trades] = i
+                direction_log[n_trades] = direction
+                entry_log[n_trades] = entry_fill
+                exit_log[n_trades] = exit_fill
+                initial_sl_log[n_trades] = initial_sl
+                sl_log[n_trades] = current_sl
+                size_log[n_trades] = pos_size
+                pnl_log[n_trades] = pnl
+                reason_log[n_trades] = reason
+                trailing_log[n_trades] = trailing_active
+                commission_log[n_trades] = entry_commission + exit_commission
+                n_trades += 1
+
+                closed_pnl += pnl
+                daily_pnl += pnl
+                running_equity += pnl
+                if initial_capital + closed_pnl > peak_capital:  # 与 RiskLedger 相同, 平仓时更新
+                    peak_capital = initial_capital + closed_pnl
+                direction = 0
+            else:
+                # 追踪止损: 用本K线的有利极值更新, 下一根K线起生效
+                risk = abs(signal_price - initial_sl)
+                if direction == 1:
+                    if high[i] > extreme_price:
+                        extreme_price = high[i]
+                    profit = extreme_price - signal_price
+                else:
+                    if low[i] < extreme_price:
+                        extreme_price = low[i]
+                    profit = signal_price - extreme_price
+                profit_r = profit / risk if risk > 0 else 0.0
+
+                if profit_r >= trailing_activation_r:
+                    trailing_active = True
+                    if direction == 1:
+                        new_trailing = extreme_price - (atr[i] * trailing_distance_atr)
+                        if new_trailing > current_sl:
+                            current_sl = new_trailing
+                    else:
+                        new_trailing = extreme_price + (atr[i] * trailing_distance_atr)
+                        if new_trailing < current_sl:
+                            current_sl = new_trailing
+
+        if direction == 0:
+            # 风险限制 Risk limits (same order as _check_risk_limits)
+            allowed = trading_enabled
+            if allowed:
+                if not have_day or day_id[i] != current_day:
+                    have_day = True
+                    current_day = day_id[i]
+                    daily_pnl = 0.0
+
+                if daily_pnl <= -max_daily_loss:
+                    trading_enabled = False
+                    allowed = False
+                else:
+                    current_capital = initial_capital + closed_pnl
+                    if peak_capital - current_capital >= max_drawdown_value:
+                        trading_enabled = False
+                        allowed = False
+
+            if allowed and (long_signal[i] or short_signal[i]):
+                # 动态加仓 Progressive lots
+                if progressive_enabled:
+                    current_capital = initial_capital + closed_pnl
+                    monthly_profit = (current_capital - initial_capital) / initial_capital
+                    if monthly_profit >= profit_threshold:
+                        if (not have_last_increase or
+                                (time_ns[i] - last_increase_ns) // _NS_PER_DAY >= increase_frequency_days):
+                            size += lot_increase
+                            have_last_increase = True
+                            last_increase_ns = time_ns[i]
+
+                direction = 1 if long_signal[i] else -1
+                entry_bar = i
+                signal_price = close[i]
+                # 市价入场: 多单买入加半点差和滑点, 空单卖出减去
+                entry_fill = signal_price + direction * (half_spread + slippage)
+                initial_sl = stop_loss[i]
+                current_sl = initial_sl
+                extreme_price = signal_price
+                trailing_active = False
+                pos_size = size
+                entry_commission = commission_rate * pos_size * multiplier * entry_fill
+                tp_row = i
+
+        equity[i - warmup + 1] = running_equity
+
+    return (entry_index[:n_trades], exit_index[:n_trades], direction_log[:n_trades],
+            entry_log[:n_trades], exit_log[:n_trades], initial_sl_log[:n_trades],
+            sl_log[:n_trades], size_log[:n_trades], pnl_log[:n_trades],
+            reason_log[:n_trades], trailing_log[:n_trades], commission_log[:n_trades], equity)
+
+
+def run_execution(
+    strategy,
+    symbol: str,
+    data_main: pd.DataFrame,
+    data_5m: pd.DataFrame,
+    model: Optional[ExecutionModel] = None,
+    ticks: Optional[pd.Series] = None,
+    warmup: int = 50,
+    news_exit: Optional[np.ndarray] = None
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    K线内成交回测 Backtest with intrabar stop / target fills and trading costs
+
+    Args:
+        strategy: HybridOptimizedStrategy (参数和 generate_signal_frame)
+        symbol: 交易品种 Symbol
+        data_main: 入场周期数据 (含 open/high/low/close 和指标)
+        data_5m: 5分钟数据 (含指标)
+        model: 成本模型 (None = ExecutionModel.from_config(strategy.config, symbol))
+        ticks: 可选逐笔成交价 (pd.Series, 以成交时间为索引), 用于确定K线内顺序
+        warmup: 预热K线数
+        news_exit: 可选 bool 数组, 新闻平仓的K线
+
+    Returns:
+        (trades, equity_curve): EXECUTION_LOG_DTYPE 结构化数组, float64 资金曲线
+    """
+    if model is None:
+        model = ExecutionModel.from_config(strategy.config, symbol)
+    if model.fill_order not in FILL_ORDERS:
+        raise ValueError(f"Unknown fill_order: {model.fill_order} (expected one of {FILL_ORDERS})")
+
+    inputs = simulation_inputs(strategy, symbol, data_main, data_5m, news_exit)
+
+    if ticks is not None and len(ticks) > 0:
+        tick_prices, tick_offsets = align_ticks(inputs['index'], ticks.index, ticks.to_numpy())
+    else:
+        tick_prices, tick_offsets = np.empty(0, dtype=np.float64), np.empty(0, dtype=np.int64)
+
+    *columns, equity = simulate_execution(
+        data_main['open'].to_numpy(dtype=np.float64),
+        data_main['high'].to_numpy(dtype=np.float64),
+        data_main['low'].to_numpy(dtype=np.float64),
+        inputs['close'], inputs['atr'], inputs['long'], inputs['short'],
+        inputs['stop_loss'], inputs['take_profit'], inputs['news_exit'],
+        inputs['day_id'], inputs['time_ns'], tick_prices, tick_offsets, warmup,
+        *strategy_parameters(strategy, symbol),
+        float(model.spread), float(model.slippage), float(model.commission),
+        FILL_ORDERS.index(model.fill_order)
+    )
+
+    trades = pack_trades(inputs['index'], tuple(columns), EXECUTION_LOG_DTYPE)
+    # 止盈目标取自入场K线 (内核按 tp_row = 入场K线读取) Targets of the entry bar
+    trades['take_profit'] = inputs['take_profit'][trades['entry_index']]
+    return trades, equity
@@ -0,0 +1,422 @@
+"""
+参数优化器 Parallel Parameter-Sweep Optimizer
+
+在参数网格 (或随机搜索空间) 上并行回测 HybridOptimizedStrategy:
+- OHLC 数据放进共享内存, 所有工作进程零拷贝读取
+- 指标按指标参数组合缓存, 同一组合只计算一次
+- 每个配置用编译模拟器 (run_simulation) 回测, 不走逐根 Python 循环
+
+参数名使用 YAML 配置里的点路径, 例如 'strategy.aggressiveness',
+'strategy.keltner.ma_period', 'strategy.cci.period'.
+"""
+
+import copy
+import itertools
+import json
+import math
+import os
+import random
+import sys
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from loguru import logger
+
+from ..indicators.indicators import Indicators
+from ..strategy.hybrid_optimized_strategy import HybridOptimizedStrategy
+from .execution import execution_mode, run_execution
+from .simulator import run_simulation
+
+
+# 影响指标计算的配置段 Config sections that change indicator columns
+INDICATOR_SECTIONS = ('zigzag', 'keltner', 'bollinger', 'macd', 'cci')
+
+# 每个工作进程缓存的指标组合数 Indicator frames kept per worker (LRU)
+INDICATOR_CACHE_SIZE = 4
+
+# 预热K线数 (与 BacktestEngine 默认相同) Warm-up bars at the start of the history
+WARMUP_BARS = 50
+
+# 结果表的指标列 Metric columns of the ranked table
+METRIC_COLUMNS = [
+    'total_trades', 'win_rate', 'profit_factor', 'total_pnl',
+    'sharpe', 'max_drawdown', 'return_pct'
+]
+
+
+def set_config_value(config: dict, path: str, value):
+    """按点路径写配置 Set config['a']['b']... from 'a.b...'"""
+    keys = path.split('.')
+    node = config
+    for key in keys[:-1]:
+        node = node.setdefault(key, {})
+    node[keys[-1]] = value
+
+
+def indicator_params(config: dict) -> Tuple[dict, dict]:
+    """
+    配置转指标参数 Indicator kwargs for the 1m and 5m frames
+
+    Returns:
+        (kwargs_1m, kwargs_5m) for Indicators.calculate_all_indicators
+    """
+    strategy = config.get('strategy', {})
+    zigzag = strategy.get('zigzag', {})
+    macd = strategy.get('macd', {'fast_period': 12, 'slow_period': 26, 'signal_period': 9})
+    cci_period = strategy.get('cci', {}).get('period', 20)
+
+    params_1m = {
+        'zigzag_depth': zigzag.get('depth_1m', 25),
+        'keltner_params': strategy.get('keltner', {'ma_period': 15, 'atr_period': 10, 'atr_multiple': 0.5,
+                                                   'ma_method': 1, 'ma_price': 4}),
+        'bollinger_params': strategy.get('bollinger', {'length': 15, 'deviation': 1.0}),
+        'macd_params': macd,
+        'cci_period': cci_period,
+        'columns': HybridOptimizedStrategy.REQUIRED_COLUMNS_1M,
+    }
+    params_5m = {
+        'zigzag_depth': zigzag.get('depth_5m', 12),
+        'macd_params': macd,
+        'cci_period': cci_period,
+        'columns': HybridOptimizedStrategy.REQUIRED_COLUMNS_5M,
+    }
+    return params_1m, params_5m
+
+
+def indicator_key(config: dict) -> str:
+    """指标参数的缓存键 Cache key of the indicator-relevant config sections"""
+    strategy = config.get('strategy', {})
+    return json.dumps({name: strategy.get(name) for name in INDICATOR_SECTIONS}, sort_keys=True)
+
+
+def grid_search_space(grid: Dict[str, Sequence]) -> List[dict]:
+    """网格搜索 All combinations of {path: [values]}"""
+    paths = list(grid)
+    return [dict(zip(paths, values)) for values in itertools.product(*(grid[p] for p in paths))]
+
+
+def random_search_space(space: Dict[str, object], n_samples: int, seed: int = 42) -> List[dict]:
+    """
+    随机搜索 Random samples from a search space
+
+    每个参数可以是候选列表 (均匀选取) 或 (low, high) 元组
+    (两端都是整数时取整数, 否则取浮点均匀分布). 重复组合会被去掉.
+    """
+    rng = random.Random(seed)
+    samples, seen = [], set()
+    for _ in range(n_samples):
+        params = {}
+        for path, choices in space.items():
+            if isinstance(choices, tuple):
+                low, high = choices
+                if isinstance(low, int) and isinstance(high, int):
+                    params[path] = rng.randint(low, high)
+                else:
+                    params[path] = rng.uniform(low, high)
+            else:
+                params[path] = rng.choice(list(choices))
+        key = tuple(sorted(params.items()))
+        if key not in seen:
+            seen.add(key)
+            samples.append(params)
+    return samples
+
+
+class SharedFrame:
+    """
+    共享内存中的 OHLC 数据 OHLC frame stored in shared memory
+
+    父进程用 create() 放入数据, 工作进程用 attach(spec) 取得零拷贝视图.
+    """
+
+    def __init__(self, values: shared_memory.SharedMemory, index: shared_memory.SharedMemory, spec: dict):
+        self._values = values
+        self._index = index
+        self.spec = spec
+
+    @classmethod
+    def create(cls, data: pd.DataFrame) -> 'SharedFrame':
+        """Copy the numeric columns and the index of `data` into shared memory"""
+        values = data.to_numpy(dtype=np.float64)
+        index = pd.DatetimeIndex(data.index)
+        stamps = index.as_unit('ns').asi8
+
+        values_shm = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+        index_shm = shared_memory.SharedMemory(create=True, size=max(stamps.nbytes, 1))
+        np.ndarray(values.shape, dtype=np.float64, buffer=values_shm.buf)[:] = values
+        np.ndarray(stamps.shape, dtype=np.int64, buffer=index_shm.buf)[:] = stamps
+
+        spec = {
+            'values': values_shm.name,
+            'index': index_shm.name,
+            'shape': values.shape,
+            'columns': list(data.columns),
+            'tz': str(index.tz) if index.tz is not None else None,
+        }
+        return cls(values_shm, index_shm, spec)
+
+    @classmethod
+    def attach(cls, spec: dict) -> Tuple['SharedFrame', pd.DataFrame]:
+        """Attach to a frame created by another process; returns (handle, DataFrame view)"""
+        values_shm = shared_memory.SharedMemory(name=spec['values'])
+        index_shm = shared_memory.SharedMemory(name=spec['index'])
+        shape = tuple(spec['shape'])
+
+        values = np.ndarray(shape, dtype=np.float64, buffer=values_shm.buf)
+        stamps = np.ndarray((shape[0],), dtype=np.int64, buffer=index_shm.buf)
+        index = pd.DatetimeIndex(stamps.view('datetime64[ns]'))
+        if spec['tz'] is not None:
+            index = index.tz_localize('UTC').tz_convert(spec['tz'])
+
+        frame = pd.DataFrame(values, index=index, columns=spec['columns'], copy=False)
+        return cls(values_shm, index_shm, spec), frame
+
+    def close(self):
+        self._values.close()
+        self._index.close()
+
+    def unlink(self):
+        """Release the shared memory (creator only)"""
+        self.close()
+        self._values.unlink()
+        self._index.unlink()
+
+
+# 工作进程状态 Per-worker state (set by _init_worker)
+_worker_state: Dict[str, object] = {}
+
+
+def _init_worker(spec_1m: dict, spec_5m: dict, log_level: Optional[str] = 'WARNING'):
+    """工作进程初始化 Attach the shared frames once per worker process"""
+    if log_level is not None:
+        logger.remove()
+        logger.add(sys.stderr, level=log_level)
+
+    handle_1m, data_1m = SharedFrame.attach(spec_1m)
+    handle_5m, data_5m = SharedFrame.attach(spec_5m)
+    _worker_state.update({
+        'handles': (handle_1m, handle_5m),
+        'data_1m': data_1m,
+        'data_5m': data_5m,
+        'indicator_cache': OrderedDict(),
+    })
+
+
+def _worker_indicators(config: dict) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """当前进程的指标缓存 Indicator frames for `config`, computed once per key"""
+    cache = _worker_state['indicator_cache']
+    key = indicator_key(config)
+    if key in cache:
+        cache.move_to_end(key)
+        return cache[key]
+
+    params_1m, params_5m = indicator_params(config)
+    cache[key] = (
+        Indicators.calculate_all_indicators(_worker_state['data_1m'], **params_1m),
+        Indicators.calculate_all_indicators(_worker_state['data_5m'], **params_5m),
+    )
+    if len(cache) > INDICATOR_CACHE_SIZE:
+        cache.popitem(last=False)
+    return cache[key]
+
+
+def compute_metrics(trades: np.ndarray, equity: np.ndarray, initial_capital: float,
+                    bars_per_day: float) -> dict:
+    """
+    回测指标 Backtest metrics (same definitions as get_statistics / backtest_multi_symbol)
+
+    Returns:
+        dict with METRIC_COLUMNS
+    """
+    pnl = trades['pnl']
+    wins = pnl[pnl > 0]
+    losses = pnl[pnl < 0]
+    total_losses = abs(losses.sum())
+
+    peak = np.maximum.accumulate(equity)
+    drawdown = (equity - peak) / peak
+    returns = np.diff(equity) / equity[:-1]
+    if len(returns) > 1 and returns.std() > 0:
+        sharpe = (returns.mean() / returns.std()) * np.sqrt(252 * bars_per_day)
+    else:
+        sharpe = 0.0
+
+    return {
+        'total_trades': len(pnl),
+        'win_rate': len(wins) / len(pnl) if len(pnl) else 0.0,
+        'profit_factor': float(wins.sum() / total_losses) if total_losses > 0 else 0.0,
+        'total_pnl': float(pnl.sum()),
+        'sharpe': float(sharpe),
+        'max_drawdown': float(abs(drawdown.min()) * 100) if len(drawdown) else 0.0,
+        'return_pct': float(pnl.sum() / initial_capital * 100),
+    }
+
+
+def config_with(base_config: dict, params: dict) -> dict:
+    """基础配置的副本, 覆盖 params 中的点路径 Copy of base_config with params applied"""
+    config = copy.deepcopy(base_config)
+    for path, value in params.items():
+        set_config_value(config, path, value)
+    return config
+
+
+def _evaluate_jobs(base_config: dict, symbol: str, jobs: List[Tuple[dict, Optional[List[dict]]]],
+                   bars_per_day: float, detail: bool = False) -> List[dict]:
+    """
+    评估一组任务 Evaluate (params, windows) jobs sharing one indicator key (runs in a worker)
+
+    windows 为 None 时回测全部K线; 否则每个窗口 {'start', 'stop', ...标签}
+    在全量指标上按位置切片回测 (指标是因果的, 切片不引入未来数据),
+    标签字段 (如 fold / phase) 原样写入结果行. detail=True 时结果行附带
+    'trades' 和 'equity' 数组.
+    """
+    results = []
+    for params, windows in jobs:
+        config = config_with(base_config, params)
+        data_1m, data_5m = _worker_indicators(config)
+        # backtesting.execution: intrabar 时按K线最高/最低价成交并计入成本
+        simulate = run_execution if execution_mode(config) == 'intrabar' else run_simulation
+
+        for window in (windows or [{'start': 0, 'stop': len(data_1m)}]):
+            start, stop = window['start'], window['stop']
+            strategy = HybridOptimizedStrategy(config=config, data_1m={symbol: data_1m}, data_5m={symbol: data_5m})
+            trades, equity = simulate(strategy, symbol, data_1m.iloc[start:stop], data_5m,
+                                      warmup=max(0, WARMUP_BARS - start))
+
+            row = dict(params)
+            if windows is not None:
+                row.update(window)
+            row.update(compute_metrics(trades, equity, strategy.initial_capital, bars_per_day))
+            if detail:
+                row['trades'] = trades
+                row['equity'] = equity
+            results.append(row)
+    return results
+
+
+class ParameterOptimizer:
+    """
+    并行参数优化 Parallel Parameter Sweep
+
+    用法 Usage:
+        optimizer = ParameterOptimizer(config, 'XAUUSD', data_1m, data_5m)
+        results = optimizer.run(grid_search_space({'strategy.aggressiveness': [1, 2, 3]}))
+        optimizer.save(results, 'results/optimization.csv')
+    """
+
+    def __init__(self, base_config: dict, symbol: str, data_1m: pd.DataFrame, data_5m: pd.DataFrame,
+                 workers: Optional[int] = None, log_level: str = 'WARNING'):
+        """
+        Args:
+            base_config: 基础配置 (YAML 结构), 每个参数组合在其副本上覆盖
+            symbol: 交易品种 Symbol
+            data_1m: 1分钟 OHLC (不含指标)
+            data_5m: 5分钟 OHLC (不含指标)
+            workers: 进程数 (None = CPU 核数, 1 = 当前进程内串行)
+            log_level: 工作进程日志级别
+        """
+        self.base_config = base_config
+        self.symbol = symbol
+        self.data_1m = data_1m.select_dtypes(include='number')
+        self.data_5m = data_5m.select_dtypes(include='number')
+        self.workers = workers
+        self.log_level = log_level
+
+        span_days = (data_1m.index[-1] - data_1m.index[0]).total_seconds() / 86400 if len(data_1m) > 1 else 0
+        self.bars_per_day = len(data_1m) / span_days if span_days > 0 else 1440
+
+    def _group_by_indicators(self, jobs: List[Tuple[dict, Optional[List[dict]]]],
+                             n_workers: int) -> List[list]:
+        """
+        按指标参数分组 Group jobs by indicator key so a task reuses one
+        indicator frame; large groups are split so every worker stays busy.
+        """
+        groups: Dict[str, list] = {}
+        for job in jobs:
+            groups.setdefault(indicator_key(config_with(self.base_config, job[0])), []).append(job)
+
+        chunk_size = max(1, math.ceil(len(jobs) / (n_workers * 4)))
+        return [group[start:start + chunk_size]
+                for group in groups.values()
+                for start in range(0, len(group), chunk_size)]
+
+    def evaluate_jobs(self, jobs: List[Tuple[dict, Optional[List[dict]]]], detail: bool = False) -> List[dict]:
+        """
+        并行评估 Evaluate (params, windows) jobs across the worker pool
+
+        Args:
+            jobs: [(参数组合, 窗口列表或 None)], 窗口见 _evaluate_jobs
+            detail: 结果行附带 trades / equity 数组
+
+        Returns:
+            结果行列表 One row per (params, window), in no particular order
+        """
+        n_workers = self.workers or os.cpu_count() or 1
+        tasks = self._group_by_indicators(jobs, n_workers)
+        logger.info(f"Evaluating {len(jobs)} jobs in {len(tasks)} tasks on {n_workers} workers")
+
+        shared_1m = SharedFrame.create(self.data_1m)
+        shared_5m = SharedFrame.create(self.data_5m)
+        rows = []
+        try:
+            if n_workers == 1:
+                # 当前进程内串行 (不改动调用方的日志配置) In-process, keeps the caller's logger
+                _init_worker(shared_1m.spec, shared_5m.spec, log_level=None)
+                try:
+                    for task in tasks:
+                        rows.extend(_evaluate_jobs(self.base_config, self.symbol, task, self.bars_per_day, detail))
+                finally:
+                    handles = _worker_state.pop('handles')
+                    _worker_state.clear()  # drop the frames viewing shared memory before closing it
+                    for handle in handles:
+                        handle.close()
+            else:
+                with ProcessPoolExecutor(max_workers=n_workers, initializer=_init_worker,
+                                         initargs=(shared_1m.spec, shared_5m.spec, self.log_level)) as pool:
+                    futures = [pool.submit(_evaluate_jobs, self.base_config, self.symbol, task,
+                                           self.bars_per_day, detail)
+                               for task in tasks]
+                    for future in futures:
+                        rows.extend(future.result())
+        finally:
+            shared_1m.unlink()
+            shared_5m.unlink()
+
+        return rows
+
+    @staticmethod
+    def rank(results: pd.DataFrame, rank_by: str = 'profit_factor', ascending: bool = False) -> pd.DataFrame:
+        """排名 Sort by a metric and add a 1-based 'rank' column"""
+        if results.empty:
+            return results
+        results = results.sort_values(rank_by, ascending=ascending, kind='stable').reset_index(drop=True)
+        results.insert(0, 'rank', np.arange(1, len(results) + 1))
+        return results
+
+    def run(self, param_sets: List[dict], rank_by: str = 'profit_factor', ascending: bool = False) -> pd.DataFrame:
+        """
+        运行优化 Run the sweep over the whole history
+
+        Args:
+            param_sets: 参数组合列表 (grid_search_space / random_search_space)
+            rank_by: 排序指标 Metric to rank by
+            ascending: 升序排序 (如按 max_drawdown 排序时)
+
+        Returns:
+            排名表 Ranked DataFrame: one row per config, parameter columns + METRIC_COLUMNS
+        """
+        rows = self.evaluate_jobs([(params, None) for params in param_sets])
+        return self.rank(pd.DataFrame(rows), rank_by, ascending)
+
+    @staticmethod
+    def save(results: pd.DataFrame, path: str):
+        """保存结果 Save as CSV, or Parquet when the path ends in .parquet (needs pyarrow)"""
+        if str(path).endswith('.parquet'):
+            results.to_parquet(path, index=False)
+        else:
+            results.to_csv(path, index=False)
+        logger.info(f"✅ Optimization results saved: {path}")
@@ -0,0 +1,351 @@
+"""
+持仓状态模拟器 Compiled Position-State Simulator
+
+在 generate_signal_frame 预先算好的信号上单遍扫描K线, 用 Numba 编译的
+循环复现 HybridOptimizedStrategy 的持仓逻辑:
+- 出场优先级: 新闻 → 追踪止损 → 初始止损 → 止盈列表 (只看收盘价)
+- 追踪止损在盈利 trailing_activation_r 倍风险后激活, 按 ATR 距离追踪
+- 入场前的风险限制 (单日最大亏损 / 最大回撤) 和动态加仓
+
+结果与 BacktestEngine 逐根调用策略完全一致, 输出结构化 NumPy 交易记录.
+Same trades and equity curve as BacktestEngine, without Python per bar.
+"""
+
+from typing import Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from ..indicators.kernels import njit
+from ..market.alignment import AlignedFrame
+
+
+# 出场原因代码 Exit reason codes (index into EXIT_REASONS)
+EXIT_NEWS = 0
+EXIT_TRAILING_STOP = 1
+EXIT_STOP_LOSS = 2
+EXIT_TAKE_PROFIT = 3
+EXIT_REASONS = ('news_event', 'trailing_stop', 'stop_loss', 'take_profit')
+
+# 交易记录 Trade log record (direction: 1 long, -1 short)
+TRADE_LOG_DTYPE = np.dtype([
+    ('entry_index', np.int64),
+    ('exit_index', np.int64),
+    ('entry_time', 'datetime64[ns]'),
+    ('exit_time', 'datetime64[ns]'),
+    ('direction', np.int8),
+    ('entry_price', np.float64),
+    ('exit_price', np.float64),
+    ('initial_stop_loss', np.float64),
+    ('stop_loss', np.float64),
+    ('size', np.float64),
+    ('pnl', np.float64),
+    ('reason', np.int8),
+    ('trailing_active', np.bool_),
+])
+
+_NS_PER_DAY = 86_400_000_000_000
+
+
+@njit(cache=True)
+def simulate_positions(close, atr, long_signal, short_signal, stop_loss, take_profit,
+                       news_exit, day_id, time_ns, warmup, initial_capital, base_size,
+                       multiplier, trailing_activation_r, trailing_distance_atr,
+                       max_daily_loss, max_drawdown_value, progressive_enabled,
+                       profit_threshold, lot_increase, increase_frequency_days):
+    """
+    单品种持仓模拟 Single-symbol position walk
+
+    Args:
+        close, atr: float64 数组 (atr 缺列时传 0.0001)
+        long_signal, short_signal: bool 数组 (generate_signal_frame)
+        stop_loss: float64 数组, take_profit: (n, k) float64 数组
+        news_exit: bool 数组, 为 True 的K线按收盘价平仓
+        day_id: int64 数组, 同一交易日相同 (日内盈亏重置)
+        time_ns: int64 纳秒时间戳 (动态加仓间隔)
+        其余为策略参数 (见 HybridOptimizedStrategy.__init__)
+
+    Returns:
+        (trade arrays..., equity) - 由 run_simulation 打包成 TRADE_LOG_DTYPE
+    """
+    n = close.shape[0]
+    n_tp = take_profit.shape[1]
+
+    entry_index = np.empty(n, dtype=np.int64)
+    exit_index = np.empty(n, dtype=np.int64)
+    direction_log = np.empty(n, dtype=np.int8)
+    entry_log = np.empty(n, dtype=np.float64)
+    exit_log = np.empty(n, dtype=np.float64)
+    initial_sl_log = np.empty(n, dtype=np.float64)
+    sl_log = np.empty(n, dtype=np.float64)
+    size_log = np.empty(n, dtype=np.float64)
+    pnl_log = np.empty(n, dtype=np.float64)
+    reason_log = np.empty(n, dtype=np.int8)
+    trailing_log = np.empty(n, dtype=np.bool_)
+    n_trades = 0
+
+    equity = np.empty(max(n - warmup, 0) + 1, dtype=np.float64)
+    equity[0] = initial_capital
+    running_equity = initial_capital
+
+    # 持仓状态 Position state (direction 0 = flat)
+    direction = 0
+    entry_bar = 0
+    entry_price = 0.0
+    initial_sl = 0.0
+    current_sl = 0.0
+    extreme_price = 0.0  # 多单最高价 / 空单最低价
+    trailing_active = False
+    size = base_size
+    pos_size = 0.0
+    tp_row = 0
+
+    # 风险状态 Risk state
+    trading_enabled = True
+    have_day = False
+    current_day = 0
+    daily_pnl = 0.0
+    closed_pnl = 0.0
+    peak_capital = initial_capital
+    have_last_increase = False
+    last_increase_ns = 0
+
+    for i in range(warmup, n):
+        price = close[i]
+
+        if direction != 0:
+            exit_price = 0.0
+            reason = -1
+
+            # 1. 新闻 News calendar
+            if news_exit[i]:
+                exit_price = price
+                reason = EXIT_NEWS
+            else:
+                # 2. 更新追踪止损 Update trailing stop
+                risk = abs(entry_price - initial_sl)
+                if direction == 1:
+                    if price > extreme_price:
+                        extreme_price = price
+                    profit = price - entry_price
+                else:
+                    if price < extreme_price:
+                        extreme_price = price
+                    profit = entry_price - price
+                profit_r = profit / risk if risk > 0 else 0.0
+
+                if profit_r >= trailing_activation_r:
+                    trailing_active = True
+                    if direction == 1:
+                        new_trailing = extreme_price - (atr[i] * trailing_distance_atr)
+                        if new_trailing > current_sl:
+                            current_sl = new_trailing
+                    else:
+                        new_trailing = extreme_price + (atr[i] * trailing_distance_atr)
+                        if new_trailing < current_sl:
+                            current_sl = new_trailing
+
+                # 3. 追踪止损 Trailing stop
+                if trailing_active and ((direction == 1 and price <= current_sl) or
+                                        (direction == -1 and price >= current_sl)):
+                    exit_price = current_sl
+                    reason = EXIT_TRAILING_STOP
+                # 4. 初始止损 Regular stop loss
+                elif (direction == 1 and price <= initial_sl) or (direction == -1 and price >= initial_sl):
+                    exit_price = initial_sl
+                    reason = EXIT_STOP_LOSS
+                # 5. 止盈 Take profit (按列表顺序第一个触及的)
+                else:
+                    for k in range(n_tp):
+                        tp = take_profit[tp_row, k]
+                        if (direction == 1 and price >= tp) or (direction == -1 and price <= tp):
+                            exit_price = tp
+                            reason = EXIT_TAKE_PROFIT
+                            break
+
+            if reason >= 0:
+                if direction == 1:
+                    pnl_pips = exit_price - entry_price
+                else:
+                    pnl_pips = entry_price - exit_price
+                pnl = pnl_pips * pos_size * multiplier
+
+                entry_index[n_trades] = entry_bar
+                exit_index[n_trades] = i
+                direction_log[n_trades] = direction
+                entry_log[n_trades] = entry_price
+                exit_log[n_trades] = exit_price
+                initial_sl_log[n_trades] = initial_sl
+                sl_log[n_trades] = current_sl
+                size_log[n_trades] = pos_size
+                pnl_log[n_trades] = pnl
+                reason_log[n_trades] = reason
+                trailing_log[n_trades] = trailing_active
+                n_trades += 1
+
+                closed_pnl += pnl
+                daily_pnl += pnl
+                running_equity += pnl
+                if initial_capital + closed_pnl > peak_capital:  # 与 RiskLedger 相同, 平仓时更新
+                    peak_capital = initial_capital + closed_pnl
+                direction = 0
+
+        if direction == 0:
+            # 风险限制 Risk limits (same order as _check_risk_limits)
+            allowed = trading_enabled
+            if allowed:
+                if not have_day or day_id[i] != current_day:
+                    have_day = True
+                    current_day = day_id[i]
+                    daily_pnl = 0.0
+
+                if daily_pnl <= -max_daily_loss:
+                    trading_enabled = False
+                    allowed = False
+                else:
+                    current_capital = initial_capital + closed_pnl
+                    if peak_capital - current_capital >= max_drawdown_value:
+                        trading_enabled = False
+                        allowed = False
+
+            if allowed and (long_signal[i] or short_signal[i]):
+                # 动态加仓 Progressive lots
+                if progressive_enabled:
+                    current_capital = initial_capital + closed_pnl
+                    monthly_profit = (current_capital - initial_capital) / initial_capital
+                    if monthly_profit >= profit_threshold:
+                        if (not have_last_increase or
+                                (time_ns[i] - last_increase_ns) // _NS_PER_DAY >= increase_frequency_days):
+                            size += lot_increase
+                            have_last_increase = True
+                            last_increase_ns = time_ns[i]
+
+                direction = 1 if long_signal[i] else -1
+                entry_bar = i
+                entry_price = price
+                initial_sl = stop_loss[i]
+                current_sl = initial_sl
+                extreme_price = price
+                trailing_active = False
+                pos_size = size
+                tp_row = i
+
+        equity[i - warmup + 1] = running_equity
+
+    return (entry_index[:n_trades], exit_index[:n_trades], direction_log[:n_trades],
+            entry_log[:n_trades], exit_log[:n_trades], initial_sl_log[:n_trades],
+            sl_log[:n_trades], size_log[:n_trades], pnl_log[:n_trades],
+            reason_log[:n_trades], trailing_log[:n_trades], equity)
+
+
+def simulation_inputs(
+    strategy,
+    symbol: str,
+    data_main: pd.DataFrame,
+    data_5m: pd.DataFrame,
+    news_exit: Optional[np.ndarray] = None
+) -> dict:
+    """
+    模拟器输入 Signal frame and per-bar arrays shared by the compiled simulators
+
+    Returns:
+        dict: index (ns DatetimeIndex), close, atr, long, short, stop_loss,
+        take_profit (n, 3), news_exit, day_id, time_ns
+    """
+    n = len(data_main)
+    # 每根K线只看已收盘的5分钟K线 (不复制5分钟数据)
+    data_5m_aligned = AlignedFrame.align(data_main, data_5m)
+    signals = strategy.generate_signal_frame(data_main, data_5m_aligned)
+
+    if 'atr' in data_main.columns:
+        atr = data_main['atr'].to_numpy(dtype=np.float64)
+    else:
+        atr = np.full(n, 0.0001)
+    if news_exit is None:
+        news_exit = np.zeros(n, dtype=np.bool_)
+
+    # 日期按本地时区的自然日划分, 与 Timestamp.date() 相同
+    index = pd.DatetimeIndex(data_main.index).as_unit('ns')  # pandas may infer 'us'/'s' resolution
+
+    return {
+        'index': index,
+        'close': data_main['close'].to_numpy(dtype=np.float64),
+        'atr': atr,
+        'long': signals['long'].to_numpy(dtype=np.bool_),
+        'short': signals['short'].to_numpy(dtype=np.bool_),
+        'stop_loss': signals['stop_loss'].to_numpy(dtype=np.float64),
+        'take_profit': signals[['take_profit_1', 'take_profit_2', 'take_profit_3']].to_numpy(dtype=np.float64),
+        'news_exit': np.asarray(news_exit, dtype=np.bool_),
+        'day_id': index.normalize().asi8.astype(np.int64),
+        'time_ns': index.asi8.astype(np.int64),
+    }
+
+
+def strategy_parameters(strategy, symbol: str) -> tuple:
+    """
+    策略参数 Scalar strategy parameters in simulate_positions order
+    (initial_capital ... increase_frequency_days)
+    """
+    return (
+        float(strategy.initial_capital), float(strategy.position_sizes.get(symbol, 0.1)),
+        float(strategy.contract_multiplier(symbol)),
+        float(strategy.trailing_activation_r), float(strategy.trailing_distance_atr),
+        float(strategy.max_daily_loss), float(strategy.max_drawdown_value),
+        bool(strategy.enable_progressive_lots), float(strategy.profit_threshold),
+        float(strategy.lot_increase), int(strategy.increase_frequency_days)
+    )
+
+
+def pack_trades(index: pd.DatetimeIndex, columns: tuple, dtype: np.dtype = TRADE_LOG_DTYPE) -> np.ndarray:
+    """
+    打包交易记录 Build the structured trade log from the kernel's arrays
+
+    columns: entry_index, exit_index, 然后按 dtype 中 exit_time 之后的字段顺序
+    """
+    entry_index, exit_index = columns[0], columns[1]
+    trades = np.empty(len(entry_index), dtype=dtype)
+    trades['entry_index'] = entry_index
+    trades['exit_index'] = exit_index
+    trades['entry_time'] = index.values[entry_index]
+    trades['exit_time'] = index.values[exit_index]
+    for name, values in zip(dtype.names[4:], columns[2:]):
+        trades[name] = values
+    return trades
+
+
+def run_simulation(
+    strategy,
+    symbol: str,
+    data_main: pd.DataFrame,
+    data_5m: pd.DataFrame,
+    warmup: int = 50,
+    news_exit: Optional[np.ndarray] = None
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    编译模拟回测 Compiled Backtest
+
+    与 BacktestEngine(strategy, symbol, warmup).run(data_main, data_5m) 相同的
+    交易和资金曲线, 但只读取策略参数, 不修改 strategy 的持仓/统计状态.
+    Same trades and equity curve as BacktestEngine; strategy state is untouched.
+
+    Args:
+        strategy: HybridOptimizedStrategy (参数和 generate_signal_frame)
+        symbol: 交易品种 Symbol
+        data_main: 入场周期数据 (含指标)
+        data_5m: 5分钟数据 (含指标), 每根K线收盘时只看已收盘的5分钟K线
+        warmup: 预热K线数
+        news_exit: 可选 bool 数组, 新闻平仓的K线 (回测默认无新闻)
+
+    Returns:
+        (trades, equity_curve): TRADE_LOG_DTYPE 结构化数组, float64 资金曲线
+    """
+    inputs = simulation_inputs(strategy, symbol, data_main, data_5m, news_exit)
+
+    *columns, equity = simulate_positions(
+        inputs['close'], inputs['atr'], inputs['long'], inputs['short'],
+        inputs['stop_loss'], inputs['take_profit'], inputs['news_exit'],
+        inputs['day_id'], inputs['time_ns'], warmup,
+        *strategy_parameters(strategy, symbol)
+    )
+
+    return pack_trades(inputs['index'], tuple(columns)), equity
@@ -0,0 +1,197 @@
+"""
+滚动前向优化 Walk-Forward Optimization
+
+把历史切成滚动的 训练/测试 窗口: 每个训练窗口上用 ParameterOptimizer
+选出最优配置, 再在紧随其后的测试窗口上样本外回测.
+- 所有折 (fold) 的训练窗口一起提交到进程池, 并行评估
+- 指标在全量历史上按参数组合计算一次, 各窗口只做位置切片
+  (重叠窗口共享同一份指标, 数据只加载一次)
+- 输出拼接后的样本外资金曲线和每折参数稳定性
+测试窗口结束时仍未平仓的持仓不计入结果 (与 get_statistics 只统计已平仓相同).
+"""
+
+from collections import Counter
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from loguru import logger
+
+from .optimizer import ParameterOptimizer, compute_metrics
+from .simulator import TRADE_LOG_DTYPE
+
+
+class WalkForwardOptimizer:
+    """
+    滚动前向优化 Walk-Forward Optimizer
+
+    用法 Usage:
+        wf = WalkForwardOptimizer(config, 'XAUUSD', data_1m, data_5m, train_days=20, test_days=5)
+        report = wf.run(grid_search_space({...}))
+        report['folds'], report['equity'], report['stability'], report['oos_metrics']
+    """
+
+    def __init__(self, base_config: dict, symbol: str, data_1m: pd.DataFrame, data_5m: pd.DataFrame,
+                 train_days: float = 20, test_days: float = 5, step_days: Optional[float] = None,
+                 workers: Optional[int] = None, min_trades: int = 10):
+        """
+        Args:
+            base_config: 基础配置 (YAML 结构)
+            symbol: 交易品种 Symbol
+            data_1m / data_5m: OHLC 数据 (不含指标)
+            train_days: 训练窗口天数
+            test_days: 测试窗口天数
+            step_days: 窗口滚动步长 (默认 = test_days, 测试窗口首尾相接)
+            workers: 进程数 (None = CPU 核数)
+            min_trades: 训练窗口最少交易数, 不足的配置不参与选择
+        """
+        self.optimizer = ParameterOptimizer(base_config, symbol, data_1m, data_5m, workers=workers)
+        self.index = pd.DatetimeIndex(data_1m.index)
+        self.train_days = train_days
+        self.test_days = test_days
+        self.step_days = step_days or test_days
+        self.min_trades = min_trades
+
+    def make_folds(self) -> List[Dict]:
+        """
+        切分窗口 Rolling fold boundaries as 1m bar positions
+
+        Returns:
+            [{'fold', 'train_start', 'train_stop', 'test_start', 'test_stop'}] (stop 不含)
+        """
+        if len(self.index) == 0:
+            return []
+
+        train = pd.Timedelta(days=self.train_days)
+        test = pd.Timedelta(days=self.test_days)
+        step = pd.Timedelta(days=self.step_days)
+        first, last = self.index[0], self.index[-1]
+
+        folds = []
+        start = first
+        while start + train <= last:
+            train_start, train_stop, test_stop = self.index.searchsorted(
+                [start, start + train, start + train + test])
+            if test_stop <= train_stop:
+                break
+            folds.append({
+                'fold': len(folds),
+                'train_start': int(train_start),
+                'train_stop': int(train_stop),
+                'test_start': int(train_stop),
+                'test_stop': int(test_stop),
+            })
+            start += step
+        return folds
+
+    def run(self, param_sets: List[dict], rank_by: str = 'profit_factor', ascending: bool = False) -> Dict:
+        """
+        运行滚动前向优化 Run the walk-forward
+
+        Args:
+            param_sets: 参数组合列表 (grid_search_space / random_search_space)
+            rank_by: 训练窗口上的选择指标 Metric used to pick each fold's config
+            ascending: 升序选择 (如按 max_drawdown)
+
+        Returns:
+            dict:
+                'folds': 每折窗口时间, 选中参数, train_* / test_* 指标
+                'equity': 拼接的样本外资金曲线 (pd.Series, 按测试K线时间)
+                'stability': 每个参数在各折选中值的稳定性
+                'oos_metrics': 拼接样本外结果的整体指标
+        """
+        folds = self.make_folds()
+        if not folds:
+            logger.warning("Not enough history for one walk-forward fold")
+            return {}
+        logger.info(f"Walk-forward: {len(folds)} folds x {len(param_sets)} configs")
+
+        # 1. 训练: 每个配置在所有折的训练窗口上评估 (同一配置的指标只算一次)
+        train_windows = [{'fold': f['fold'], 'start': f['train_start'], 'stop': f['train_stop']} for f in folds]
+        train = pd.DataFrame(self.optimizer.evaluate_jobs([(params, train_windows) for params in param_sets]))
+
+        # 2. 每折选最优配置 Pick the best config per fold
+        param_paths = list(param_sets[0]) if param_sets else []
+        eligible = train[train['total_trades'] >= self.min_trades]
+        chosen = {}
+        for fold in folds:
+            candidates = eligible[eligible['fold'] == fold['fold']]
+            if candidates.empty:
+                candidates = train[train['fold'] == fold['fold']]
+            # to_dict 保留各列的原始类型 (整型参数不会变成浮点)
+            chosen[fold['fold']] = self.optimizer.rank(candidates, rank_by, ascending).iloc[:1].to_dict('records')[0]
+
+        # 3. 测试: 每折的最优配置在其测试窗口上样本外回测 (各折并行)
+        test_jobs = [({path: chosen[f['fold']][path] for path in param_paths},
+                      [{'fold': f['fold'], 'start': f['test_start'], 'stop': f['test_stop']}])
+                     for f in folds]
+        test = {row['fold']: row for row in self.optimizer.evaluate_jobs(test_jobs, detail=True)}
+
+        return self._report(folds, chosen, test, param_paths)
+
+    def _report(self, folds: List[Dict], chosen: Dict, test: Dict, param_paths: List[str]) -> Dict:
+        """汇总 Stitch out-of-sample equity and summarize the folds"""
+        initial_capital = float(self.optimizer.base_config.get('backtesting', {}).get('initial_capital', 10000))
+        metric_names = ['total_trades', 'win_rate', 'profit_factor', 'total_pnl', 'sharpe', 'max_drawdown']
+
+        rows, equity_parts, trade_parts = [], [], []
+        capital = initial_capital
+        for fold in folds:
+            best, result = chosen[fold['fold']], test[fold['fold']]
+            row = {
+                'fold': fold['fold'],
+                'train_start': self.index[fold['train_start']],
+                'train_end': self.index[fold['train_stop'] - 1],
+                'test_start': self.index[fold['test_start']],
+                'test_end': self.index[fold['test_stop'] - 1],
+            }
+            row.update({path: best[path] for path in param_paths})
+            row.update({f'train_{name}': best[name] for name in metric_names})
+            row.update({f'test_{name}': result[name] for name in metric_names})
+            rows.append(row)
+
+            # 测试资金曲线按上一折结束资金续接; equity[0] 是初始资金, 之后每根K线一个点,
+            # 对应测试窗口的最后 len(equity) - 1 根K线
+            equity = result['equity']
+            stitched = capital + (equity[1:] - equity[0])
+            equity_parts.append(pd.Series(stitched, index=self.index[fold['test_stop'] - len(stitched):fold['test_stop']]))
+            if len(stitched):
+                capital = stitched[-1]
+            trade_parts.append(result['trades'])
+
+        equity_curve = pd.concat(equity_parts) if equity_parts else pd.Series(dtype=np.float64)
+        trades = np.concatenate(trade_parts) if trade_parts else np.empty(0, dtype=TRADE_LOG_DTYPE)
+        oos_equity = np.concatenate([[initial_capital], equity_curve.to_numpy()])
+
+        return {
+            'folds': pd.DataFrame(rows),
+            'equity': equity_curve,
+            'stability': self.parameter_stability(pd.DataFrame(rows), param_paths),
+            'oos_metrics': compute_metrics(trades, oos_equity, initial_capital, self.optimizer.bars_per_day),
+        }
+
+    @staticmethod
+    def parameter_stability(folds: pd.DataFrame, param_paths: List[str]) -> pd.DataFrame:
+        """
+        参数稳定性 Per-parameter stability of the chosen values across folds
+
+        Returns:
+            DataFrame indexed by parameter: n_unique, most_common, most_common_share,
+            mean / std / cv (数值参数, cv = std / |mean|)
+        """
+        rows = []
+        for path in param_paths:
+            values = folds[path].tolist()
+            most_common, count = Counter(values).most_common(1)[0]
+            row = {
+                'parameter': path,
+                'n_unique': len(set(values)),
+                'most_common': most_common,
+                'most_common_share': count / len(values),
+            }
+            numeric = pd.to_numeric(folds[path], errors='coerce')
+            if numeric.notna().all():
+                mean, std = numeric.mean(), numeric.std(ddof=0)
+                row.update({'mean': mean, 'std': std, 'cv': std / abs(mean) if mean != 0 else np.nan})
+            rows.append(row)
+        return pd.DataFrame(rows).set_index('parameter') if rows else pd.DataFrame()
@@ -1,3 +1,4 @@
 from .indicators import Indicators
+from .streaming import StreamingIndicatorSet
 
-__all__ = ['Indicators']
+__all__ = ['Indicators', 'StreamingIndicatorSet']
@@ -0,0 +1,97 @@
+"""
+Indicator Context
+Memoizes intermediate series shared between indicators within one pass
+
+Keys are (function, params, source column), so e.g. the true range, an
+ATR(10) used by both Keltner and SuperTrend, or an EMA(12) of close used by
+both Keltner and MACD are computed once per calculate_all_indicators call.
+"""
+
+from typing import Callable, Dict, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+class IndicatorContext:
+    """Per-pass cache of intermediate indicator series"""
+
+    def __init__(self, data: pd.DataFrame):
+        """
+        Args:
+            data: OHLC dataframe the indicators are computed on (not modified)
+        """
+        self.data = data
+        self._cache: Dict[Tuple, pd.Series] = {}
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_series(cls, series: pd.Series, name: str = 'close') -> 'IndicatorContext':
+        """Context over a single price series (for the Series-based indicators)"""
+        return cls(series.to_frame(name=name))
+
+    def cached(self, function: str, params: Tuple, source: str, compute: Callable[[], pd.Series]) -> pd.Series:
+        """Return the memoized result for (function, params, source), computing it on first use"""
+        key = (function, params, source)
+        if key in self._cache:
+            self.hits += 1
+            return self._cache[key]
+
+        self.misses += 1
+        value = compute()
+        self._cache[key] = value
+        return value
+
+    def rebind(self, value: pd.Series, replacement: pd.Series):
+        """Point cache entries holding `value` at `replacement` (same values, e.g. an output column view)"""
+        for key, cached in self._cache.items():
+            if cached is value:
+                self._cache[key] = replacement
+
+    def source(self, name: str) -> pd.Series:
+        """
+        Price source by name
+        'open' / 'high' / 'low' / 'close': raw columns
+        'median': (high + low) / 2, 'typical': (high + low + close) / 3
+        """
+        if name in self.data.columns:
+            return self.data[name]
+        if name == 'median':
+            return self.cached('price', (), 'median',
+                               lambda: (self.data['high'] + self.data['low']) / 2)
+        if name == 'typical':
+            return self.cached('price', (), 'typical',
+                               lambda: (self.data['high'] + self.data['low'] + self.data['close']) / 3)
+        raise KeyError(f"Unknown price source: {name}")
+
+    def true_range(self) -> pd.Series:
+        """max(high - low, |high - prev close|, |low - prev close|), NaN legs skipped"""
+        def compute():
+            high = self.data['high'].to_numpy(dtype=np.float64)
+            low = self.data['low'].to_numpy(dtype=np.float64)
+            prev_close = self.data['close'].shift().to_numpy(dtype=np.float64)
+            tr = np.fmax(np.fmax(high - low, np.abs(high - prev_close)), np.abs(low - prev_close))
+            return pd.Series(tr, index=self.data.index)
+
+        return self.cached('true_range', (), 'hlc', compute)
+
+    def atr(self, period: int) -> pd.Series:
+        """Simple rolling mean of the shared true range"""
+        return self.cached('atr', (period,), 'hlc',
+                           lambda: self.true_range().rolling(window=period).mean())
+
+    def ema(self, source: str, span: int) -> pd.Series:
+        """EMA with adjust=False of a price source"""
+        return self.cached('ema', (span,), source,
+                           lambda: self.source(source).ewm(span=span, adjust=False).mean())
+
+    def sma(self, source: str, window: int) -> pd.Series:
+        """Simple rolling mean of a price source"""
+        return self.cached('sma', (window,), source,
+                           lambda: self.source(source).rolling(window=window).mean())
+
+    def rolling_std(self, source: str, window: int) -> pd.Series:
+        """Rolling sample standard deviation of a price source"""
+        return self.cached('rolling_std', (window,), source,
+                           lambda: self.source(source).rolling(window=window).std())
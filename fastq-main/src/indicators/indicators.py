@@ -3,54 +3,56 @@ Technical Indicators Module
 Implements ZigZag, Keltner Channel, Bollinger Bands, and RSI
 """
 
+from itertools import groupby
+
 import numpy as np
 import pandas as pd
-from typing import Tuple
+from typing import Iterable, List, Optional, Tuple
+
+from .context import IndicatorContext
+from .kernels import zigzag_kernel, supertrend_kernel, rolling_mad
 
 
 class Indicators:
     """Technical indicators for trading strategy"""
 
+    # Columns written by each indicator in calculate_all_indicators (in computation order)
+    INDICATOR_COLUMNS = {
+        'zigzag': ['zigzag'],
+        'keltner': ['kc_mid', 'kc_upper', 'kc_lower'],
+        'bollinger': ['bb_mid', 'bb_upper', 'bb_lower'],
+        'rsi': ['rsi'],
+        'rsi_crossover': ['rsi_crossover'],
+        'macd': ['macd', 'macd_signal', 'macd_histogram'],
+        'macd_crossover': ['macd_crossover'],
+        'supertrend': ['supertrend', 'supertrend_direction'],
+        'cci': ['cci'],
+        'atr': ['atr'],
+    }
+
+    # Indicators computed from another indicator's output
+    INDICATOR_DEPENDENCIES = {
+        'rsi_crossover': ['rsi'],
+        'macd_crossover': ['macd'],
+    }
+
+    # Output columns holding int64 signals rather than float64 values
+    INT_COLUMNS = {'zigzag', 'rsi_crossover', 'macd_crossover', 'supertrend_direction'}
+
     @staticmethod
     def zigzag(high: pd.Series, low: pd.Series, depth: int = 35) -> pd.Series:
         """
         ZigZag indicator to identify swing highs and lows
+        Rolling extremes are tracked with monotonic deques, O(n) overall
         Returns: 1 for uptrend, -1 for downtrend, 0 for no change
         """
-        zigzag = pd.Series(0, index=high.index)
-        last_pivot = None
-        last_pivot_idx = 0
-        last_pivot_type = None  # 'high' or 'low'
-        trend = 0
-
-        for i in range(depth, len(high)):
-            # Check for swing high
-            swing_high = high.iloc[i - depth:i + 1].max()
-            swing_low = low.iloc[i - depth:i + 1].min()
-
-            current_high = high.iloc[i]
-            current_low = low.iloc[i]
-
-            # Identify pivot points
-            if current_high == swing_high:
-                if last_pivot_type == 'low' or last_pivot is None:
-                    if last_pivot is None or current_high > last_pivot:
-                        last_pivot = current_high
-                        last_pivot_idx = i
-                        last_pivot_type = 'high'
-                        trend = -1  # When pivot high is formed, trend is down (short)
-
-            elif current_low == swing_low:
-                if last_pivot_type == 'high' or last_pivot is None:
-                    if last_pivot is None or current_low < last_pivot:
-                        last_pivot = current_low
-                        last_pivot_idx = i
-                        last_pivot_type = 'low'
-                        trend = 1  # When pivot low is formed, trend is up (long)
-
-            zigzag.iloc[i] = trend
-
-        return zigzag
+        zigzag = zigzag_kernel(
+            np.ascontiguousarray(high.to_numpy(dtype=np.float64)),
+            np.ascontiguousarray(low.to_numpy(dtype=np.float64)),
+            depth
+        )
+
+        return pd.Series(zigzag, index=high.index)
 
     @staticmethod
     def keltner_channel(
@@ -59,29 +61,31 @@ class Indicators:
         atr_period: int = 10,
         atr_multiple: float = 0.5,
         ma_method: int = 1,
-        ma_price: int = 4
+        ma_price: int = 4,
+        ctx: Optional[IndicatorContext] = None
     ) -> Tuple[pd.Series, pd.Series, pd.Series]:
         """
         Keltner Channel indicator
         ma_method: 1=EMA, 0=SMA
         ma_price: 4=Close, 0=Open, 1=High, 2=Low, 3=Median
+        ctx: shared IndicatorContext to reuse the MA / ATR from
         Returns: (middle, upper, lower)
         """
+        if ctx is None:
+            ctx = IndicatorContext(data)
+
         # Select price
-        price_map = {0: 'open', 1: 'high', 2: 'low', 3: 'close', 4: 'close'}
-        if ma_price == 3:  # Median
-            price = (data['high'] + data['low']) / 2
-        else:
-            price = data[price_map.get(ma_price, 'close')]
+        price_map = {0: 'open', 1: 'high', 2: 'low', 3: 'median', 4: 'close'}
+        price = price_map.get(ma_price, 'close')
 
         # Calculate MA
         if ma_method == 1:  # EMA
-            middle = price.ewm(span=ma_period, adjust=False).mean()
+            middle = ctx.ema(price, ma_period)
         else:  # SMA
-            middle = price.rolling(window=ma_period).mean()
+            middle = ctx.sma(price, ma_period)
 
         # Calculate ATR
-        atr = Indicators.atr(data, period=atr_period)
+        atr = ctx.atr(atr_period)
 
         # Calculate bands
         upper = middle + (atr * atr_multiple)
@@ -93,14 +97,19 @@ class Indicators:
     def bollinger_bands(
         close: pd.Series,
         length: int = 34,
-        deviation: float = 1.0
+        deviation: float = 1.0,
+        ctx: Optional[IndicatorContext] = None
     ) -> Tuple[pd.Series, pd.Series, pd.Series]:
         """
         Bollinger Bands indicator
+        ctx: shared IndicatorContext whose 'close' is this series
         Returns: (middle, upper, lower)
         """
-        middle = close.rolling(window=length).mean()
-        std = close.rolling(window=length).std()
+        if ctx is None:
+            ctx = IndicatorContext.from_series(close)
+
+        middle = ctx.sma('close', length)
+        std = ctx.rolling_std('close', length)
 
         upper = middle + (std * deviation)
         lower = middle - (std * deviation)
@@ -140,37 +149,35 @@ class Indicators:
         return crossover
 
     @staticmethod
-    def atr(data: pd.DataFrame, period: int = 14) -> pd.Series:
+    def atr(data: pd.DataFrame, period: int = 14, ctx: Optional[IndicatorContext] = None) -> pd.Series:
         """
         Average True Range
+        ctx: shared IndicatorContext, the true range is computed once per context
         """
-        high = data['high']
-        low = data['low']
-        close = data['close']
-
-        tr1 = high - low
-        tr2 = abs(high - close.shift())
-        tr3 = abs(low - close.shift())
-
-        tr = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
-        atr = tr.rolling(window=period).mean()
+        if ctx is None:
+            ctx = IndicatorContext(data)
 
-        return atr
+        return ctx.atr(period)
 
     @staticmethod
     def macd(
         close: pd.Series,
         fast_period: int = 12,
         slow_period: int = 26,
-        signal_period: int = 9
+        signal_period: int = 9,
+        ctx: Optional[IndicatorContext] = None
     ) -> Tuple[pd.Series, pd.Series, pd.Series]:
         """
         MACD (Moving Average Convergence Divergence)
+        ctx: shared IndicatorContext whose 'close' is this series
         Returns: (macd_line, signal_line, histogram)
         """
+        if ctx is None:
+            ctx = IndicatorContext.from_series(close)
+
         # Calculate EMAs
-        ema_fast = close.ewm(span=fast_period, adjust=False).mean()
-        ema_slow = close.ewm(span=slow_period, adjust=False).mean()
+        ema_fast = ctx.ema('close', fast_period)
+        ema_slow = ctx.ema('close', slow_period)
 
         # MACD line
         macd_line = ema_fast - ema_slow
@@ -205,80 +212,95 @@ class Indicators:
     def supertrend(
         data: pd.DataFrame,
         period: int = 10,
-        multiplier: float = 3.0
+        multiplier: float = 3.0,
+        ctx: Optional[IndicatorContext] = None
     ) -> Tuple[pd.Series, pd.Series]:
         """
         SuperTrend indicator
+        ctx: shared IndicatorContext to reuse the ATR / median price from
         Returns: (supertrend_line, trend_direction)
         trend_direction: 1 for uptrend, -1 for downtrend
         """
+        if ctx is None:
+            ctx = IndicatorContext(data)
+
         # Calculate ATR
-        atr = Indicators.atr(data, period=period)
+        atr = ctx.atr(period).to_numpy(dtype=np.float64)
 
-        high = data['high']
-        low = data['low']
         close = data['close']
 
-        # Calculate basic bands
-        hl_avg = (high + low) / 2
+        # Calculate basic bands (fresh arrays, the kernel tightens them in place)
+        hl_avg = ctx.source('median').to_numpy(dtype=np.float64)
         upper_band = hl_avg + (multiplier * atr)
         lower_band = hl_avg - (multiplier * atr)
 
-        # Initialize
-        supertrend = pd.Series(0.0, index=data.index)
-        direction = pd.Series(1, index=data.index)
+        # Ratchet bands and flip direction on contiguous arrays
+        supertrend, direction = supertrend_kernel(
+            np.ascontiguousarray(close.to_numpy(dtype=np.float64)),
+            upper_band,
+            lower_band
+        )
 
-        for i in range(1, len(data)):
-            # Adjust bands
-            if close.iloc[i-1] <= upper_band.iloc[i-1]:
-                upper_band.iloc[i] = min(upper_band.iloc[i], upper_band.iloc[i-1])
-
-            if close.iloc[i-1] >= lower_band.iloc[i-1]:
-                lower_band.iloc[i] = max(lower_band.iloc[i], lower_band.iloc[i-1])
-
-            # Determine trend
-            if close.iloc[i] <= upper_band.iloc[i]:
-                direction.iloc[i] = -1  # Downtrend
-                supertrend.iloc[i] = upper_band.iloc[i]
-            else:
-                direction.iloc[i] = 1   # Uptrend
-                supertrend.iloc[i] = lower_band.iloc[i]
-
-            # Check for trend change
-            if direction.iloc[i] == 1 and direction.iloc[i-1] == -1:
-                supertrend.iloc[i] = lower_band.iloc[i]
-            elif direction.iloc[i] == -1 and direction.iloc[i-1] == 1:
-                supertrend.iloc[i] = upper_band.iloc[i]
+        supertrend = pd.Series(supertrend, index=data.index)
+        direction = pd.Series(direction, index=data.index)
 
         return supertrend, direction
 
     @staticmethod
     def cci(
         data: pd.DataFrame,
-        period: int = 20
+        period: int = 20,
+        ctx: Optional[IndicatorContext] = None
     ) -> pd.Series:
         """
         Commodity Channel Index (CCI)
+        ctx: shared IndicatorContext to reuse the typical price / its SMA from
         Returns: CCI values (typically -100 to +100, but can exceed)
         """
-        high = data['high']
-        low = data['low']
-        close = data['close']
+        if ctx is None:
+            ctx = IndicatorContext(data)
 
         # Typical Price
-        tp = (high + low + close) / 3
+        tp = ctx.source('typical')
 
         # Simple Moving Average of TP
-        sma_tp = tp.rolling(window=period).mean()
+        sma_tp = ctx.sma('typical', period)
 
-        # Mean Deviation
-        mad = tp.rolling(window=period).apply(lambda x: np.abs(x - x.mean()).mean())
+        # Mean Deviation (vectorized rolling MAD, no per-bar Python call)
+        mad = pd.Series(rolling_mad(tp.to_numpy(dtype=np.float64), period), index=tp.index)
 
         # CCI calculation
         cci = (tp - sma_tp) / (0.015 * mad)
 
         return cci
 
+    @staticmethod
+    def resolve_indicators(columns: Optional[Iterable[str]] = None) -> List[str]:
+        """
+        Resolve requested output columns to the indicators that must run
+        Dependencies are included; result is in computation order.
+        columns: indicator column names (None for every indicator)
+        """
+        if columns is None:
+            return list(Indicators.INDICATOR_COLUMNS)
+
+        column_owner = {
+            col: name for name, cols in Indicators.INDICATOR_COLUMNS.items() for col in cols
+        }
+        unknown = [col for col in columns if col not in column_owner]
+        if unknown:
+            raise ValueError(f"Unknown indicator columns: {unknown}")
+
+        needed = set()
+        pending = [column_owner[col] for col in columns]
+        while pending:
+            name = pending.pop()
+            if name not in needed:
+                needed.add(name)
+                pending.extend(Indicators.INDICATOR_DEPENDENCIES.get(name, []))
+
+        return [name for name in Indicators.INDICATOR_COLUMNS if name in needed]
+
     @staticmethod
     def calculate_all_indicators(
         data: pd.DataFrame,
@@ -288,12 +310,18 @@ class Indicators:
         rsi_period: int = 14,
         macd_params: dict = None,
         supertrend_params: dict = None,
-        cci_period: int = 20
+        cci_period: int = 20,
+        columns: Optional[Iterable[str]] = None
     ) -> pd.DataFrame:
         """
-        Calculate all indicators and add them to the dataframe
+        Calculate indicators and add them to the dataframe
+        Intermediates (true range, ATRs, EMAs, rolling means) are shared through
+        one IndicatorContext and outputs are written into preallocated columns
+        instead of growing the frame one column at a time.
+        columns: only compute what these output columns need (None for all),
+                 e.g. HybridOptimizedStrategy.REQUIRED_COLUMNS_1M
         """
-        df = data.copy()
+        needed = Indicators.resolve_indicators(columns)
 
         # Default parameters
         if keltner_params is None:
@@ -324,42 +352,91 @@ class Indicators:
                 'multiplier': 3.0
             }
 
+        # Shared intermediates (true range, ATRs, EMAs, rolling sums) for this pass
+        ctx = IndicatorContext(data)
+
+        # Preallocated outputs: a float64 block and an int64 block for the signal
+        # columns, column-major so each column is contiguous, instead of inserting
+        # the outputs into the frame one column at a time.
+        out_columns = [col for name in needed for col in Indicators.INDICATOR_COLUMNS[name]]
+        blocks = {}
+        slots = {}
+        for is_int, dtype in ((False, np.float64), (True, np.int64)):
+            cols = [col for col in out_columns if (col in Indicators.INT_COLUMNS) == is_int]
+            blocks[is_int] = np.empty((len(data), len(cols)), dtype=dtype, order='F')
+            slots.update({col: i for i, col in enumerate(cols)})
+
+        def column_values(name: str) -> np.ndarray:
+            return blocks[name in Indicators.INT_COLUMNS][:, slots[name]]
+
+        def column(name: str) -> pd.Series:
+            """Zero-copy Series over an output column"""
+            return pd.Series(column_values(name), index=data.index, copy=False)
+
+        def put(names: List[str], values):
+            """Write one indicator's outputs into their preallocated columns"""
+            if isinstance(values, pd.Series):
+                values = (values,)
+            for name, series in zip(names, values):
+                column_values(name)[:] = series.to_numpy()
+                # Shared intermediates that are also outputs (e.g. kc_mid is the
+                # EMA) now live in the block; point the cache there instead
+                ctx.rebind(series, column(name))
+
         # ZigZag
-        df['zigzag'] = Indicators.zigzag(df['high'], df['low'], depth=zigzag_depth)
+        if 'zigzag' in needed:
+            put(['zigzag'], Indicators.zigzag(data['high'], data['low'], depth=zigzag_depth))
 
         # Keltner Channel
-        kc_mid, kc_upper, kc_lower = Indicators.keltner_channel(df, **keltner_params)
-        df['kc_mid'] = kc_mid
-        df['kc_upper'] = kc_upper
-        df['kc_lower'] = kc_lower
+        if 'keltner' in needed:
+            put(['kc_mid', 'kc_upper', 'kc_lower'],
+                Indicators.keltner_channel(data, **keltner_params, ctx=ctx))
 
         # Bollinger Bands
-        bb_params_filtered = {k: v for k, v in bollinger_params.items() if k in ['length', 'deviation']}
-        bb_mid, bb_upper, bb_lower = Indicators.bollinger_bands(df['close'], **bb_params_filtered)
-        df['bb_mid'] = bb_mid
-        df['bb_upper'] = bb_upper
-        df['bb_lower'] = bb_lower
+        if 'bollinger' in needed:
+            bb_params_filtered = {k: v for k, v in bollinger_params.items() if k in ['length', 'deviation']}
+            put(['bb_mid', 'bb_upper', 'bb_lower'],
+                Indicators.bollinger_bands(data['close'], **bb_params_filtered, ctx=ctx))
 
         # RSI
-        df['rsi'] = Indicators.rsi(df['close'], period=rsi_period)
-        df['rsi_crossover'] = Indicators.rsi_crossover(df['rsi'])
+        if 'rsi' in needed:
+            put(['rsi'], Indicators.rsi(data['close'], period=rsi_period))
+        if 'rsi_crossover' in needed:
+            put(['rsi_crossover'], Indicators.rsi_crossover(column('rsi')))
 
         # MACD
-        macd_line, signal_line, histogram = Indicators.macd(df['close'], **macd_params)
-        df['macd'] = macd_line
-        df['macd_signal'] = signal_line
-        df['macd_histogram'] = histogram
-        df['macd_crossover'] = Indicators.macd_crossover(macd_line, signal_line)
+        if 'macd' in needed:
+            put(['macd', 'macd_signal', 'macd_histogram'],
+                Indicators.macd(data['close'], **macd_params, ctx=ctx))
+        if 'macd_crossover' in needed:
+            put(['macd_crossover'], Indicators.macd_crossover(column('macd'), column('macd_signal')))
 
         # SuperTrend
-        supertrend_line, supertrend_direction = Indicators.supertrend(df, **supertrend_params)
-        df['supertrend'] = supertrend_line
-        df['supertrend_direction'] = supertrend_direction
+        if 'supertrend' in needed:
+            put(['supertrend', 'supertrend_direction'],
+                Indicators.supertrend(data, **supertrend_params, ctx=ctx))
 
         # CCI
-        df['cci'] = Indicators.cci(df, period=cci_period)
+        if 'cci' in needed:
+            put(['cci'], Indicators.cci(data, period=cci_period, ctx=ctx))
 
         # ATR (for volatility filtering)
-        df['atr'] = Indicators.atr(df, period=14)
-
-        return df
+        if 'atr' in needed:
+            put(['atr'], Indicators.atr(data, period=14, ctx=ctx))
+
+        # Intermediates are no longer needed once every output is written
+        del ctx
+
+        # Wrap runs of same-dtype columns as frames over the blocks, keeping the column
+        # order. Whether the final concat copies them is up to pandas (it does without
+        # copy-on-write); the input frame itself is never modified.
+        # Indicator columns already in the input (e.g. a re-run on live data) are replaced.
+        existing = data.columns.intersection(out_columns)
+        pieces = [data.drop(columns=existing) if len(existing) else data]
+        for is_int, run in groupby(out_columns, key=lambda col: col in Indicators.INT_COLUMNS):
+            run = list(run)
+            first = slots[run[0]]
+            values = blocks[is_int][:, first:first + len(run)]
+            pieces.append(pd.DataFrame(values, index=data.index, columns=run, copy=False))
+
+        return pd.concat(pieces, axis=1)
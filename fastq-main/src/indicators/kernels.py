@@ -0,0 +1,165 @@
+"""
+Indicator Kernels
+Array kernels behind the slow paths in Indicators
+
+All kernels take float64 NumPy arrays and return NumPy arrays; the pandas
+wrapping happens in Indicators. Sequential loops are Numba-compiled when
+numba is available, otherwise the same loops run as plain Python.
+"""
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+try:
+    from numba import njit
+except ImportError:  # numba is optional, kernels still run (slower) without it
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
+
+
+# Pivot types for the ZigZag state machine
+PIVOT_NONE = 0
+PIVOT_HIGH = 1
+PIVOT_LOW = -1
+
+
+@njit(cache=True)
+def zigzag_kernel(high: np.ndarray, low: np.ndarray, depth: int) -> np.ndarray:
+    """
+    ZigZag trend in one O(n) pass
+
+    The rolling max/min over [i - depth, i] is kept in two monotonic deques
+    (stored as index arrays), so every bar is pushed and popped at most once.
+    NaN bars are never pushed, matching pandas' skipna max()/min() on a slice.
+    Returns: int64 array, 1 for uptrend, -1 for downtrend, 0 before the first pivot
+    """
+    n = high.shape[0]
+    out = np.zeros(n, dtype=np.int64)
+
+    max_q = np.empty(n, dtype=np.int64)
+    min_q = np.empty(n, dtype=np.int64)
+    max_head = 0
+    max_tail = 0
+    min_head = 0
+    min_tail = 0
+
+    last_pivot = 0.0
+    last_pivot_type = PIVOT_NONE
+    trend = 0
+
+    for i in range(n):
+        h = high[i]
+        l = low[i]
+
+        # Push current bar, dropping dominated entries from the back
+        if not np.isnan(h):
+            while max_tail > max_head and high[max_q[max_tail - 1]] <= h:
+                max_tail -= 1
+            max_q[max_tail] = i
+            max_tail += 1
+        if not np.isnan(l):
+            while min_tail > min_head and low[min_q[min_tail - 1]] >= l:
+                min_tail -= 1
+            min_q[min_tail] = i
+            min_tail += 1
+
+        # Expire bars that left the window
+        start = i - depth
+        while max_tail > max_head and max_q[max_head] < start:
+            max_head += 1
+        while min_tail > min_head and min_q[min_head] < start:
+            min_head += 1
+
+        if i < depth:
+            continue
+
+        swing_high = high[max_q[max_head]] if max_tail > max_head else np.nan
+        swing_low = low[min_q[min_head]] if min_tail > min_head else np.nan
+
+        # Identify pivot points
+        if h == swing_high:
+            if last_pivot_type == PIVOT_LOW or last_pivot_type == PIVOT_NONE:
+                if last_pivot_type == PIVOT_NONE or h > last_pivot:
+                    last_pivot = h
+                    last_pivot_type = PIVOT_HIGH
+                    trend = -1  # Pivot high formed, trend is down (short)
+
+        elif l == swing_low:
+            if last_pivot_type == PIVOT_HIGH or last_pivot_type == PIVOT_NONE:
+                if last_pivot_type == PIVOT_NONE or l < last_pivot:
+                    last_pivot = l
+                    last_pivot_type = PIVOT_LOW
+                    trend = 1  # Pivot low formed, trend is up (long)
+
+        out[i] = trend
+
+    return out
+
+
+@njit(cache=True)
+def supertrend_kernel(close: np.ndarray, upper_band: np.ndarray, lower_band: np.ndarray):
+    """
+    SuperTrend band ratcheting and direction flips in one pass
+
+    upper_band / lower_band are the basic bands and are tightened in place.
+    The band comparisons reproduce Python's min()/max() exactly, including
+    how they treat the NaN warm-up bars of the ATR.
+    Returns: (supertrend float64 array, direction int64 array)
+    """
+    n = close.shape[0]
+    supertrend = np.zeros(n, dtype=np.float64)
+    direction = np.ones(n, dtype=np.int64)
+
+    for i in range(1, n):
+        # Adjust bands (min(a, b) keeps a unless b < a; max likewise)
+        if close[i - 1] <= upper_band[i - 1]:
+            if upper_band[i - 1] < upper_band[i]:
+                upper_band[i] = upper_band[i - 1]
+
+        if close[i - 1] >= lower_band[i - 1]:
+            if lower_band[i - 1] > lower_band[i]:
+                lower_band[i] = lower_band[i - 1]
+
+        # Determine trend
+        if close[i] <= upper_band[i]:
+            direction[i] = -1  # Downtrend
+            supertrend[i] = upper_band[i]
+        else:
+            direction[i] = 1   # Uptrend
+            supertrend[i] = lower_band[i]
+
+        # Check for trend change
+        if direction[i] == 1 and direction[i - 1] == -1:
+            supertrend[i] = lower_band[i]
+        elif direction[i] == -1 and direction[i - 1] == 1:
+            supertrend[i] = upper_band[i]
+
+    return supertrend, direction
+
+
+def rolling_mad(values: np.ndarray, period: int, chunk_size: int = 65536) -> np.ndarray:
+    """
+    Rolling mean absolute deviation around the window mean
+
+    Works on a strided sliding-window view, so there is no Python call per
+    bar. Windows are reduced along their contiguous axis with the same
+    NumPy summation pandas uses for Series.mean(), which keeps the result
+    bit-identical to rolling().apply(lambda x: np.abs(x - x.mean()).mean()).
+    Windows containing NaN yield NaN, as with rolling(window=period).
+    Processed in chunks to bound the (chunk_size x period) temporaries.
+    """
+    values = np.ascontiguousarray(values, dtype=np.float64)
+    n = values.shape[0]
+    out = np.full(n, np.nan)
+    if period <= 0 or n < period:
+        return out
+
+    windows = sliding_window_view(values, period)
+    for start in range(0, windows.shape[0], chunk_size):
+        block = windows[start:start + chunk_size]
+        mean = block.mean(axis=1, keepdims=True)
+        out[start + period - 1:start + period - 1 + block.shape[0]] = np.abs(block - mean).mean(axis=1)
+
+    return out
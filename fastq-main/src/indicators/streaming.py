@@ -0,0 +1,442 @@
+"""
+Streaming Indicators Module
+Incremental counterparts of Indicators for live bar-by-bar updates
+
+Each indicator keeps at most O(window) state and is updated once per new
+bar. Rolling means use a Kahan-compensated running sum and rolling standard
+deviations use Welford's add/remove updates; EMAs follow pandas'
+ewm(adjust=False) recurrence. Feeding the bars of a frame one by one
+reproduces the batch columns of Indicators.calculate_all_indicators to
+floating-point tolerance (not bit for bit).
+"""
+
+import math
+from collections import deque
+from typing import Dict, Iterable, Mapping, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .indicators import Indicators
+
+
+NAN = float('nan')
+
+
+class StreamingEMA:
+    """Exponential moving average, same recurrence as Series.ewm(span, adjust=False)"""
+
+    def __init__(self, span: int):
+        com = (span - 1) / 2.0
+        self.alpha = 1.0 / (1.0 + com)
+        self.old_wt_factor = 1.0 - self.alpha
+        self.old_wt = 1.0
+        self.value = NAN
+
+    def update(self, x: float) -> float:
+        if self.value == self.value:
+            # Missing bars still decay the weight of the running average
+            self.old_wt *= self.old_wt_factor
+            if x == x:
+                if self.value != x:
+                    self.value = (self.old_wt * self.value + self.alpha * x) / (self.old_wt + self.alpha)
+                self.old_wt = 1.0
+        elif x == x:
+            # First observation seeds the average
+            self.value = x
+        return self.value
+
+
+class StreamingMean:
+    """Rolling mean over a fixed window, Kahan-compensated running sum"""
+
+    def __init__(self, window: int):
+        self.window = window
+        self.values = deque()
+        self.nobs = 0
+        self.sum_x = 0.0
+        self.compensation = 0.0
+
+    def _add(self, val: float):
+        # Kahan summation: carry the low-order bits lost by each add/remove
+        y = val - self.compensation
+        t = self.sum_x + y
+        self.compensation = (t - self.sum_x) - y
+        self.sum_x = t
+
+    def update(self, x: float) -> float:
+        if len(self.values) == self.window:
+            old = self.values.popleft()
+            if old == old:
+                self.nobs -= 1
+                self._add(-old)
+        self.values.append(x)
+        if x == x:
+            self.nobs += 1
+            self._add(x)
+
+        if self.nobs < self.window:
+            return NAN
+        return self.sum_x / self.nobs
+
+
+class StreamingStd:
+    """Rolling sample standard deviation (ddof=1) via Welford add/remove"""
+
+    def __init__(self, window: int, ddof: int = 1):
+        self.window = window
+        self.ddof = ddof
+        self.values = deque()
+        self.nobs = 0
+        self.mean_x = 0.0
+        self.ssqdm_x = 0.0
+
+    def update(self, x: float) -> float:
+        if len(self.values) == self.window:
+            old = self.values.popleft()
+            if old == old:
+                self.nobs -= 1
+                if self.nobs:
+                    delta = old - self.mean_x
+                    self.mean_x -= delta / self.nobs
+                    self.ssqdm_x -= delta * (old - self.mean_x)
+                else:
+                    self.mean_x = self.ssqdm_x = 0.0
+        self.values.append(x)
+        if x == x:
+            self.nobs += 1
+            delta = x - self.mean_x
+            self.mean_x += delta / self.nobs
+            self.ssqdm_x += delta * (x - self.mean_x)
+
+        if self.nobs < self.window or self.nobs <= self.ddof:
+            return NAN
+        var = self.ssqdm_x / (self.nobs - self.ddof)
+        return math.sqrt(var) if var > 0 else 0.0
+
+
+class StreamingATR:
+    """Average True Range (simple rolling mean of true range)"""
+
+    def __init__(self, period: int = 14):
+        self.mean = StreamingMean(period)
+        self.prev_close = NAN
+        self.value = NAN
+
+    def update(self, high: float, low: float, close: float) -> float:
+        # pandas max(axis=1) skips NaN legs (first bar has no previous close)
+        legs = [x for x in (high - low, abs(high - self.prev_close), abs(low - self.prev_close)) if x == x]
+        tr = max(legs) if legs else NAN
+        self.prev_close = close
+        self.value = self.mean.update(tr)
+        return self.value
+
+
+class StreamingKeltner:
+    """Keltner Channel, see Indicators.keltner_channel"""
+
+    def __init__(
+        self,
+        ma_period: int = 20,
+        atr_period: int = 10,
+        atr_multiple: float = 0.5,
+        ma_method: int = 1,
+        ma_price: int = 4
+    ):
+        self.atr_multiple = atr_multiple
+        self.ma_price = ma_price
+        self.ma = StreamingEMA(ma_period) if ma_method == 1 else StreamingMean(ma_period)
+        self.atr = StreamingATR(atr_period)
+
+    def update(self, bar: Mapping) -> Tuple[float, float, float]:
+        price_map = {0: 'open', 1: 'high', 2: 'low', 3: 'close', 4: 'close'}
+        if self.ma_price == 3:  # Median
+            price = (bar['high'] + bar['low']) / 2
+        else:
+            price = bar[price_map.get(self.ma_price, 'close')]
+
+        middle = self.ma.update(price)
+        atr = self.atr.update(bar['high'], bar['low'], bar['close'])
+        return middle, middle + (atr * self.atr_multiple), middle - (atr * self.atr_multiple)
+
+
+class StreamingBollinger:
+    """Bollinger Bands, see Indicators.bollinger_bands"""
+
+    def __init__(self, length: int = 34, deviation: float = 1.0):
+        self.deviation = deviation
+        self.mean = StreamingMean(length)
+        self.std = StreamingStd(length)
+
+    def update(self, close: float) -> Tuple[float, float, float]:
+        middle = self.mean.update(close)
+        std = self.std.update(close)
+        return middle, middle + (std * self.deviation), middle - (std * self.deviation)
+
+
+class StreamingRSI:
+    """RSI with simple-mean gains/losses plus RSI crossover, see Indicators.rsi"""
+
+    def __init__(self, period: int = 14):
+        self.gain = StreamingMean(period)
+        self.loss = StreamingMean(period)
+        self.prev_close = NAN
+        self.value = NAN
+
+    def update(self, close: float) -> Tuple[float, int]:
+        delta = close - self.prev_close
+        self.prev_close = close
+
+        # Mirrors delta.where(delta > 0, 0) / -delta.where(delta < 0, 0)
+        gain = self.gain.update(delta if delta > 0 else 0.0)
+        loss = self.loss.update(-(delta if delta < 0 else 0.0))
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rs = np.float64(gain) / np.float64(loss)
+            rsi = float(100 - (100 / (1 + rs)))
+
+        rsi_diff = rsi - self.value
+        self.value = rsi
+        crossover = 1 if rsi_diff > 0 else -1 if rsi_diff < 0 else 0
+        return rsi, crossover
+
+
+class StreamingMACD:
+    """MACD line, signal, histogram and crossover, see Indicators.macd"""
+
+    def __init__(self, fast_period: int = 12, slow_period: int = 26, signal_period: int = 9):
+        self.fast = StreamingEMA(fast_period)
+        self.slow = StreamingEMA(slow_period)
+        self.signal = StreamingEMA(signal_period)
+        self.prev_macd = NAN
+        self.prev_signal = NAN
+
+    def update(self, close: float) -> Tuple[float, float, float, int]:
+        macd_line = self.fast.update(close) - self.slow.update(close)
+        signal_line = self.signal.update(macd_line)
+
+        crossover = 0
+        if macd_line > signal_line and self.prev_macd <= self.prev_signal:
+            crossover = 1
+        elif macd_line < signal_line and self.prev_macd >= self.prev_signal:
+            crossover = -1
+
+        self.prev_macd = macd_line
+        self.prev_signal = signal_line
+        return macd_line, signal_line, macd_line - signal_line, crossover
+
+
+class StreamingSuperTrend:
+    """SuperTrend, same ratcheting as Indicators.supertrend / supertrend_kernel"""
+
+    def __init__(self, period: int = 10, multiplier: float = 3.0):
+        self.multiplier = multiplier
+        self.atr = StreamingATR(period)
+        self.prev_close = None
+        self.prev_upper = NAN
+        self.prev_lower = NAN
+        self.prev_direction = 1
+
+    def update(self, high: float, low: float, close: float) -> Tuple[float, int]:
+        atr = self.atr.update(high, low, close)
+        hl_avg = (high + low) / 2
+        upper = hl_avg + (self.multiplier * atr)
+        lower = hl_avg - (self.multiplier * atr)
+
+        if self.prev_close is None:
+            # First bar: bands unadjusted, line 0.0, direction 1
+            supertrend, direction = 0.0, 1
+        else:
+            if self.prev_close <= self.prev_upper and self.prev_upper < upper:
+                upper = self.prev_upper
+            if self.prev_close >= self.prev_lower and self.prev_lower > lower:
+                lower = self.prev_lower
+
+            if close <= upper:
+                direction, supertrend = -1, upper
+            else:
+                direction, supertrend = 1, lower
+
+            if direction == 1 and self.prev_direction == -1:
+                supertrend = lower
+            elif direction == -1 and self.prev_direction == 1:
+                supertrend = upper
+
+        self.prev_close = close
+        self.prev_upper = upper
+        self.prev_lower = lower
+        self.prev_direction = direction
+        return supertrend, direction
+
+
+class StreamingCCI:
+    """
+    Commodity Channel Index, see Indicators.cci
+
+    The mean deviation needs the whole window, so each update is O(period);
+    it is reduced with the same NumPy summation as the batch rolling_mad.
+    """
+
+    def __init__(self, period: int = 20):
+        self.period = period
+        self.window = deque(maxlen=period)
+        self.sma = StreamingMean(period)
+
+    def update(self, high: float, low: float, close: float) -> float:
+        tp = (high + low + close) / 3
+        self.window.append(tp)
+        sma_tp = self.sma.update(tp)
+
+        if len(self.window) < self.period:
+            return NAN
+        x = np.fromiter(self.window, dtype=np.float64, count=self.period)
+        mad = np.abs(x - x.mean()).mean()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return float((tp - sma_tp) / np.float64(0.015 * mad))
+
+
+class StreamingZigZag:
+    """ZigZag trend with monotonic deques, see Indicators.zigzag / zigzag_kernel"""
+
+    def __init__(self, depth: int = 35):
+        self.depth = depth
+        self.i = -1
+        self.max_q = deque()  # (index, high), highs decreasing
+        self.min_q = deque()  # (index, low), lows increasing
+        self.last_pivot = None
+        self.last_pivot_type = None  # 'high' or 'low'
+        self.trend = 0
+
+    def update(self, high: float, low: float) -> int:
+        self.i += 1
+        i = self.i
+
+        if high == high:
+            while self.max_q and self.max_q[-1][1] <= high:
+                self.max_q.pop()
+            self.max_q.append((i, high))
+        if low == low:
+            while self.min_q and self.min_q[-1][1] >= low:
+                self.min_q.pop()
+            self.min_q.append((i, low))
+
+        start = i - self.depth
+        while self.max_q and self.max_q[0][0] < start:
+            self.max_q.popleft()
+        while self.min_q and self.min_q[0][0] < start:
+            self.min_q.popleft()
+
+        if i < self.depth:
+            return 0
+
+        swing_high = self.max_q[0][1] if self.max_q else NAN
+        swing_low = self.min_q[0][1] if self.min_q else NAN
+
+        if high == swing_high:
+            if self.last_pivot_type == 'low' or self.last_pivot is None:
+                if self.last_pivot is None or high > self.last_pivot:
+                    self.last_pivot = high
+                    self.last_pivot_type = 'high'
+                    self.trend = -1
+
+        elif low == swing_low:
+            if self.last_pivot_type == 'high' or self.last_pivot is None:
+                if self.last_pivot is None or low < self.last_pivot:
+                    self.last_pivot = low
+                    self.last_pivot_type = 'low'
+                    self.trend = 1
+
+        return self.trend
+
+
+class StreamingIndicatorSet:
+    """
+    Indicators of Indicators.calculate_all_indicators, updated per bar
+
+    Takes the same parameters as calculate_all_indicators, including
+    `columns`: only the indicators those columns need (resolved with
+    Indicators.resolve_indicators) keep state and run per bar. update(bar)
+    accepts any mapping with open/high/low/close (dict, DataFrame row, ...)
+    and returns the selected indicators' columns under the same names.
+    """
+
+    # Output columns of the full set, in the order update() returns them
+    COLUMNS = tuple(col for cols in Indicators.INDICATOR_COLUMNS.values() for col in cols)
+
+    def __init__(
+        self,
+        zigzag_depth: int = 35,
+        keltner_params: dict = None,
+        bollinger_params: dict = None,
+        rsi_period: int = 14,
+        macd_params: dict = None,
+        supertrend_params: dict = None,
+        cci_period: int = 20,
+        columns: Optional[Iterable[str]] = None
+    ):
+        keltner_params = keltner_params or {
+            'ma_period': 20, 'atr_period': 10, 'atr_multiple': 0.5, 'ma_method': 1, 'ma_price': 4
+        }
+        bollinger_params = bollinger_params or {'length': 34, 'deviation': 1.0}
+        macd_params = macd_params or {'fast_period': 12, 'slow_period': 26, 'signal_period': 9}
+        supertrend_params = supertrend_params or {'period': 10, 'multiplier': 3.0}
+        bb_params_filtered = {k: v for k, v in bollinger_params.items() if k in ['length', 'deviation']}
+
+        self.needed = Indicators.resolve_indicators(columns)
+        self.columns = [col for name in self.needed for col in Indicators.INDICATOR_COLUMNS[name]]
+        needed = set(self.needed)
+
+        # Unused indicators keep no state (None)
+        self.zigzag = StreamingZigZag(zigzag_depth) if 'zigzag' in needed else None
+        self.keltner = StreamingKeltner(**keltner_params) if 'keltner' in needed else None
+        self.bollinger = StreamingBollinger(**bb_params_filtered) if 'bollinger' in needed else None
+        self.rsi = StreamingRSI(rsi_period) if 'rsi' in needed else None
+        self.macd = StreamingMACD(**macd_params) if 'macd' in needed else None
+        self.supertrend = StreamingSuperTrend(**supertrend_params) if 'supertrend' in needed else None
+        self.cci = StreamingCCI(cci_period) if 'cci' in needed else None
+        self.atr = StreamingATR(14) if 'atr' in needed else None
+        self._rsi_crossover = 'rsi_crossover' in needed
+        self._macd_crossover = 'macd_crossover' in needed
+
+        self.bars_seen = 0
+        self.last_values: Optional[Dict[str, float]] = None
+
+    def update(self, bar: Mapping) -> Dict[str, float]:
+        """Consume one closed bar, return the selected indicator values"""
+        high, low, close = bar['high'], bar['low'], bar['close']
+        values = {}
+
+        if self.zigzag is not None:
+            values['zigzag'] = self.zigzag.update(high, low)
+        if self.keltner is not None:
+            values['kc_mid'], values['kc_upper'], values['kc_lower'] = self.keltner.update(bar)
+        if self.bollinger is not None:
+            values['bb_mid'], values['bb_upper'], values['bb_lower'] = self.bollinger.update(close)
+        if self.rsi is not None:
+            values['rsi'], rsi_crossover = self.rsi.update(close)
+            if self._rsi_crossover:
+                values['rsi_crossover'] = rsi_crossover
+        if self.macd is not None:
+            values['macd'], values['macd_signal'], values['macd_histogram'], macd_crossover = \
+                self.macd.update(close)
+            if self._macd_crossover:
+                values['macd_crossover'] = macd_crossover
+        if self.supertrend is not None:
+            values['supertrend'], values['supertrend_direction'] = self.supertrend.update(high, low, close)
+        if self.cci is not None:
+            values['cci'] = self.cci.update(high, low, close)
+        if self.atr is not None:
+            values['atr'] = self.atr.update(high, low, close)
+
+        self.bars_seen += 1
+        self.last_values = values
+        return values
+
+    def update_frame(self, data: pd.DataFrame) -> pd.DataFrame:
+        """
+        Feed every bar of a frame (e.g. to warm up from history)
+        Returns: the input frame with indicator columns appended
+        """
+        rows = [self.update(bar) for bar in data[['open', 'high', 'low', 'close']].to_dict('records')]
+        indicators = pd.DataFrame(rows, index=data.index)
+        return pd.concat([data.drop(columns=data.columns.intersection(indicators.columns)), indicators], axis=1)
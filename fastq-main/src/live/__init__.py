@@ -0,0 +1,7 @@
+from .bar_feed import LiveBarFeed, indicator_params
+from .mock_mt5 import MockMT5, mock_symbols
+from .runtime import LiveRuntime
+from .scheduler import BarCloseScheduler, LatencyStats, TIMEFRAME_SECONDS, timeframe_seconds
+
+__all__ = ['BarCloseScheduler', 'LatencyStats', 'TIMEFRAME_SECONDS', 'timeframe_seconds',
+           'LiveBarFeed', 'indicator_params', 'LiveRuntime', 'MockMT5', 'mock_symbols']
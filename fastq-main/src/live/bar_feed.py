@@ -0,0 +1,184 @@
+"""
+增量K线数据 Incremental Live Bar Feed
+
+原来每分钟每个品种请求 bars=200 根 1m 和 5m K线并全量重算指标, 只为了得到
+一根新K线. LiveBarFeed 为每个 (品种, 周期) 保存最近 bars 根已收盘K线和
+StreamingIndicatorSet 的状态:
+- 只请求上次之后的新K线: copy_rates_from_pos(..., 0, count), count 按距上次
+  请求的时间估算, 并多取一根已知K线作为锚点 (正在形成的K线丢弃)
+- 返回结果里没有锚点 (断线重连, 休市后间隔过长) 时回补: 重新取 warmup 根
+  历史并重建指标状态
+- 指标逐根K线增量更新 (与 Indicators.calculate_all_indicators 相同的列名),
+  只计算 columns 需要的指标
+- 窗口存放在 BarRingBuffer 里: 追加新K线不分配内存, 交给策略的是不复制的视图
+每个周期的传输和计算量是 O(新K线数).
+"""
+
+import math
+import time
+from typing import Callable, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from loguru import logger
+
+from ..indicators.streaming import StreamingIndicatorSet
+from ..market.ring_buffer import OHLCV_COLUMNS, BarRingBuffer
+from .scheduler import timeframe_seconds
+
+
+# MetaTrader5 周期常量名 Names of the MetaTrader5 timeframe constants
+MT5_TIMEFRAMES = {
+    '1m': 'TIMEFRAME_M1', '5m': 'TIMEFRAME_M5', '15m': 'TIMEFRAME_M15', '30m': 'TIMEFRAME_M30',
+    '1h': 'TIMEFRAME_H1', '4h': 'TIMEFRAME_H4', '1d': 'TIMEFRAME_D1',
+}
+
+
+def indicator_params(config: dict, timeframe: str) -> dict:
+    """实盘各周期的指标参数 Indicator parameters for the 1m entry / 5m confirmation frames"""
+    strategy_config = config['strategy']
+    if timeframe == '5m':
+        return {
+            'zigzag_depth': strategy_config['zigzag']['depth_5m'],
+            'cci_period': strategy_config['cci']['period'],
+            'macd_params': strategy_config['macd'],
+        }
+    return {
+        'zigzag_depth': strategy_config['zigzag']['depth_1m'],
+        'keltner_params': strategy_config['keltner'],
+        'bollinger_params': strategy_config['bollinger'],
+        'rsi_period': strategy_config['rsi']['period'],
+        'macd_params': strategy_config['macd'],
+        'supertrend_params': strategy_config['supertrend'],
+        'cci_period': strategy_config['cci']['period'],
+    }
+
+
+class _SeriesState:
+    """一个 (品种, 周期) 的状态 Window, indicator state and last-seen bar of one series"""
+
+    def __init__(self, indicators: StreamingIndicatorSet, buffer: BarRingBuffer):
+        self.indicators = indicators
+        self.buffer = buffer
+        self.last_time = None    # 最新已收盘K线的开盘时间 (epoch 秒, 终端时间)
+        self.last_fetch = 0.0    # 上次请求的本地时间 (epoch 秒)
+
+
+class LiveBarFeed:
+    """
+    增量K线和指标 Incremental closed bars with streaming indicators
+
+    用法 Usage:
+        feed = LiveBarFeed(mt5, params={'1m': {...}, '5m': {...}},
+                           columns={'1m': REQUIRED_COLUMNS_1M, '5m': REQUIRED_COLUMNS_5M})
+        data_1m, new_bars = feed.update('XAUUSD', '1m')   # new_bars == 0: 没有新收盘的K线
+    """
+
+    def __init__(self, mt5_api, bars: int = 200, warmup: int = 500,
+                 params: Optional[Dict[str, dict]] = None,
+                 columns: Optional[Dict[str, Sequence[str]]] = None,
+                 clock: Callable[[], float] = time.time):
+        """
+        Args:
+            mt5_api: MetaTrader5 模块或 MockMT5
+            bars: 交给策略的窗口长度
+            warmup: 首次加载 / 回补时取的历史K线数 (让 EMA 等递推指标收敛)
+            params: 每个周期的 StreamingIndicatorSet 参数 (见 indicator_params)
+            columns: 每个周期保留的指标列 (None = 全部); 窗口只保留这些列都非 NaN 的K线
+                窗口是缓冲区的只读视图, 在之后 bars 根新K线内不变
+            clock: 本地时钟, 用来估算新K线数
+        """
+        self.mt5 = mt5_api
+        self.bars = bars
+        self.warmup = max(warmup, bars)
+        self.params = params or {}
+        self.columns = {timeframe: list(cols) for timeframe, cols in (columns or {}).items()}
+        self.clock = clock
+        self.rows_fetched = 0  # 累计传输的K线数 Bars transferred from the terminal
+        self.backfills = 0
+        self._series: Dict[Tuple[str, str], _SeriesState] = {}
+
+    def _copy_rates(self, symbol: str, timeframe: str, count: int) -> np.ndarray:
+        """最近 count 根K线 (最后一根正在形成) Latest bars from the terminal"""
+        rates = self.mt5.copy_rates_from_pos(symbol, getattr(self.mt5, MT5_TIMEFRAMES[timeframe]), 0, count)
+        if rates is None:
+            raise ConnectionError(f"copy_rates_from_pos failed for {symbol} {timeframe}: {self.mt5.last_error()}")
+        self.rows_fetched += len(rates)
+        return rates
+
+    def update(self, symbol: str, timeframe: str = '1m') -> Tuple[pd.DataFrame, int]:
+        """
+        获取新收盘的K线 Pull bars closed since the last call and update the indicators
+
+        Returns:
+            (window, new_bars): 最近 bars 根已收盘K线 (OHLCV + 指标列), 和本次新增的K线数
+        """
+        key = (symbol, timeframe)
+        state = self._series.get(key)
+        if state is None:
+            return self._backfill(symbol, timeframe)
+
+        # 距上次请求经过的K线数 + 锚点 + 正在形成的K线
+        elapsed = self.clock() - state.last_fetch
+        count = min(math.ceil(max(elapsed, 0.0) / timeframe_seconds(timeframe)) + 2, self.bars + 1)
+        rates = self._copy_rates(symbol, timeframe, count)
+        state.last_fetch = self.clock()
+        closed = rates[:-1]
+        if len(closed) == 0 or closed['time'][-1] <= state.last_time:
+            return self._window(state, timeframe), 0
+
+        if closed['time'][0] > state.last_time:
+            # 锚点不在结果里: 中间缺K线 Gap since the last-seen bar
+            logger.warning(f"Gap in {symbol} {timeframe} bars, backfilling {self.warmup} bars")
+            return self._backfill(symbol, timeframe)
+
+        new = closed[closed['time'] > state.last_time]
+        self._append(state, new)
+        return self._window(state, timeframe), len(new)
+
+    def window(self, symbol: str, timeframe: str = '1m') -> Optional[pd.DataFrame]:
+        """当前窗口 (不请求终端) Current window without fetching"""
+        state = self._series.get((symbol, timeframe))
+        return self._window(state, timeframe) if state is not None else None
+
+    def reset(self, symbol: Optional[str] = None):
+        """丢弃状态, 下次 update 重新加载 Drop cached series (all, or one symbol's)"""
+        for key in [key for key in self._series if symbol is None or key[0] == symbol]:
+            del self._series[key]
+
+    def _backfill(self, symbol: str, timeframe: str) -> Tuple[pd.DataFrame, int]:
+        """加载 warmup 根历史并重建指标 Reload history and rebuild the indicator state"""
+        keep = self.columns.get(timeframe)
+        # 只为需要的列维护指标状态 Only the indicators behind `keep` run per bar
+        indicators = StreamingIndicatorSet(**self.params.get(timeframe, {}), columns=keep)
+        # 两倍窗口长度: 交出去的视图在之后 bars 次 append 内不被覆盖
+        state = _SeriesState(indicators, BarRingBuffer(2 * self.bars, OHLCV_COLUMNS + (keep or indicators.columns)))
+        rates = self._copy_rates(symbol, timeframe, self.warmup + 1)
+        state.last_fetch = self.clock()
+        self.backfills += 1
+        self._series[(symbol, timeframe)] = state
+
+        closed = rates[:-1]
+        if len(closed) == 0:
+            del self._series[(symbol, timeframe)]
+            return pd.DataFrame(columns=OHLCV_COLUMNS + self.columns.get(timeframe, [])), 0
+        self._append(state, closed)
+        return self._window(state, timeframe), len(closed)
+
+    def _append(self, state: _SeriesState, rates: np.ndarray):
+        """逐根更新指标并写入缓冲区 Feed new bars to the indicators and append them"""
+        keep = state.buffer.columns[len(OHLCV_COLUMNS):]
+        times = rates['time'].astype(np.int64) * 1_000_000_000
+        volume = rates['tick_volume'].astype(np.float64)
+        for k, (open_, high, low, close) in enumerate(zip(rates['open'].tolist(), rates['high'].tolist(),
+                                                        rates['low'].tolist(), rates['close'].tolist())):
+            values = state.indicators.update({'open': open_, 'high': high, 'low': low, 'close': close})
+            state.buffer.append(times[k], [open_, high, low, close, volume[k]] + [values[name] for name in keep])
+        state.last_time = int(rates['time'][-1])
+
+    def _window(self, state: _SeriesState, timeframe: str) -> pd.DataFrame:
+        """交给策略的窗口 (去掉指标未就绪的K线) Window handed to the strategy"""
+        keep = self.columns.get(timeframe)
+        frame = state.buffer.frame(self.bars)
+        # 预热完成后窗口里没有 NaN, 直接返回视图 No copy once the indicators are warm
+        return frame.dropna(subset=keep) if keep and state.buffer.has_nan(keep, self.bars) else frame
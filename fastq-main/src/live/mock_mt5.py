@@ -0,0 +1,245 @@
+"""
+MT5 模拟终端 Local MetaTrader5 Stand-in
+
+实现 MT4Connector 和实盘数据获取用到的 MetaTrader5 API 子集, 用于在没有终端
+(Linux / macOS / CI) 时对实盘运行时做压力测试:
+- 每个品种一条确定性的随机游走 1 分钟K线, 时间由 now 决定 (advance() 推进)
+- 每次调用 sleep latency 秒, 模拟终端 IPC 的阻塞耗时 (释放 GIL, 与真实调用相同)
+- order_send 立即按当前价成交, positions_get 返回模拟持仓
+线程安全: 多个执行器线程可以同时调用.
+
+用法 Usage:
+    mt5 = MockMT5([f'SYM{i:02d}' for i in range(50)], latency=0.01)
+    connector = MT4Connector(config, mt5_api=mt5)
+    feed = LiveBarFeed(mt5)
+"""
+
+import threading
+import time
+import zlib
+from collections import namedtuple
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+
+AccountInfo = namedtuple('AccountInfo', 'login balance equity margin margin_free margin_level profit')
+SymbolInfo = namedtuple('SymbolInfo', 'name visible digits point trade_contract_size volume_min volume_max '
+                                       'volume_step trade_stops_level')
+Tick = namedtuple('Tick', 'time time_msc bid ask last volume')
+OrderResult = namedtuple('OrderResult', 'retcode order deal volume price comment')
+MockPosition = namedtuple('MockPosition', 'ticket symbol type volume price_open price_current sl tp profit magic time')
+
+# copy_rates_* 返回的结构 Layout of copy_rates_* results (same fields as MetaTrader5)
+RATES_DTYPE = np.dtype([
+    ('time', np.int64), ('open', np.float64), ('high', np.float64), ('low', np.float64),
+    ('close', np.float64), ('tick_volume', np.uint64), ('spread', np.int32), ('real_volume', np.uint64),
+])
+
+
+class MockMT5:
+    """
+    MetaTrader5 模块的本地替身 In-process MetaTrader5 stand-in
+
+    Args:
+        symbols: 品种列表
+        latency: 每次 API 调用的阻塞秒数
+        now: 当前时间 (UTC, 默认为现在); 之后只随 advance() 变化
+        history: 每个品种预先生成的 1 分钟K线数
+        balance: 账户初始余额
+        seed: 随机种子 (同一品种同一种子的价格序列相同)
+    """
+
+    # MetaTrader5 常量 (与官方取值相同) Constants, same values as MetaTrader5
+    TIMEFRAME_M1, TIMEFRAME_M5, TIMEFRAME_M15, TIMEFRAME_M30 = 1, 5, 15, 30
+    TIMEFRAME_H1, TIMEFRAME_H4, TIMEFRAME_D1 = 16385, 16388, 16408
+    ORDER_TYPE_BUY, ORDER_TYPE_SELL = 0, 1
+    TRADE_ACTION_DEAL, TRADE_ACTION_SLTP = 1, 6
+    ORDER_TIME_GTC, ORDER_FILLING_IOC = 0, 1
+    TRADE_RETCODE_DONE, TRADE_RETCODE_INVALID = 10009, 10013
+
+    _MINUTES = {1: 1, 5: 5, 15: 15, 30: 30, 16385: 60, 16388: 240, 16408: 1440}
+
+    def __init__(self, symbols: Sequence[str], latency: float = 0.005, now: Optional[pd.Timestamp] = None,
+                 history: int = 2000, balance: float = 10000.0, seed: int = 0):
+        self.latency = latency
+        now = pd.Timestamp.now('UTC') if now is None else pd.Timestamp(now)
+        self.now = now.tz_convert('UTC').tz_localize(None) if now.tzinfo is not None else now
+        self.balance = balance
+        self.seed = seed
+        self.calls = 0
+        self._lock = threading.Lock()
+        self._positions: Dict[int, MockPosition] = {}
+        self._next_ticket = 1
+        self._error = (1, 'Success')
+
+        # 1 分钟K线: 开盘时间 (epoch 秒) 和 OHLC Per-symbol 1m bars
+        self._start = (int(self.now.timestamp()) // 60 - history) * 60
+        self._bars: Dict[str, np.ndarray] = {}
+        self._rng: Dict[str, np.random.Generator] = {}
+        for symbol in symbols:
+            self._rng[symbol] = np.random.default_rng([seed, zlib.crc32(symbol.encode())])
+            self._bars[symbol] = np.empty((0, 4))
+        self._extend()
+
+    # 模拟时钟 Simulated clock
+
+    def advance(self, seconds: float = 60.0):
+        """推进模拟时间 Move the simulated clock forward"""
+        with self._lock:
+            self.now += pd.Timedelta(seconds=seconds)
+            self._extend()
+
+    def _extend(self):
+        """生成到 now 为止的K线 (含正在形成的K线) Generate bars up to the current minute"""
+        n = int(self.now.timestamp()) // 60 - self._start // 60 + 1
+        for symbol, bars in self._bars.items():
+            missing = n - len(bars)
+            if missing <= 0:
+                continue
+            rng = self._rng[symbol]
+            last = bars[-1, 3] if len(bars) else 100.0 + 50.0 * (zlib.crc32(symbol.encode()) % 40)
+            close = last * np.exp(np.cumsum(rng.normal(0, 2e-4, missing)))
+            open_ = np.r_[last, close[:-1]]
+            wick = np.abs(rng.normal(0, 1e-4, (missing, 2))) * close[:, None]
+            new = np.column_stack([open_, np.maximum(open_, close) + wick[:, 0],
+                                   np.minimum(open_, close) - wick[:, 1], close])
+            self._bars[symbol] = np.vstack([bars, new])
+
+    def _call(self):
+        """模拟阻塞的终端调用 Simulate the blocking terminal round-trip"""
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            self.calls += 1
+
+    # 连接 Connection
+
+    def initialize(self, *args, **kwargs) -> bool:
+        self._call()
+        return True
+
+    def login(self, login=None, password=None, server=None) -> bool:
+        self._call()
+        return True
+
+    def shutdown(self):
+        pass
+
+    def last_error(self):
+        return self._error
+
+    def account_info(self) -> AccountInfo:
+        self._call()
+        with self._lock:
+            profit = sum(self._profit(position) for position in self._positions.values())
+        equity = self.balance + profit
+        return AccountInfo(1000001, self.balance, equity, 0.0, equity, 0.0, profit)
+
+    # 行情 Market data
+
+    def symbol_info(self, symbol: str) -> Optional[SymbolInfo]:
+        self._call()
+        if symbol not in self._bars:
+            self._error = (-1, f'Unknown symbol {symbol}')
+            return None
+        contract_size = 100 if 'XAU' in symbol else 100000  # 与策略的合约乘数相同
+        return SymbolInfo(symbol, True, 5, 1e-5, contract_size, 0.01, 100.0, 0.01, 10)
+
+    def symbol_select(self, symbol: str, enable: bool = True) -> bool:
+        self._call()
+        return symbol in self._bars
+
+    def _price(self, symbol: str) -> float:
+        return float(self._bars[symbol][-1, 3])
+
+    def symbol_info_tick(self, symbol: str) -> Optional[Tick]:
+        self._call()
+        if symbol not in self._bars:
+            return None
+        with self._lock:
+            bid = self._price(symbol)
+        spread = bid * 2e-5
+        seconds = int(self.now.timestamp())
+        return Tick(seconds, seconds * 1000, bid, bid + spread, bid, 1)
+
+    def copy_rates_from_pos(self, symbol: str, timeframe: int, start_pos: int, count: int) -> Optional[np.ndarray]:
+        """最近的K线 (最后一根是正在形成的K线, 与 MT5 相同) Latest bars, oldest first"""
+        self._call()
+        if symbol not in self._bars or timeframe not in self._MINUTES:
+            self._error = (-2, 'Invalid params')
+            return None
+        minutes = self._MINUTES[timeframe]
+        with self._lock:
+            bars = self._bars[symbol]
+        # 只聚合需要的尾部 Only aggregate the tail that can be returned
+        first = max(len(bars) - (count + start_pos + 1) * minutes, 0)
+        times = self._start + 60 * np.arange(first, len(bars), dtype=np.int64)
+        bars = bars[first:]
+        bucket = times // (60 * minutes)
+        starts = np.flatnonzero(np.diff(bucket, prepend=bucket[0] - 1))
+
+        rates = np.zeros(len(starts), dtype=RATES_DTYPE)
+        rates['time'] = bucket[starts] * 60 * minutes
+        rates['open'] = bars[starts, 0]
+        rates['high'] = np.maximum.reduceat(bars[:, 1], starts)
+        rates['low'] = np.minimum.reduceat(bars[:, 2], starts)
+        rates['close'] = bars[np.append(starts[1:], len(bars)) - 1, 3]
+        rates['tick_volume'] = np.diff(np.append(starts, len(bars))) * 60
+
+        end = len(rates) - start_pos
+        return rates[max(end - count, 0):max(end, 0)]
+
+    # 交易 Trading
+
+    def _profit(self, position: MockPosition) -> float:
+        price = self._price(position.symbol)
+        sign = 1 if position.type == self.ORDER_TYPE_BUY else -1
+        multiplier = 100 if 'XAU' in position.symbol else 100000  # 与策略的合约乘数相同
+        return sign * (price - position.price_open) * position.volume * multiplier
+
+    def order_send(self, request: dict) -> OrderResult:
+        self._call()
+        with self._lock:
+            symbol = request.get('symbol')
+            if symbol not in self._bars:
+                return OrderResult(self.TRADE_RETCODE_INVALID, 0, 0, 0.0, 0.0, f'Unknown symbol {symbol}')
+
+            ticket = request.get('position')
+            if request['action'] == self.TRADE_ACTION_SLTP:
+                position = self._positions.get(ticket)
+                if position is None:
+                    return OrderResult(self.TRADE_RETCODE_INVALID, 0, 0, 0.0, 0.0, 'Position not found')
+                self._positions[ticket] = position._replace(sl=request.get('sl', position.sl),
+                                                            tp=request.get('tp', position.tp))
+                return OrderResult(self.TRADE_RETCODE_DONE, ticket, 0, position.volume, 0.0, 'Done')
+
+            price = self._price(symbol)
+            if ticket:  # 平仓 Close
+                position = self._positions.pop(ticket, None)
+                if position is None:
+                    return OrderResult(self.TRADE_RETCODE_INVALID, 0, 0, 0.0, 0.0, 'Position not found')
+                self.balance += self._profit(position)
+                return OrderResult(self.TRADE_RETCODE_DONE, ticket, ticket, position.volume, price, 'Done')
+
+            ticket = self._next_ticket
+            self._next_ticket += 1
+            self._positions[ticket] = MockPosition(
+                ticket, symbol, request['type'], request['volume'], price, price,
+                request.get('sl', 0.0), request.get('tp', 0.0), 0.0, request.get('magic', 0),
+                int(self.now.timestamp()))
+            return OrderResult(self.TRADE_RETCODE_DONE, ticket, ticket, request['volume'], price, 'Done')
+
+    def positions_get(self, symbol: Optional[str] = None, ticket: Optional[int] = None) -> tuple:
+        self._call()
+        with self._lock:
+            positions = list(self._positions.values())
+            positions = [p._replace(price_current=self._price(p.symbol), profit=self._profit(p)) for p in positions
+                         if (symbol is None or p.symbol == symbol) and (ticket is None or p.ticket == ticket)]
+        return tuple(positions)
+
+
+def mock_symbols(count: int) -> List[str]:
+    """合成品种名 Synthetic symbol names SYM000, SYM001, ..."""
+    return [f'SYM{i:03d}' for i in range(count)]
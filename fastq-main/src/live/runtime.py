@@ -0,0 +1,184 @@
+"""
+异步实盘运行时 Asyncio Live Trading Runtime
+
+每根K线收盘后, 每个品种并发运行自己的流水线:
+    新K线和指标 (LiveBarFeed) → 出场/信号 → 下单
+- 阻塞的 MT5 调用 (取K线, 查持仓, order_send) 和指标更新放到有界线程池里,
+  事件循环在等待一个品种时继续推进其他品种
+- 策略对象 (持仓, 当日盈亏, 风险账本) 所有品种共享, 只在 state_lock 下读写;
+  下单等阻塞调用不持有锁
+原来逐个品种串行处理, 品种一多一个周期就超过一分钟.
+
+用法 Usage:
+    runtime = LiveRuntime(config, bar_feed, connector, max_workers=16)
+    await runtime.run_cycle(bar_close)     # 每根K线收盘调用一次
+"""
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Dict, List, Optional
+
+import pandas as pd
+from loguru import logger
+
+from ..market.alignment import completed_bars
+from ..strategy.hybrid_optimized_strategy import HybridOptimizedStrategy
+from .scheduler import LatencyStats
+
+
+class LiveRuntime:
+    """
+    按品种并发的实盘流水线 Per-symbol concurrent live pipelines
+
+    bar_feed: LiveBarFeed (update(symbol, timeframe) -> (window with indicators, new_bars))
+    connector: MT4Connector 接口 (invalidate_snapshot / get_open_positions / open_position /
+               close_position / modify_position)
+    """
+
+    def __init__(self, config: dict, bar_feed, connector, max_workers: int = 8,
+                 strategy: Optional[HybridOptimizedStrategy] = None):
+        """
+        Args:
+            config: 完整配置 (trading / strategy / risk)
+            max_workers: 阻塞调用线程数 (同时进行的 MT5 调用上限)
+            strategy: 共享策略 (None 时在第一批数据到达时创建)
+        """
+        self.config = config
+        self.symbols: List[str] = list(config['trading']['symbols'])
+        self.position_sizes: Dict[str, float] = config['trading']['position_sizes']
+        self.bar_feed = bar_feed
+        self.connector = connector
+        self.strategy = strategy
+
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='mt5')
+        self.state_lock = asyncio.Lock()  # 保护 strategy 的共享状态 Guards shared strategy state
+        self.order_latency = LatencyStats()  # K线收盘 → 下单 Bar close to order sent
+        self.cycle_latency = LatencyStats()  # K线收盘 → 周期处理完成 Bar close to cycle done
+
+    async def _blocking(self, func, *args, **kwargs):
+        """在线程池中运行阻塞调用 Run a blocking call on the bounded executor"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, partial(func, *args, **kwargs))
+
+    async def run_cycle(self, bar_close: float) -> Dict[str, Optional[BaseException]]:
+        """
+        处理一根K线收盘 Run every symbol's pipeline for one bar close
+
+        Args:
+            bar_close: K线收盘时间 (epoch 秒), 用于延迟统计
+
+        Returns:
+            {symbol: 异常或 None}; 一个品种失败不影响其他品种
+        """
+        # 每个周期读一次持仓/账户快照, 所有品种共用 One positions/account read per cycle
+        self.connector.invalidate_snapshot()
+        results = await asyncio.gather(
+            *(self.process_symbol(symbol, bar_close) for symbol in self.symbols), return_exceptions=True
+        )
+        errors = {}
+        for symbol, result in zip(self.symbols, results):
+            errors[symbol] = result if isinstance(result, BaseException) else None
+            if errors[symbol] is not None:
+                logger.error(f"Error processing {symbol}: {result}")
+        self.cycle_latency.record(time.time() - bar_close)
+        return errors
+
+    async def process_symbol(self, symbol: str, bar_close: float):
+        """单个品种的流水线 New bars + indicators → exits/signal → orders for one symbol"""
+        # 新收盘的K线和增量指标 Newly closed bars with streaming indicators
+        data_1m, new_bars = await self._blocking(self.bar_feed.update, symbol, '1m')
+
+        # 只处理有新K线的品种 (休市/无报价时跳过) Skip symbols without a new bar
+        if new_bars == 0 or data_1m.empty:
+            return
+
+        data_5m, _ = await self._blocking(self.bar_feed.update, symbol, '5m')
+        if data_5m.empty:
+            logger.warning(f"No 5m data for {symbol}")
+            return
+
+        async with self.state_lock:
+            # 初始化策略 (首次) Initialize strategy (first time)
+            if self.strategy is None:
+                self.strategy = HybridOptimizedStrategy(
+                    config=self.config,
+                    data_1m={symbol: data_1m},
+                    data_5m={symbol: data_5m}
+                )
+
+        # 只用最新1m K线收盘时已收盘的5m K线 (去掉正在形成的K线, 不复制)
+        data_5m_closed = completed_bars(data_5m, data_1m.index[-1] + pd.Timedelta(minutes=1), '5min')
+
+        # 管理现有仓位 Check existing positions
+        await self._manage_positions(symbol, data_1m, bar_close)
+
+        # 检查新信号 Check for new signals
+        if symbol not in self.strategy.positions:
+            await self._check_entry_signals(symbol, data_1m, data_5m_closed, bar_close)
+
+    async def _manage_positions(self, symbol: str, data: pd.DataFrame, bar_close: float):
+        """管理现有仓位 Manage Existing Positions"""
+        if symbol not in self.strategy.positions:
+            return
+
+        # 获取MT4持仓 (本周期的快照) Get MT4 positions from this cycle's snapshot
+        mt4_positions = await self._blocking(self.connector.get_open_positions, symbol=symbol)
+        mt4_pos = next((pos for pos in mt4_positions if pos['symbol'] == symbol), None)
+
+        async with self.state_lock:
+            strategy_pos = self.strategy.positions.get(symbol)
+            if strategy_pos is None:
+                return
+            # 检查出场条件 (同时更新追踪止损) Check exit conditions (also moves the trailing stop)
+            now = pd.Timestamp.now()
+            should_exit, exit_price, reason = self.strategy.check_exit(strategy_pos, data, now)
+            stop_loss = strategy_pos.stop_loss
+
+        if mt4_pos is None:
+            return
+
+        if should_exit:
+            # 平仓 Close position
+            if await self._blocking(self.connector.close_position, mt4_pos['ticket']):
+                self.order_latency.record(time.time() - bar_close)
+                async with self.state_lock:
+                    # 在策略中记录 Record in strategy
+                    self.strategy.close_position(strategy_pos, exit_price, now, reason)
+                logger.info(f"Position closed: {symbol} | Reason: {reason}")
+
+        # 更新追踪止损 Update trailing stop if needed
+        elif strategy_pos.trailing_active and mt4_pos['stop_loss'] != stop_loss:
+            await self._blocking(self.connector.modify_position, mt4_pos['ticket'], stop_loss=stop_loss)
+
+    async def _check_entry_signals(self, symbol: str, data_1m: pd.DataFrame, data_5m: pd.DataFrame,
+                                   bar_close: float):
+        """检查入场信号 Check for Entry Signals"""
+        async with self.state_lock:
+            # 生成信号 (含风险检查) Generate signal (runs the risk checks)
+            signal = self.strategy.generate_signals(data_1m, data_5m, symbol, pd.Timestamp.now())
+        if not signal:
+            return
+
+        # 在MT4开仓 Open position on MT4
+        ticket = await self._blocking(
+            self.connector.open_position,
+            symbol=symbol,
+            direction=signal.direction,
+            volume=self.position_sizes.get(symbol, 0.1),
+            stop_loss=signal.stop_loss,
+            take_profit=signal.take_profit[0],  # 使用第一个止盈位 Use first TP level
+            comment=f"HybridStrategy_{signal.direction}"
+        )
+
+        if ticket:
+            self.order_latency.record(time.time() - bar_close)
+            async with self.state_lock:
+                # 在策略中记录 Record in strategy
+                self.strategy.open_position(signal)
+            logger.info(f"Position opened: {symbol} {signal.direction} @ {signal.entry_price}")
+
+    def close(self):
+        """关闭线程池 Shut down the executor"""
+        self.executor.shutdown(wait=True)
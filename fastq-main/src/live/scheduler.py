@@ -0,0 +1,156 @@
+"""
+K线收盘调度 Bar-Close Scheduler
+
+实盘循环原来在每次处理后固定 time.sleep(60): 处理耗时会让循环逐渐偏离
+K线边界, 信号最多晚一分钟. BarCloseScheduler 按墙上时钟对齐, 在每根K线
+收盘 (周期整数倍, UTC) 后 offset 秒醒来; 逐笔数据源调用 notify_tick 时,
+第一笔属于新K线的逐笔一到就提前醒来 (上一根K线已收盘).
+LatencyStats 记录每个周期从K线收盘到下单 / 处理完成的延迟.
+"""
+
+import math
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, Optional
+
+import numpy as np
+from loguru import logger
+
+
+# 周期秒数 Seconds per timeframe
+TIMEFRAME_SECONDS = {
+    '1m': 60, '5m': 300, '15m': 900, '30m': 1800,
+    '1h': 3600, '4h': 14400, '1d': 86400,
+}
+
+
+def timeframe_seconds(timeframe: str) -> int:
+    """周期秒数 Seconds per bar of `timeframe` ('1m', '5m', ...)"""
+    try:
+        return TIMEFRAME_SECONDS[timeframe]
+    except KeyError:
+        raise ValueError(f"Unknown timeframe: {timeframe} (expected one of {list(TIMEFRAME_SECONDS)})")
+
+
+class LatencyStats:
+    """
+    延迟统计 Rolling latency samples (seconds)
+
+    保存最近 window 个样本, summary() 给出 last / mean / p95 / max
+    """
+
+    def __init__(self, window: int = 500):
+        self.samples = deque(maxlen=window)
+        self.count = 0
+
+    def record(self, seconds: float):
+        self.samples.append(seconds)
+        self.count += 1
+
+    @property
+    def last(self) -> Optional[float]:
+        return self.samples[-1] if self.samples else None
+
+    def summary(self) -> Dict[str, float]:
+        """最近样本的统计 Stats over the retained samples ({} when empty)"""
+        if not self.samples:
+            return {}
+        values = np.fromiter(self.samples, dtype=np.float64, count=len(self.samples))
+        return {
+            'last': float(values[-1]),
+            'mean': float(values.mean()),
+            'p95': float(np.percentile(values, 95)),
+            'max': float(values.max()),
+            'count': self.count,
+        }
+
+
+class BarCloseScheduler:
+    """
+    K线收盘调度器 Wakes once per bar close
+
+    用法 Usage:
+        scheduler = BarCloseScheduler('1m', offset=1.0)
+        while True:
+            bar_close = scheduler.wait()     # 刚收盘K线的收盘时间 (epoch 秒), stop() 后为 None
+            if bar_close is None:
+                break
+            process(bar_close)
+
+        # 逐笔线程 Tick feed thread (optional)
+        scheduler.notify_tick(tick_time)     # 新K线的第一笔到达时提前唤醒
+    """
+
+    def __init__(self, timeframe: str = '1m', offset: float = 1.0,
+                 clock: Callable[[], float] = time.time):
+        """
+        Args:
+            timeframe: K线周期
+            offset: 收盘后等待的秒数 (给经纪商完成K线的时间); 逐笔唤醒不等待
+            clock: 时钟 (epoch 秒), 测试时可替换
+        """
+        self.timeframe = timeframe
+        self.period = timeframe_seconds(timeframe)
+        self.offset = offset
+        self.clock = clock
+        self.last_close: Optional[float] = None  # 上次返回的K线收盘时间
+        self.skipped = 0                          # 因处理超时跳过的K线数
+        self._wake = threading.Event()
+        self._tick_close = -math.inf              # 逐笔表明已收盘的最新收盘时间
+        self._stopped = False
+
+    def bar_close(self, now: float) -> float:
+        """now 时最近一根已收盘K线的收盘时间 Latest bar close at or before `now`"""
+        return math.floor(now / self.period) * self.period
+
+    def next_close(self) -> float:
+        """下一次要等待的K线收盘时间 The bar close the next wait() returns"""
+        if self.last_close is None:
+            return self.bar_close(self.clock()) + self.period
+        return self.last_close + self.period
+
+    def notify_tick(self, tick_time: float):
+        """
+        逐笔通知 Tick notification (thread-safe)
+
+        tick_time: 逐笔时间 (epoch 秒); 落在下一根K线里说明当前K线已收盘
+        """
+        close = self.bar_close(tick_time)
+        if close > self._tick_close:
+            self._tick_close = close
+            if close >= self.next_close():
+                self._wake.set()
+
+    def stop(self):
+        """停止等待 Make the current and later wait() calls return None"""
+        self._stopped = True
+        self._wake.set()
+
+    def wait(self) -> Optional[float]:
+        """
+        等到下一根K线收盘 Block until the next bar close (+ offset, or an early tick)
+
+        Returns:
+            刚收盘K线的收盘时间 (epoch 秒); 处理慢于一个周期时返回最新的收盘时间
+            并跳过中间的K线; stop() 后返回 None
+        """
+        due = self.next_close()
+        while not self._stopped:
+            now = self.clock()
+            if now >= due + self.offset or self._tick_close >= due:
+                break
+            self._wake.wait(due + self.offset - now)
+            self._wake.clear()
+
+        if self._stopped:
+            return None
+
+        # 错过的K线 (处理或休眠超过一个周期) Bars missed while busy
+        latest = max(self.bar_close(self.clock() - self.offset), due)
+        if latest > due:
+            missed = int(round((latest - due) / self.period))
+            self.skipped += missed
+            logger.warning(f"Scheduler fell behind: skipped {missed} {self.timeframe} bar(s)")
+        self.last_close = latest
+        return latest
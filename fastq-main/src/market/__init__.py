@@ -0,0 +1,11 @@
+from .alignment import AlignedFrame, align_index, completed_bars, infer_period
+from .ring_buffer import OHLCV_COLUMNS, BarRingBuffer
+from .ticks import (
+    TICK_DTYPE, TickBarBuilder, aggregate_ticks, aggregate_tick_bars, aggregate_volume_bars,
+    load_ticks, read_tick_csv, save_ticks, tick_series, ticks_from_frame, ticks_from_mt5
+)
+
+__all__ = ['AlignedFrame', 'align_index', 'completed_bars', 'infer_period',
+           'OHLCV_COLUMNS', 'BarRingBuffer',
+           'TICK_DTYPE', 'TickBarBuilder', 'aggregate_ticks', 'aggregate_tick_bars', 'aggregate_volume_bars',
+           'load_ticks', 'read_tick_csv', 'save_ticks', 'tick_series', 'ticks_from_frame', 'ticks_from_mt5']
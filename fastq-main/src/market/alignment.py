@@ -0,0 +1,152 @@
+"""
+多周期对齐 Multi-Timeframe Alignment
+
+data_5m.reindex(data_1m.index, method='ffill') 会复制出一个 1m 长度的完整 5m 表,
+而且 1m K线 10:00 会看到 10:00 的 5m K线 - 那根要到 10:05 才收盘 (未来数据).
+
+这里只算一个 int64 位置数组: 每根快周期K线收盘时, 最近一根已经收盘的慢周期K线.
+K线按开盘时间标记, 收盘时间 = 开盘时间 + 周期, 所以
+    position[i] = searchsorted(slow_open + slow_period, fast_open[i] + fast_period, 'right') - 1
+-1 表示还没有收盘的慢周期K线 (取值为 NaN). AlignedFrame 通过这个位置数组按列
+读取慢周期数据, 不复制整个表.
+"""
+
+from typing import Dict, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+
+_UNITS = ('s', 'ms', 'us', 'ns')
+
+
+def infer_period(index: pd.DatetimeIndex) -> pd.Timedelta:
+    """K线周期 Bar period, the smallest gap between consecutive bars"""
+    if len(index) < 2:
+        raise ValueError("Cannot infer the bar period from fewer than 2 bars; pass it explicitly")
+    index = pd.DatetimeIndex(index)
+    gaps = np.diff(index.asi8)
+    return pd.Timedelta(int(gaps[gaps > 0].min()), unit=index.unit)
+
+
+def _close_times(index: pd.DatetimeIndex, period: Optional[Union[str, pd.Timedelta]], unit: str) -> np.ndarray:
+    """收盘时间 (unit 整数) Bar close times: open time + period"""
+    index = pd.DatetimeIndex(index)
+    period = pd.Timedelta(period) if period is not None else infer_period(index)
+    # pandas 可能推断出 's'/'us' 精度; 统一到两个索引中较细的精度 (相同时不转换)
+    return index.as_unit(unit).asi8 + period // pd.Timedelta(1, unit=unit)
+
+
+def _common_unit(*indexes: pd.DatetimeIndex) -> str:
+    """最细的时间精度 Finest resolution among the indexes"""
+    return max((pd.DatetimeIndex(index).unit for index in indexes), key=_UNITS.index)
+
+
+def align_index(
+    fast_index: pd.DatetimeIndex,
+    slow_index: pd.DatetimeIndex,
+    fast_period: Optional[Union[str, pd.Timedelta]] = None,
+    slow_period: Optional[Union[str, pd.Timedelta]] = None
+) -> np.ndarray:
+    """
+    对齐位置 Position of the latest closed slow bar at each fast bar's close
+
+    Args:
+        fast_index / slow_index: K线开盘时间 (升序, 时区一致)
+        fast_period / slow_period: 周期 ('1min', '5min', ...), None 时从索引推断
+
+    Returns:
+        int64 数组, 长度 len(fast_index); -1 表示此时还没有收盘的慢周期K线
+    """
+    fast_tz, slow_tz = pd.DatetimeIndex(fast_index).tz, pd.DatetimeIndex(slow_index).tz
+    if (fast_tz is None) != (slow_tz is None):
+        raise ValueError("Cannot align a timezone-aware index with a naive one")
+    if len(fast_index) == 0 or len(slow_index) == 0:
+        return np.full(len(fast_index), -1, dtype=np.int64)
+
+    unit = _common_unit(fast_index, slow_index)
+    fast_close = _close_times(fast_index, fast_period, unit)
+    slow_close = _close_times(slow_index, slow_period, unit)
+    return np.searchsorted(slow_close, fast_close, side='right').astype(np.int64) - 1
+
+
+def completed_bars(
+    slow: pd.DataFrame,
+    as_of: pd.Timestamp,
+    slow_period: Optional[Union[str, pd.Timedelta]] = None
+) -> pd.DataFrame:
+    """
+    已收盘的K线 Slow bars closed by `as_of` (a view, e.g. drops the forming live bar)
+
+    as_of: 决策时间, 通常是最新快周期K线的收盘时间
+    """
+    if len(slow) == 0:
+        return slow
+    unit = pd.DatetimeIndex(slow.index).unit
+    slow_close = _close_times(slow.index, slow_period, unit)
+    as_of = pd.Timestamp(as_of)
+    if as_of.tzinfo is not None and slow.index.tz is not None:
+        as_of = as_of.tz_convert(slow.index.tz)
+    count = int(np.searchsorted(slow_close, as_of.value // pd.Timedelta(1, unit=unit).value, side='right'))
+    return slow.iloc[:count]
+
+
+class AlignedFrame:
+    """
+    对齐视图 Slow-timeframe columns read through an alignment index
+
+    支持 'macd' in aligned.columns, aligned['macd'] (按快周期长度的 float64 数组),
+    len(aligned) 和 aligned.row(i); 列只在第一次读取时按位置取值并缓存.
+
+    用法 Usage:
+        aligned = AlignedFrame.align(data_1m, data_5m)
+        strategy.generate_signal_frame(data_1m, aligned)
+    """
+
+    def __init__(self, data: pd.DataFrame, positions: np.ndarray, index: Optional[pd.Index] = None):
+        """
+        Args:
+            data: 慢周期数据 (不复制)
+            positions: align_index 的结果
+            index: 快周期索引 (to_frame 用)
+        """
+        self.data = data
+        self.positions = positions
+        self.index = index
+        self._missing = positions < 0
+        self._cache: Dict[str, np.ndarray] = {}
+
+    @classmethod
+    def align(cls, fast: pd.DataFrame, slow: pd.DataFrame,
+              fast_period: Optional[Union[str, pd.Timedelta]] = None,
+              slow_period: Optional[Union[str, pd.Timedelta]] = None) -> 'AlignedFrame':
+        """按收盘时间对齐 Align `slow` to the bars of `fast` without look-ahead"""
+        positions = align_index(fast.index, slow.index, fast_period, slow_period)
+        return cls(slow, positions, fast.index)
+
+    @property
+    def columns(self) -> pd.Index:
+        return self.data.columns
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        """对齐后的列 (float64, 没有已收盘K线处为 NaN) Aligned column"""
+        values = self._cache.get(name)
+        if values is None:
+            source = self.data[name].to_numpy(dtype=np.float64)
+            values = source[np.where(self._missing, 0, self.positions)] if len(source) else \
+                np.full(len(self.positions), np.nan)
+            values[self._missing] = np.nan
+            self._cache[name] = values
+        return values
+
+    def row(self, i: int) -> Optional[pd.Series]:
+        """第 i 根快周期K线可见的慢周期K线 (None 表示还没有)"""
+        position = self.positions[i]
+        return None if position < 0 else self.data.iloc[position]
+
+    def to_frame(self) -> pd.DataFrame:
+        """物化为 DataFrame (调试用) Materialize, like reindex(method='ffill') without look-ahead"""
+        return pd.DataFrame({name: self[name] for name in self.columns}, index=self.index)
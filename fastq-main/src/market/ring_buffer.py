@@ -0,0 +1,166 @@
+"""
+K线环形缓冲区 Fixed-Capacity Ring Buffer for Rolling Bar Windows
+
+实盘每分钟为每个品种拼接新 DataFrame (pd.concat + iloc[-bars:] + dropna),
+只为了追加一根K线. BarRingBuffer 预分配 float64 列 (和 int64 时间戳),
+append 是 O(1) 的写入, 不再分配内存.
+
+双缓冲: 每个值同时写入位置 i 和 i + capacity, 所以最近 n 根K线 (n <= capacity)
+总是连续的 [head + capacity - n, head + capacity), 窗口是不复制的 numpy 视图,
+永远不会被环绕切开.
+
+frame(n) 把视图包装成 DataFrame (列名与 Indicators / StreamingIndicatorSet 相同,
+索引为 DatetimeIndex, 只读, 不复制). 视图共享缓冲区内存: 之后再 append
+capacity - n 次以内内容不变, 需要长期保存时请 copy().
+"""
+
+from typing import Mapping, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+
+OHLCV_COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+
+
+class BarRingBuffer:
+    """
+    预分配的滚动K线窗口 Preallocated rolling window of bars
+
+    用法 Usage:
+        buffer = BarRingBuffer(400, OHLCV_COLUMNS + ['macd', 'cci'])
+        buffer.append(bar_time, {'open': o, 'high': h, 'low': l, 'close': c, 'macd': m})  # 缺的列为 NaN
+        buffer['close']          # 最近 len(buffer) 根K线的收盘价 (视图)
+        buffer.frame(200)        # 最近 200 根K线的 DataFrame (视图)
+    """
+
+    def __init__(self, capacity: int, columns: Sequence[str] = OHLCV_COLUMNS):
+        """
+        Args:
+            capacity: 最多保留的K线数
+            columns: 列名 (float64)
+        """
+        if capacity <= 0:
+            raise ValueError(f"capacity must be positive, got {capacity}")
+        self.capacity = capacity
+        self.columns = pd.Index(list(columns))
+        if self.columns.has_duplicates:
+            raise ValueError(f"Duplicate columns: {list(self.columns[self.columns.duplicated()])}")
+        self._positions = {name: j for j, name in enumerate(self.columns)}
+        # 每列一行, 两倍容量 One row per column, twice the capacity
+        self._values = np.full((len(self.columns), 2 * capacity), np.nan)
+        self._times = np.zeros(2 * capacity, dtype=np.int64)  # K线开盘时间 (epoch 纳秒)
+        self._head = 0   # 下一次写入的位置 [0, capacity)
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._positions
+
+    @property
+    def last_time(self) -> Optional[pd.Timestamp]:
+        """最新K线的时间 Time of the newest bar (None when empty)"""
+        return pd.Timestamp(int(self._times[self._head + self.capacity - 1])) if self._size else None
+
+    def clear(self):
+        """清空 (不释放内存) Drop every bar"""
+        self._values.fill(np.nan)
+        self._head = 0
+        self._size = 0
+
+    def append(self, time: Union[pd.Timestamp, int], values: Union[Mapping[str, float], Sequence[float]]):
+        """
+        追加一根K线 Append one bar (O(1), no allocation)
+
+        Args:
+            time: K线开盘时间 (Timestamp 或 epoch 纳秒), 应递增
+            values: {列名: 值} (缺的列为 NaN, 未知列报错) 或按 columns 顺序的序列
+        """
+        i = self._head
+        j = i + self.capacity
+        self._times[i] = self._times[j] = time if isinstance(time, (int, np.integer)) else pd.Timestamp(time).value
+        if isinstance(values, Mapping):
+            self._values[:, i] = np.nan
+            for name, value in values.items():
+                self._values[self._positions[name], i] = value
+        else:
+            self._values[:, i] = values
+        self._values[:, j] = self._values[:, i]
+        self._head = (i + 1) % self.capacity
+        self._size = min(self._size + 1, self.capacity)
+
+    def extend(self, times: Union[pd.DatetimeIndex, np.ndarray], values: Mapping[str, np.ndarray]):
+        """
+        批量追加 Append many bars at once (e.g. history on start-up)
+
+        Args:
+            times: K线开盘时间 (DatetimeIndex 或 epoch 纳秒数组)
+            values: {列名: 数组}, 长度与 times 相同; 缺的列为 NaN
+        """
+        if isinstance(times, np.ndarray) and times.dtype.kind in 'iu':
+            times = times.astype(np.int64, copy=False)
+        else:
+            times = pd.DatetimeIndex(times).as_unit('ns').asi8
+        n = len(times)
+        if n == 0:
+            return
+        unknown = [name for name in values if name not in self._positions]
+        if unknown:
+            raise KeyError(f"Unknown columns: {unknown}")
+
+        # 超过容量时只有最后 capacity 根有用 Only the last `capacity` bars survive
+        skip = max(n - self.capacity, 0)
+        times = times[skip:]
+        block = np.full((len(self.columns), n - skip), np.nan)
+        for name, column in values.items():
+            block[self._positions[name]] = np.asarray(column, dtype=np.float64)[skip:]
+
+        # 写入的位置 (环绕), 两份各写一次 Target slots, in both halves
+        slots = (self._head + np.arange(len(times))) % self.capacity
+        for offset in (0, self.capacity):
+            self._times[slots + offset] = times
+            self._values[:, slots + offset] = block
+        self._head = (self._head + len(times)) % self.capacity
+        self._size = min(self._size + len(times), self.capacity)
+
+    def _slice(self, n: Optional[int]) -> slice:
+        n = self._size if n is None else min(n, self._size)
+        end = self._head + self.capacity
+        return slice(end - n, end)
+
+    def times(self, n: Optional[int] = None) -> np.ndarray:
+        """最近 n 根K线的时间 (epoch 纳秒, 视图) Open times of the newest n bars"""
+        return self._times[self._slice(n)]
+
+    def column(self, name: str, n: Optional[int] = None) -> np.ndarray:
+        """最近 n 根K线的一列 (连续视图) Newest n values of a column, oldest first"""
+        try:
+            row = self._values[self._positions[name]]
+        except KeyError:
+            raise KeyError(f"Unknown column: {name}")
+        return row[self._slice(n)]
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.column(name)
+
+    def index(self, n: Optional[int] = None) -> pd.DatetimeIndex:
+        """最近 n 根K线的 DatetimeIndex (不复制) DatetimeIndex over the newest n bars"""
+        return pd.DatetimeIndex(self.times(n).view('datetime64[ns]'), name='time', copy=False)
+
+    def frame(self, n: Optional[int] = None, columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """
+        最近 n 根K线的 DataFrame (只读视图) DataFrame view over the newest n bars
+
+        Args:
+            n: K线数 (None = 全部)
+            columns: 列子集 (None = 全部)
+        """
+        columns = self.columns if columns is None else columns
+        return pd.DataFrame({name: self.column(name, n) for name in columns}, index=self.index(n), copy=False)
+
+    def has_nan(self, columns: Sequence[str], n: Optional[int] = None) -> bool:
+        """最近 n 根K线的这些列里是否有 NaN Whether any of `columns` is NaN in the newest n bars"""
+        rows = [self._positions[name] for name in columns]
+        return bool(np.isnan(self._values[rows, self._slice(n)]).any())
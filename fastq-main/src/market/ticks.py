@@ -0,0 +1,252 @@
+"""
+逐笔数据 Tick Ingestion and Bar Aggregation
+
+逐笔数据存成紧凑的结构化数组 (TICK_DTYPE, 每笔 28 字节):
+    time (int64 纳秒), bid / ask (float64), volume (float32)
+- 来源: MT5 copy_ticks_range / copy_ticks_from, CSV, 或 .npy 二进制 (可内存映射)
+- 聚合: 一次向量化扫描生成任意周期 (1m, 5m, 15m, ...) / 成交量 / 笔数K线
+- 实时: TickBarBuilder 逐批接收逐笔数据, K线一收盘就产出, 不用等 bars=200 的轮询
+K线按开盘时间标记 (与 MT5 / yfinance 相同).
+"""
+
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+
+# 逐笔记录 Tick record
+TICK_DTYPE = np.dtype([
+    ('time', np.int64),
+    ('bid', np.float64),
+    ('ask', np.float64),
+    ('volume', np.float32),
+])
+
+# 聚合K线的列 Columns of aggregated bars
+BAR_COLUMNS = ['open', 'high', 'low', 'close', 'volume', 'tick_count', 'spread']
+
+_NS_PER_MS = 1_000_000
+_NS_PER_S = 1_000_000_000
+
+
+def _sorted(ticks: np.ndarray) -> np.ndarray:
+    """按时间排序 (已排序时不复制) Stable sort by time, no copy when already sorted"""
+    if len(ticks) > 1 and np.any(np.diff(ticks['time']) < 0):
+        return ticks[np.argsort(ticks['time'], kind='stable')]
+    return ticks
+
+
+def ticks_from_mt5(raw: np.ndarray) -> np.ndarray:
+    """
+    转换 MT5 逐笔数据 Convert mt5.copy_ticks_range / copy_ticks_from output
+
+    使用毫秒时间 time_msc (没有时用秒级 time); 有 volume_real 时优先用它
+    """
+    ticks = np.empty(len(raw), dtype=TICK_DTYPE)
+    names = raw.dtype.names
+    if 'time_msc' in names:
+        ticks['time'] = raw['time_msc'].astype(np.int64) * _NS_PER_MS
+    else:
+        ticks['time'] = raw['time'].astype(np.int64) * _NS_PER_S
+    ticks['bid'] = raw['bid']
+    ticks['ask'] = raw['ask']
+    ticks['volume'] = raw['volume_real'] if 'volume_real' in names else raw['volume']
+    return _sorted(ticks)
+
+
+def ticks_from_frame(data: pd.DataFrame) -> np.ndarray:
+    """
+    DataFrame 转逐笔数组 Convert a tick DataFrame
+
+    时间取 DatetimeIndex 或 'time' 列; 价格取 bid / ask 列, 只有 'price' 列时
+    bid = ask = price; 没有 volume 列时为 0
+    """
+    if 'time' in data.columns:
+        times = pd.DatetimeIndex(pd.to_datetime(data['time']))
+    else:
+        times = pd.DatetimeIndex(data.index)
+    if times.tz is not None:
+        times = times.tz_convert('UTC').tz_localize(None)
+
+    ticks = np.empty(len(data), dtype=TICK_DTYPE)
+    ticks['time'] = times.as_unit('ns').asi8
+    if 'bid' in data.columns:
+        ticks['bid'] = data['bid'].to_numpy(dtype=np.float64)
+        ticks['ask'] = data['ask'].to_numpy(dtype=np.float64) if 'ask' in data.columns else ticks['bid']
+    else:
+        ticks['bid'] = data['price'].to_numpy(dtype=np.float64)
+        ticks['ask'] = ticks['bid']
+    ticks['volume'] = data['volume'].to_numpy(dtype=np.float32) if 'volume' in data.columns else 0.0
+    return _sorted(ticks)
+
+
+def read_tick_csv(path: str, **read_csv_kwargs) -> np.ndarray:
+    """读取 CSV 逐笔数据 Read ticks from CSV (columns as in ticks_from_frame)"""
+    return ticks_from_frame(pd.read_csv(path, **read_csv_kwargs))
+
+
+def save_ticks(path: str, ticks: np.ndarray):
+    """保存为 .npy 二进制 Save as .npy (28 bytes per tick)"""
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    np.save(path, np.asarray(ticks, dtype=TICK_DTYPE))
+
+
+def load_ticks(path: str, mmap: bool = True) -> np.ndarray:
+    """读取 .npy 逐笔数据 Load ticks saved by save_ticks (memory-mapped by default)"""
+    return np.load(path, mmap_mode='r' if mmap else None)
+
+
+def tick_prices(ticks: np.ndarray, price: str = 'bid') -> np.ndarray:
+    """
+    逐笔价格 Price series of the ticks
+
+    price: 'bid' / 'ask' / 'mid'
+    """
+    if price == 'mid':
+        return (ticks['bid'] + ticks['ask']) / 2.0
+    if price in ('bid', 'ask'):
+        return np.asarray(ticks[price], dtype=np.float64)
+    raise ValueError(f"Unknown price: {price} (expected 'bid', 'ask' or 'mid')")
+
+
+def tick_series(ticks: np.ndarray, price: str = 'bid', tz: Optional[str] = None) -> pd.Series:
+    """逐笔价格 Series (如 run_execution 的 ticks 参数) Tick prices indexed by time"""
+    return pd.Series(tick_prices(ticks, price), index=_time_index(ticks['time'], tz))
+
+
+def _time_index(time_ns: np.ndarray, tz: Optional[str]) -> pd.DatetimeIndex:
+    index = pd.DatetimeIndex(np.asarray(time_ns, dtype='datetime64[ns]'))
+    return index.tz_localize('UTC').tz_convert(tz) if tz else index
+
+
+def _aggregate(ticks: np.ndarray, starts: np.ndarray, price: str, tz: Optional[str]) -> pd.DataFrame:
+    """
+    按分组起点聚合 Reduce contiguous tick groups to OHLC bars
+
+    starts: 每根K线第一笔在 ticks 中的位置 (升序)
+    """
+    if len(ticks) == 0:
+        return pd.DataFrame(columns=BAR_COLUMNS, index=_time_index(np.empty(0, dtype=np.int64), tz))
+
+    prices = tick_prices(ticks, price)
+    ends = np.append(starts[1:], len(ticks))
+    count = ends - starts
+
+    return pd.DataFrame({
+        'open': prices[starts],
+        'high': np.maximum.reduceat(prices, starts),
+        'low': np.minimum.reduceat(prices, starts),
+        'close': prices[ends - 1],
+        'volume': np.add.reduceat(ticks['volume'].astype(np.float64), starts),
+        'tick_count': count,
+        'spread': np.add.reduceat(ticks['ask'] - ticks['bid'], starts) / count,
+    }, index=_time_index(ticks['time'][starts], tz))
+
+
+def aggregate_ticks(ticks: np.ndarray, freq: str = '1min', price: str = 'bid',
+                    tz: Optional[str] = None) -> pd.DataFrame:
+    """
+    时间K线 Time bars in one vectorized pass
+
+    Args:
+        ticks: TICK_DTYPE 数组 (按时间升序)
+        freq: 固定周期 ('1min', '5min', '15min', '1h', ...), 按 epoch 整数倍对齐
+        price: 'bid' / 'ask' / 'mid'
+        tz: 输出索引的时区 (None = 不带时区, 与 ticks 时间相同)
+
+    Returns:
+        DataFrame[open, high, low, close, volume, tick_count, spread], 以K线开盘时间为索引;
+        没有成交的周期不输出
+    """
+    step = pd.Timedelta(freq).value
+    bucket = ticks['time'] // step
+    starts = np.flatnonzero(np.diff(bucket, prepend=bucket[:1] - 1)) if len(ticks) else np.empty(0, np.int64)
+    bars = _aggregate(ticks, starts, price, tz)
+    if len(bars):
+        bars.index = _time_index(bucket[starts] * step, tz)
+    return bars
+
+
+def aggregate_volume_bars(ticks: np.ndarray, volume_per_bar: float, price: str = 'bid',
+                          tz: Optional[str] = None) -> pd.DataFrame:
+    """
+    成交量K线 Volume bars: a bar closes once its volume reaches volume_per_bar
+
+    以每根K线第一笔的时间为索引
+    """
+    cumulative = np.cumsum(ticks['volume'], dtype=np.float64)
+    bucket = (cumulative - ticks['volume']) // volume_per_bar  # 每笔之前的累计量
+    starts = np.flatnonzero(np.diff(bucket, prepend=-1.0)) if len(ticks) else np.empty(0, np.int64)
+    return _aggregate(ticks, starts, price, tz)
+
+
+def aggregate_tick_bars(ticks: np.ndarray, ticks_per_bar: int, price: str = 'bid',
+                        tz: Optional[str] = None) -> pd.DataFrame:
+    """笔数K线 Tick-count bars of ticks_per_bar ticks each"""
+    return _aggregate(ticks, np.arange(0, len(ticks), ticks_per_bar), price, tz)
+
+
+class TickBarBuilder:
+    """
+    实时K线生成 Streaming time-bar builder
+
+    用法 Usage:
+        builder = TickBarBuilder('1min')
+        bars = builder.update(ticks_from_mt5(mt5.copy_ticks_from(...)))   # 新收盘的K线
+        partial = builder.current_bar()                                   # 正在形成的K线
+    """
+
+    def __init__(self, freq: str = '1min', price: str = 'bid', tz: Optional[str] = None):
+        self.freq = freq
+        self.price = price
+        self.tz = tz
+        self._step = pd.Timedelta(freq).value
+        self._pending = np.empty(0, dtype=TICK_DTYPE)  # 未收盘K线的逐笔
+        self.last_time = None  # 已接收的最后一笔时间 (ns)
+        self.last_time_count = 0  # 时间等于 last_time 的已接收逐笔数
+
+    def update(self, ticks: np.ndarray, now: Optional[pd.Timestamp] = None) -> pd.DataFrame:
+        """
+        接收新逐笔 Add ticks; return the bars that closed
+
+        K线在出现下一周期的逐笔时收盘; 给出 now 时, 结束时间 <= now 的K线也收盘.
+        重叠的数据会被丢弃: 早于 last_time 的逐笔, 以及时间等于 last_time 的前
+        last_time_count 笔 (copy_ticks_from(last_time) 会再次返回它们); 同一毫秒
+        的其余逐笔是新成交, 保留.
+        """
+        ticks = _sorted(np.asarray(ticks, dtype=TICK_DTYPE))
+        if self.last_time is not None and len(ticks):
+            times = ticks['time']
+            lo = int(np.searchsorted(times, self.last_time, side='left'))
+            hi = int(np.searchsorted(times, self.last_time, side='right'))
+            seen = min(hi - lo, self.last_time_count)
+            ticks = ticks[lo + seen:]
+        if len(ticks):
+            times = ticks['time']
+            last_time = int(times[-1])
+            at_last = len(times) - int(np.searchsorted(times, last_time, side='left'))
+            self.last_time_count = at_last + (self.last_time_count if last_time == self.last_time else 0)
+            self.last_time = last_time
+            self._pending = np.concatenate([self._pending, ticks])
+
+        if len(self._pending) == 0:
+            return _aggregate(self._pending, np.empty(0, np.int64), self.price, self.tz)
+
+        # 当前未收盘K线的开始时间 Start of the bar still forming
+        open_bucket = self._pending['time'][-1] // self._step
+        if now is not None:
+            now_ns = pd.Timestamp(now).as_unit('ns').value if pd.Timestamp(now).tzinfo is None \
+                else pd.Timestamp(now).tz_convert('UTC').tz_localize(None).as_unit('ns').value
+            open_bucket = max(open_bucket, now_ns // self._step)
+        split = int(np.searchsorted(self._pending['time'], open_bucket * self._step, side='left'))
+
+        closed, self._pending = self._pending[:split], self._pending[split:]
+        return aggregate_ticks(closed, self.freq, self.price, self.tz)
+
+    def current_bar(self) -> Optional[pd.Series]:
+        """正在形成的K线 The bar still forming (None before the first tick)"""
+        if len(self._pending) == 0:
+            return None
+        return aggregate_ticks(self._pending, self.freq, self.price, self.tz).iloc[-1]
@@ -1,14 +1,26 @@
 """
 MetaTrader 4/5 Integration Module
 For live trading execution
+
+Terminal round-trips are cached:
+- symbol metadata (digits, contract size, volume step, stops level) is loaded
+  once per symbol and refreshed after `symbol_info_ttl` seconds
+- open positions and account info are read in one snapshot shared by every
+  consumer; the live runtime invalidates it once per bar and order calls
+  invalidate it after changing positions
 """
 
-import MetaTrader5 as mt5
 from typing import Optional, Dict, List
 from datetime import datetime
 from loguru import logger
+import threading
 import time
 
+try:
+    import MetaTrader5 as mt5
+except ImportError:  # MetaTrader5 只有 Windows 版本 (Windows-only package)
+    mt5 = None
+
 
 class MT4Connector:
     """
@@ -16,41 +28,52 @@ class MT4Connector:
     Note: MT4 uses MT5 library in Python
     """
 
-    def __init__(self, config: dict):
+    def __init__(self, config: dict, mt5_api=None):
         """
         Initialize MT4/MT5 connector
         Args:
             config: MT4 configuration dict
+            mt5_api: MetaTrader5 module or a stand-in with the same API
+                     (e.g. src.live.mock_mt5.MockMT5); defaults to MetaTrader5
         """
+        if mt5_api is None and mt5 is None:
+            raise ImportError("MetaTrader5 is not installed (pip install MetaTrader5, Windows only)")
+        self.mt5 = mt5_api if mt5_api is not None else mt5
         self.config = config
         self.account = config['mt4']['account']
         self.password = config['mt4']['password']
         self.server = config['mt4']['server']
         self.magic_number = config['mt4']['magic_number']
+        self.symbol_info_ttl = config['mt4'].get('symbol_info_ttl', 3600.0)
+        self.snapshot_ttl = config['mt4'].get('snapshot_ttl', 30.0)
         self.connected = False
 
+        self._symbol_cache: Dict[str, Dict] = {}
+        self._snapshot: Optional[Dict] = None
+        self._snapshot_lock = threading.Lock()
+
     def connect(self) -> bool:
         """Connect to MT4/MT5 terminal"""
         try:
             # Initialize MT5
-            if not mt5.initialize():
-                logger.error(f"MT5 initialization failed: {mt5.last_error()}")
+            if not self.mt5.initialize():
+                logger.error(f"MT5 initialization failed: {self.mt5.last_error()}")
                 return False
 
             # Login to account
             if self.account and self.password and self.server:
-                authorized = mt5.login(
+                authorized = self.mt5.login(
                     login=self.account,
                     password=self.password,
                     server=self.server
                 )
 
                 if not authorized:
-                    logger.error(f"MT5 login failed: {mt5.last_error()}")
-                    mt5.shutdown()
+                    logger.error(f"MT5 login failed: {self.mt5.last_error()}")
+                    self.mt5.shutdown()
                     return False
 
-            account_info = mt5.account_info()
+            account_info = self.mt5.account_info()
             if account_info is None:
                 logger.error("Failed to get account info")
                 return False
@@ -67,30 +90,108 @@ class MT4Connector:
     def disconnect(self):
         """Disconnect from MT5"""
         if self.connected:
-            mt5.shutdown()
+            self.mt5.shutdown()
             self.connected = False
+            self._symbol_cache.clear()
+            self.invalidate_snapshot()
             logger.info("Disconnected from MT5")
 
+    def get_symbol_info(self, symbol: str) -> Optional[Dict]:
+        """
+        Get symbol metadata, cached for symbol_info_ttl seconds
+        Selects the symbol in Market Watch when it is hidden
+        Returns:
+            Dict with digits, point, contract_size, volume_min/max/step,
+            stops_level, or None if the symbol is unavailable
+        """
+        cached = self._symbol_cache.get(symbol)
+        if cached is not None and time.monotonic() - cached['loaded_at'] < self.symbol_info_ttl:
+            return cached
+
+        symbol_info = self.mt5.symbol_info(symbol)
+        if symbol_info is None:
+            logger.error(f"Symbol {symbol} not found")
+            return None
+
+        if not symbol_info.visible:
+            if not self.mt5.symbol_select(symbol, True):
+                logger.error(f"Failed to select symbol {symbol}")
+                return None
+
+        spec = {
+            'symbol': symbol,
+            'digits': symbol_info.digits,
+            'point': symbol_info.point,
+            'contract_size': symbol_info.trade_contract_size,
+            'volume_min': symbol_info.volume_min,
+            'volume_max': symbol_info.volume_max,
+            'volume_step': symbol_info.volume_step,
+            'stops_level': symbol_info.trade_stops_level,
+            'loaded_at': time.monotonic()
+        }
+        self._symbol_cache[symbol] = spec
+        return spec
+
+    def invalidate_snapshot(self):
+        """Force the next position/account read to query the terminal"""
+        self._snapshot = None
+
+    def _get_snapshot(self) -> Optional[Dict]:
+        """
+        Positions and account info from one terminal read, shared by all
+        callers until invalidated or older than snapshot_ttl (thread-safe)
+        """
+        with self._snapshot_lock:
+            snapshot = self._snapshot
+            if snapshot is not None and time.monotonic() - snapshot['time'] < self.snapshot_ttl:
+                return snapshot
+
+            positions = self.mt5.positions_get()
+            account_info = self.mt5.account_info()
+            if positions is None or account_info is None:
+                logger.error(f"Failed to read positions/account: {self.mt5.last_error()}")
+                return None
+
+            snapshot = {
+                'time': time.monotonic(),
+                'positions': [
+                    {
+                        'ticket': pos.ticket,
+                        'symbol': pos.symbol,
+                        'direction': 'long' if pos.type == self.mt5.ORDER_TYPE_BUY else 'short',
+                        'volume': pos.volume,
+                        'entry_price': pos.price_open,
+                        'current_price': pos.price_current,
+                        'stop_loss': pos.sl,
+                        'take_profit': pos.tp,
+                        'profit': pos.profit,
+                        'time': datetime.fromtimestamp(pos.time)
+                    }
+                    # Filter by magic number
+                    for pos in positions if pos.magic == self.magic_number
+                ],
+                'account': {
+                    'login': account_info.login,
+                    'balance': account_info.balance,
+                    'equity': account_info.equity,
+                    'margin': account_info.margin,
+                    'free_margin': account_info.margin_free,
+                    'margin_level': account_info.margin_level,
+                    'profit': account_info.profit
+                }
+            }
+            self._snapshot = snapshot
+            return snapshot
+
     def get_account_info(self) -> Optional[Dict]:
-        """Get account information"""
+        """Get account information (from the shared snapshot)"""
         if not self.connected:
             logger.warning("Not connected to MT5")
             return None
 
         try:
-            account_info = mt5.account_info()
-            if account_info is None:
-                return None
-
-            return {
-                'login': account_info.login,
-                'balance': account_info.balance,
-                'equity': account_info.equity,
-                'margin': account_info.margin,
-                'free_margin': account_info.margin_free,
-                'margin_level': account_info.margin_level,
-                'profit': account_info.profit
-            }
+            snapshot = self._get_snapshot()
+            return dict(snapshot['account']) if snapshot is not None else None
 
         except Exception as e:
             logger.error(f"Error getting account info: {e}")
@@ -122,34 +223,27 @@ class MT4Connector:
             return None
 
         try:
-            # Get symbol info
-            symbol_info = mt5.symbol_info(symbol)
-            if symbol_info is None:
-                logger.error(f"Symbol {symbol} not found")
+            # Get symbol info (cached)
+            if self.get_symbol_info(symbol) is None:
                 return None
 
-            if not symbol_info.visible:
-                if not mt5.symbol_select(symbol, True):
-                    logger.error(f"Failed to select symbol {symbol}")
-                    return None
-
             # Get current price
-            tick = mt5.symbol_info_tick(symbol)
+            tick = self.mt5.symbol_info_tick(symbol)
             if tick is None:
                 logger.error(f"Failed to get tick for {symbol}")
                 return None
 
             # Determine order type and price
             if direction == 'long':
-                order_type = mt5.ORDER_TYPE_BUY
+                order_type = self.mt5.ORDER_TYPE_BUY
                 price = tick.ask
             else:  # short
-                order_type = mt5.ORDER_TYPE_SELL
+                order_type = self.mt5.ORDER_TYPE_SELL
                 price = tick.bid
 
             # Prepare request
             request = {
-                "action": mt5.TRADE_ACTION_DEAL,
+                "action": self.mt5.TRADE_ACTION_DEAL,
                 "symbol": symbol,
                 "volume": volume,
                 "type": order_type,
@@ -159,21 +253,23 @@ class MT4Connector:
                 "deviation": 10,
                 "magic": self.magic_number,
                 "comment": comment,
-                "type_time": mt5.ORDER_TIME_GTC,
-                "type_filling": mt5.ORDER_FILLING_IOC,
+                "type_time": self.mt5.ORDER_TIME_GTC,
+                "type_filling": self.mt5.ORDER_FILLING_IOC,
             }
 
             # Send order
-            result = mt5.order_send(request)
+            result = self.mt5.order_send(request)
 
             if result is None:
-                logger.error(f"Order send failed: {mt5.last_error()}")
+                logger.error(f"Order send failed: {self.mt5.last_error()}")
                 return None
 
-            if result.retcode != mt5.TRADE_RETCODE_DONE:
+            if result.retcode != self.mt5.TRADE_RETCODE_DONE:
                 logger.error(f"Order failed: {result.retcode} - {result.comment}")
+                self._symbol_cache.pop(symbol, None)  # Reload the symbol spec before the next order
                 return None
 
+            self.invalidate_snapshot()
             logger.info(
                 f"Position opened: {direction.upper()} {volume} {symbol} @ {price:.5f} | "
                 f"SL: {stop_loss:.5f} | TP: {take_profit:.5f} | Ticket: {result.order}"
@@ -199,7 +295,7 @@ class MT4Connector:
 
         try:
             # Get position info
-            position = mt5.positions_get(ticket=ticket)
+            position = self.mt5.positions_get(ticket=ticket)
             if position is None or len(position) == 0:
                 logger.error(f"Position {ticket} not found")
                 return False
@@ -207,22 +303,22 @@ class MT4Connector:
             position = position[0]
 
             # Get current price
-            tick = mt5.symbol_info_tick(position.symbol)
+            tick = self.mt5.symbol_info_tick(position.symbol)
             if tick is None:
                 logger.error(f"Failed to get tick for {position.symbol}")
                 return False
 
             # Determine close order type and price
-            if position.type == mt5.ORDER_TYPE_BUY:
-                order_type = mt5.ORDER_TYPE_SELL
+            if position.type == self.mt5.ORDER_TYPE_BUY:
+                order_type = self.mt5.ORDER_TYPE_SELL
                 price = tick.bid
             else:
-                order_type = mt5.ORDER_TYPE_BUY
+                order_type = self.mt5.ORDER_TYPE_BUY
                 price = tick.ask
 
             # Prepare close request
             request = {
-                "action": mt5.TRADE_ACTION_DEAL,
+                "action": self.mt5.TRADE_ACTION_DEAL,
                 "symbol": position.symbol,
                 "volume": position.volume,
                 "type": order_type,
@@ -231,21 +327,22 @@ class MT4Connector:
                 "deviation": 10,
                 "magic": self.magic_number,
                 "comment": "Close position",
-                "type_time": mt5.ORDER_TIME_GTC,
-                "type_filling": mt5.ORDER_FILLING_IOC,
+                "type_time": self.mt5.ORDER_TIME_GTC,
+                "type_filling": self.mt5.ORDER_FILLING_IOC,
             }
 
             # Send close order
-            result = mt5.order_send(request)
+            result = self.mt5.order_send(request)
 
             if result is None:
-                logger.error(f"Close order send failed: {mt5.last_error()}")
+                logger.error(f"Close order send failed: {self.mt5.last_error()}")
                 return False
 
-            if result.retcode != mt5.TRADE_RETCODE_DONE:
+            if result.retcode != self.mt5.TRADE_RETCODE_DONE:
                 logger.error(f"Close order failed: {result.retcode} - {result.comment}")
                 return False
 
+            self.invalidate_snapshot()
             logger.info(f"Position closed: Ticket {ticket} @ {price:.5f}")
 
             return True
@@ -275,7 +372,7 @@ class MT4Connector:
 
         try:
             # Get position info
-            position = mt5.positions_get(ticket=ticket)
+            position = self.mt5.positions_get(ticket=ticket)
             if position is None or len(position) == 0:
                 logger.error(f"Position {ticket} not found")
                 return False
@@ -290,7 +387,7 @@ class MT4Connector:
 
             # Prepare modify request
             request = {
-                "action": mt5.TRADE_ACTION_SLTP,
+                "action": self.mt5.TRADE_ACTION_SLTP,
                 "symbol": position.symbol,
                 "position": ticket,
                 "sl": stop_loss,
@@ -299,16 +396,17 @@ class MT4Connector:
             }
 
             # Send modify order
-            result = mt5.order_send(request)
+            result = self.mt5.order_send(request)
 
             if result is None:
-                logger.error(f"Modify order send failed: {mt5.last_error()}")
+                logger.error(f"Modify order send failed: {self.mt5.last_error()}")
                 return False
 
-            if result.retcode != mt5.TRADE_RETCODE_DONE:
+            if result.retcode != self.mt5.TRADE_RETCODE_DONE:
                 logger.error(f"Modify order failed: {result.retcode} - {result.comment}")
                 return False
 
+            self.invalidate_snapshot()
             logger.info(f"Position modified: Ticket {ticket} | SL: {stop_loss:.5f} | TP: {take_profit:.5f}")
 
             return True
@@ -319,7 +417,7 @@ class MT4Connector:
 
     def get_open_positions(self, symbol: Optional[str] = None) -> List[Dict]:
         """
-        Get all open positions
+        Get all open positions (from the shared snapshot)
         Args:
             symbol: Filter by symbol (None for all)
         Returns:
@@ -330,34 +428,11 @@ class MT4Connector:
             return []
 
         try:
-            if symbol:
-                positions = mt5.positions_get(symbol=symbol)
-            else:
-                positions = mt5.positions_get()
-
-            if positions is None:
+            snapshot = self._get_snapshot()
+            if snapshot is None:
                 return []
 
-            result = []
-            for pos in positions:
-                # Filter by magic number
-                if pos.magic != self.magic_number:
-                    continue
-
-                result.append({
-                    'ticket': pos.ticket,
-                    'symbol': pos.symbol,
-                    'direction': 'long' if pos.type == mt5.ORDER_TYPE_BUY else 'short',
-                    'volume': pos.volume,
-                    'entry_price': pos.price_open,
-                    'current_price': pos.price_current,
-                    'stop_loss': pos.sl,
-                    'take_profit': pos.tp,
-                    'profit': pos.profit,
-                    'time': datetime.fromtimestamp(pos.time)
-                })
-
-            return result
+            return [dict(pos) for pos in snapshot['positions'] if not symbol or pos['symbol'] == symbol]
 
         except Exception as e:
             logger.error(f"Error getting positions: {e}")
@@ -371,6 +446,7 @@ class MT4Connector:
         Returns:
             Number of positions closed
         """
+        self.invalidate_snapshot()
         positions = self.get_open_positions(symbol)
         closed_count = 0
 
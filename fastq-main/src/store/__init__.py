@@ -0,0 +1,4 @@
+from .bar_store import BarStore
+from .indicator_cache import IndicatorCache
+
+__all__ = ['BarStore', 'IndicatorCache']
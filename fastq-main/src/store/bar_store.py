@@ -0,0 +1,257 @@
+"""
+本地K线存储 Local Columnar Bar Store
+
+按 品种/周期/月份 分区存成 Arrow IPC 文件:
+    <root>/<SYMBOL>/<timeframe>/<YYYY-MM>.arrow
+
+- 读取: 内存映射 (pa.memory_map) 零拷贝打开, 先按文件名 (月份) 剪枝,
+  再在已排序的时间列上二分查找切片 (时间范围谓词下推)
+- 追加: 新K线按月份分组, 只重写涉及的月份 (通常只有最新一个月),
+  旧分区不动; 同一时间戳以新数据为准
+- 不需要网络: 回测从本地读取, 只有缺失的首尾区间才调用 DataFetcher
+"""
+
+import os
+import tempfile
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from loguru import logger
+
+
+# 分区文件扩展名 Partition file extension (Arrow IPC file format, uncompressed for mmap)
+PARTITION_SUFFIX = '.arrow'
+
+# 时间列名 (索引名为空时) Time column name when the index is unnamed
+TIME_COLUMN = 'time'
+
+
+def write_table_atomic(path: Path, table: pa.Table):
+    """
+    原子写入 Arrow IPC 文件 Write via a temp file + rename, so readers never see a partial file
+
+    临时文件名每个写入者唯一 (mkstemp, 同目录), 多个进程同时写同一个文件时
+    不会互相覆盖临时文件; 最后一个 os.replace 生效
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=path.name + '.', suffix='.tmp')
+    os.close(fd)
+    try:
+        with pa.OSFile(tmp_name, 'wb') as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(tmp_name, path)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+
+
+class BarStore:
+    """
+    K线存储 Bar Store
+
+    用法 Usage:
+        store = BarStore('data/bars')
+        store.append('XAUUSD', '1m', bars)
+        data = store.read('XAUUSD', '1m', start='2024-01-01', end='2024-12-31')
+    """
+
+    def __init__(self, root: str = 'data/bars'):
+        """
+        Args:
+            root: 存储根目录 (data/ 已在 .gitignore 中)
+        """
+        self.root = Path(root)
+
+    def _partition_dir(self, symbol: str, timeframe: str) -> Path:
+        return self.root / symbol.upper() / timeframe
+
+    def months(self, symbol: str, timeframe: str) -> List[str]:
+        """已存储的月份 Stored months ('YYYY-MM'), sorted"""
+        directory = self._partition_dir(symbol, timeframe)
+        if not directory.exists():
+            return []
+        return sorted(path.stem for path in directory.glob(f'*{PARTITION_SUFFIX}'))
+
+    def _read_partition(self, path: Path) -> pa.Table:
+        """内存映射读取一个分区 (零拷贝) Memory-map one partition"""
+        with pa.memory_map(str(path), 'r') as source:
+            return pa.ipc.open_file(source).read_all()
+
+    def _write_partition(self, path: Path, table: pa.Table):
+        """原子写入一个分区 Atomically write one partition"""
+        write_table_atomic(path, table)
+
+    @staticmethod
+    def _to_table(data: pd.DataFrame) -> pa.Table:
+        """DataFrame (DatetimeIndex) 转 Arrow 表, 时间列在前"""
+        index = pd.DatetimeIndex(data.index).as_unit('ns')
+        frame = data.copy()
+        frame.index = index
+        frame.index.name = data.index.name or TIME_COLUMN
+        return pa.Table.from_pandas(frame, preserve_index=True)
+
+    @staticmethod
+    def _time_values(table: pa.Table, time_column: str) -> np.ndarray:
+        """时间列的 int64 纳秒视图 int64 ns view of the time column"""
+        column = table.column(time_column).combine_chunks()
+        return column.cast(pa.timestamp('ns', tz=column.type.tz)).to_numpy(zero_copy_only=False).view(np.int64)
+
+    def append(self, symbol: str, timeframe: str, data: pd.DataFrame) -> int:
+        """
+        追加K线 Merge new bars into the store
+
+        只重写新数据涉及的月份分区; 与已有数据时间戳重复时以新数据为准.
+        Only the months touched by `data` are rewritten.
+
+        Args:
+            data: 以 DatetimeIndex 为索引的K线
+
+        Returns:
+            新增的K线数 (不含覆盖的重复时间戳) Number of new timestamps
+        """
+        if data is None or data.empty:
+            return 0
+
+        data = data[~data.index.duplicated(keep='last')].sort_index()
+        index = pd.DatetimeIndex(data.index)
+        month_keys = index.year * 100 + index.month
+
+        added = 0
+        for key in np.unique(month_keys):
+            month = f'{key // 100:04d}-{key % 100:02d}'
+            path = self._partition_dir(symbol, timeframe) / f'{month}{PARTITION_SUFFIX}'
+            chunk = data[month_keys == key]
+
+            if path.exists():
+                existing = self._read_partition(path).to_pandas()
+                merged = pd.concat([existing[~existing.index.isin(chunk.index)], chunk]).sort_index()
+                added += len(merged) - len(existing)
+            else:
+                merged = chunk
+                added += len(chunk)
+
+            self._write_partition(path, self._to_table(merged))
+
+        logger.info(f"BarStore: {symbol} {timeframe} +{added} bars")
+        return added
+
+    def _partition_tz(self, symbol: str, timeframe: str, month: str) -> Optional[str]:
+        """分区时间列的时区 Timezone of the stored time column (read from the schema only)"""
+        path = self._partition_dir(symbol, timeframe) / f'{month}{PARTITION_SUFFIX}'
+        with pa.memory_map(str(path), 'r') as source:
+            schema = pa.ipc.open_file(source).schema
+        return schema.field(schema.pandas_metadata['index_columns'][0]).type.tz
+
+    def read(
+        self,
+        symbol: str,
+        timeframe: str,
+        start=None,
+        end=None,
+        columns: Optional[List[str]] = None
+    ) -> pd.DataFrame:
+        """
+        读取K线 Read bars in [start, end]
+
+        按月份剪枝分区, 再在内存映射的时间列上二分查找切片, 只转换命中的行.
+        不带时区的 start / end 按存储数据的时区解释.
+
+        Args:
+            start / end: 时间范围 (含两端), None 表示不限
+            columns: 只读取这些列 (None = 全部)
+
+        Returns:
+            DataFrame indexed by time (空表表示没有数据)
+        """
+        months = self.months(symbol, timeframe)
+        if not months:
+            return pd.DataFrame()
+
+        tz = self._partition_tz(symbol, timeframe, months[0])
+        start = _localize(pd.Timestamp(start), tz) if start is not None else None
+        end = _localize(pd.Timestamp(end), tz) if end is not None else None
+        if start is not None:
+            months = [m for m in months if m >= f'{start.year:04d}-{start.month:02d}']
+        if end is not None:
+            months = [m for m in months if m <= f'{end.year:04d}-{end.month:02d}']
+
+        directory = self._partition_dir(symbol, timeframe)
+        tables = []
+        for month in months:
+            table = self._read_partition(directory / f'{month}{PARTITION_SUFFIX}')
+            time_column = table.schema.pandas_metadata['index_columns'][0]
+            times = self._time_values(table, time_column)
+
+            lo = int(np.searchsorted(times, start.as_unit('ns').value, side='left')) if start is not None else 0
+            hi = int(np.searchsorted(times, end.as_unit('ns').value, side='right')) if end is not None else len(times)
+            if hi <= lo:
+                continue
+
+            table = table.slice(lo, hi - lo)
+            if columns is not None:
+                table = table.select([time_column] + [c for c in columns if c != time_column])
+            tables.append(table)
+
+        if not tables:
+            return pd.DataFrame()
+        return pa.concat_tables(tables).to_pandas()
+
+    def time_range(self, symbol: str, timeframe: str):
+        """已存储的首尾时间 (first, last), 没有数据时 (None, None)"""
+        months = self.months(symbol, timeframe)
+        if not months:
+            return None, None
+
+        directory = self._partition_dir(symbol, timeframe)
+        bounds = []
+        for month, position in ((months[0], 0), (months[-1], -1)):
+            table = self._read_partition(directory / f'{month}{PARTITION_SUFFIX}')
+            time_column = table.schema.pandas_metadata['index_columns'][0]
+            tz = table.schema.field(time_column).type.tz
+            # 带时区的 Arrow 时间戳存 UTC 值, 不带时区的存本地时间
+            stamp = pd.Timestamp(int(self._time_values(table, time_column)[position]), unit='ns', tz='UTC')
+            bounds.append(stamp.tz_convert(tz) if tz else stamp.tz_localize(None))
+        return bounds[0], bounds[1]
+
+    def load(self, symbol: str, timeframe: str, start, end, fetcher=None) -> pd.DataFrame:
+        """
+        读取并补齐 Read from the store, fetching only the missing head / tail
+
+        如果给了 fetcher (DataFetcher), 只下载存储范围之外的部分并追加;
+        没有 fetcher 时完全离线.
+        """
+        if fetcher is not None:
+            first, last = self.time_range(symbol, timeframe)
+            gaps = []
+            if first is None:
+                gaps.append((start, end))
+            else:
+                if pd.Timestamp(start) < _naive(first):
+                    gaps.append((start, _naive(first)))
+                if pd.Timestamp(end) > _naive(last):
+                    gaps.append((_naive(last), end))
+
+            for gap_start, gap_end in gaps:
+                bars = fetcher.get_historical_data(symbol, timeframe, start_date=gap_start, end_date=gap_end)
+                if bars is not None and not bars.empty:
+                    self.append(symbol, timeframe, bars)
+
+        return self.read(symbol, timeframe, start, end)
+
+
+def _localize(timestamp: pd.Timestamp, tz: Optional[str]) -> pd.Timestamp:
+    """把边界时间放到存储时区 Align a bound with the stored timezone"""
+    if tz is None:
+        return timestamp.tz_convert(None) if timestamp.tzinfo is not None else timestamp
+    if timestamp.tzinfo is None:
+        return timestamp.tz_localize(tz)
+    return timestamp.tz_convert(tz)
+
+
+def _naive(timestamp: pd.Timestamp) -> pd.Timestamp:
+    """去掉时区 (只用于与 datetime.now() 风格的边界比较)"""
+    return timestamp.tz_localize(None) if timestamp.tzinfo is not None else timestamp
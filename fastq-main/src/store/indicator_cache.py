@@ -0,0 +1,271 @@
+"""
+指标缓存 Persistent Indicator Cache
+
+把 Indicators.calculate_all_indicators 的输出按指标存到磁盘:
+    <root>/<SYMBOL>/<timeframe>/<indicator>-<params hash>.arrow
+
+每个条目保存一段连续历史: 时间列, 每根K线 OHLC 的指纹 (_bar_hash) 和该指标
+的输出列 (从条目第一根K线开始计算). 请求的第一根K线在条目中的位置为 s,
+从 s 开始时间和指纹一致的K线数为 k:
+- 起点相同 (s == 0): 缓存的值就是不带缓存的结果, 前 k 行直接切片
+- 起点更晚 (s > 0, 如滚动的 now - days 窗口): 递推指标 (EMA, MACD, SuperTrend)
+  取决于历史从哪根K线开始, 所以请求的前 warmup 行从请求起点重算, 之后递推
+  状态已收敛, 其余 k - warmup 行用缓存 (与全量计算只差浮点舍入)
+- 增量: 请求比缓存多出新K线, 或最后几根K线被修正 → 只重算不一致之后的尾部,
+  往前多取 warmup 根K线让递推状态收敛, 新行追加到条目
+- ZigZag 的上一个拐点不会 "忘记", 只在起点相同且全部命中时用缓存, 否则全量重算
+- 未命中: 全量计算并替换条目
+- 总大小超过 max_bytes 时按最近使用时间 (文件 mtime) 淘汰 (LRU)
+"""
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from loguru import logger
+
+from ..indicators.indicators import Indicators
+from .bar_store import write_table_atomic
+
+
+# calculate_all_indicators 中各指标的参数关键字 Keyword holding each indicator's parameters
+INDICATOR_PARAM_KEYWORDS = {
+    'zigzag': 'zigzag_depth',
+    'keltner': 'keltner_params',
+    'bollinger': 'bollinger_params',
+    'rsi': 'rsi_period',
+    'rsi_crossover': 'rsi_period',
+    'macd': 'macd_params',
+    'macd_crossover': 'macd_params',
+    'supertrend': 'supertrend_params',
+    'cci': 'cci_period',
+    'atr': None,  # 固定 14 周期 Fixed period
+}
+
+# 状态依赖全部历史, 不能只重算尾部的指标 Indicators whose state never converges
+FULL_HISTORY_INDICATORS = {'zigzag'}
+
+# 参与指纹的价格列 Price columns covered by the per-bar fingerprint
+FINGERPRINT_COLUMNS = ('open', 'high', 'low', 'close')
+
+HASH_COLUMN = '_bar_hash'
+TIME_COLUMN = 'time'
+ENTRY_SUFFIX = '.arrow'
+
+_FNV_PRIME = np.uint64(1099511628211)
+
+
+def bar_fingerprint(data: pd.DataFrame) -> np.ndarray:
+    """每根K线 OHLC 的 uint64 指纹 Per-bar uint64 fingerprint of the OHLC values"""
+    fingerprint = np.zeros(len(data), dtype=np.uint64)
+    for column in FINGERPRINT_COLUMNS:
+        if column in data.columns:
+            bits = np.ascontiguousarray(data[column].to_numpy(dtype=np.float64)).view(np.uint64)
+            fingerprint = (fingerprint ^ bits) * _FNV_PRIME  # uint64 乘法按 2^64 取模
+    return fingerprint
+
+
+class IndicatorCache:
+    """
+    指标磁盘缓存 On-disk indicator cache
+
+    用法 Usage:
+        cache = IndicatorCache('data/indicators')
+        data = cache.calculate_all_indicators('XAUUSD', '5m', data, zigzag_depth=12, cci_period=20)
+        # 与 Indicators.calculate_all_indicators(data, ...) 的列和顺序相同
+    """
+
+    def __init__(self, root: str = 'data/indicators', max_bytes: int = 1 << 30, warmup: int = 1000):
+        """
+        Args:
+            root: 缓存根目录 (data/ 已在 .gitignore 中)
+            max_bytes: 缓存总大小上限, 超过时淘汰最久未用的条目
+            warmup: 增量重算时在新K线之前多取的K线数
+        """
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.warmup = warmup
+        self.hits = 0
+        self.extensions = 0
+        self.misses = 0
+
+    def _entry_path(self, symbol: str, timeframe: str, indicator: str, params) -> Path:
+        """条目路径 Entry path keyed by (symbol, timeframe, indicator, params)"""
+        digest = hashlib.sha1(json.dumps(params, sort_keys=True, default=str).encode()).hexdigest()[:16]
+        return self.root / symbol.upper() / timeframe / f'{indicator}-{digest}{ENTRY_SUFFIX}'
+
+    @staticmethod
+    def _read_entry(path: Path) -> Optional[pa.Table]:
+        if not path.exists():
+            return None
+        try:
+            with pa.memory_map(str(path), 'r') as source:
+                return pa.ipc.open_file(source).read_all()
+        except (OSError, pa.ArrowInvalid) as e:
+            logger.warning(f"Dropping unreadable indicator cache entry {path}: {e}")
+            return None
+
+    def _write_table(self, entry: dict, table: pa.Table, tz: Optional[str]):
+        """原子写入 (并发写入者各用自己的临时文件) Atomic write, safe across worker processes"""
+        write_table_atomic(entry['path'], table.replace_schema_metadata({
+            'indicator': entry['name'],
+            'params': json.dumps(entry['params'], sort_keys=True, default=str),
+            'tz': tz or '',
+        }))
+
+    def _locate(self, table: Optional[pa.Table], tz: Optional[str], times: np.ndarray,
+                fingerprint: np.ndarray) -> Tuple[int, int]:
+        """
+        请求在缓存条目中的位置 Where the request starts inside a cached entry
+
+        Returns:
+            (s, k): 请求的第一根K线是条目的第 s 行, 请求的前 k 根K线与条目从 s 开始
+                    的 k 行完全一致; 条目不含请求的第一根K线时为 (0, 0)
+        """
+        if table is None or len(times) == 0 or (table.schema.metadata or {}).get(b'tz', b'') != (tz or '').encode():
+            return 0, 0
+
+        cached_times = table.column(TIME_COLUMN).to_numpy()
+        s = int(np.searchsorted(cached_times, times[0]))
+        if s == len(cached_times) or cached_times[s] != times[0]:
+            return 0, 0
+
+        m = min(len(table) - s, len(times))
+        cached_fingerprint = table.column(HASH_COLUMN).slice(s, m).to_numpy()
+        equal = (cached_times[s:s + m] == times[:m]) & (cached_fingerprint == fingerprint[:m])
+        mismatch = np.flatnonzero(~equal)
+        return s, int(mismatch[0]) if len(mismatch) else m
+
+    def calculate_all_indicators(self, symbol: str, timeframe: str, data: pd.DataFrame, **kwargs) -> pd.DataFrame:
+        """
+        带缓存的 calculate_all_indicators Cached Indicators.calculate_all_indicators
+
+        Args:
+            symbol / timeframe: 缓存分区 Cache partition
+            data: OHLC 数据 (DatetimeIndex, 升序)
+            **kwargs: 与 Indicators.calculate_all_indicators 相同 (含 columns)
+
+        Returns:
+            data 加上指标列, 列和顺序与 Indicators.calculate_all_indicators 相同
+        """
+        needed = Indicators.resolve_indicators(kwargs.get('columns'))
+        index = pd.DatetimeIndex(data.index)
+        tz = str(index.tz) if index.tz is not None else None
+        times = index.as_unit('ns').asi8
+        fingerprint = bar_fingerprint(data)
+        n = len(data)
+
+        # 1. 每个指标: 命中 / 增量 / 未命中 Classify every indicator
+        #    请求的 [lo, k) 行用缓存, [0, lo) 和 [k, n) 重算
+        entries: Dict[str, dict] = {}
+        for name in needed:
+            keyword = INDICATOR_PARAM_KEYWORDS[name]
+            params = kwargs.get(keyword) if keyword else None
+            path = self._entry_path(symbol, timeframe, name, params)
+            table = self._read_entry(path)
+            start, k = self._locate(table, tz, times, fingerprint)
+            lo = 0 if start == 0 else self.warmup  # 起点更晚: 前 warmup 行从请求起点重算
+            covered = k == n
+            if (name in FULL_HISTORY_INDICATORS and (start > 0 or k < n)) or k <= lo or (k < n and k < self.warmup):
+                start, k, lo = 0, 0, 0  # 可用的行太少, 或指标不能部分重算
+            entries[name] = {'name': name, 'path': path, 'params': params, 'table': table,
+                             'start': start, 'k': k, 'lo': lo, 'covered': covered}
+
+        # 2. 重算: 每个 (起, 止) 区间一次 calculate_all_indicators, 区间内的指标共享 IndicatorContext
+        #    - 未命中: [0, n); 起点更晚: [0, warmup); 增量: 从最早的不一致处往前 warmup 根到 n
+        groups: Dict[Tuple[int, int], list] = {}
+        stale = [name for name, entry in entries.items() if entry['k'] < n]
+        extending = [name for name in stale if entries[name]['k'] > 0]
+        for name in stale:
+            if entries[name]['k'] == 0:
+                groups.setdefault((0, n), []).append(name)
+        if extending:
+            tail_start = min(entries[name]['k'] for name in extending) - self.warmup
+            groups[tail_start, n] = extending
+        for name, entry in entries.items():
+            if entry['lo']:
+                groups.setdefault((0, entry['lo']), []).append(name)
+
+        computed = {}
+        for (first, stop), names in groups.items():
+            columns = [col for name in names for col in Indicators.INDICATOR_COLUMNS[name]]
+            computed[first, stop] = Indicators.calculate_all_indicators(data.iloc[first:stop],
+                                                                        **dict(kwargs, columns=columns))
+
+        # 3. 拼接结果并更新缓存条目 Assemble outputs and refresh entries
+        outputs: Dict[str, np.ndarray] = {}
+        for name, entry in entries.items():
+            columns = Indicators.INDICATOR_COLUMNS[name]
+            table, start, k, lo = entry['table'], entry['start'], entry['k'], entry['lo']
+
+            if k == 0:
+                self.misses += 1
+                fresh = {col: computed[0, n][col].to_numpy() for col in columns}
+                outputs.update(fresh)
+                if not entry['covered']:  # 请求只是太短时保留更长的条目 Keep a longer entry
+                    self._write_table(entry, pa.table({TIME_COLUMN: times, HASH_COLUMN: fingerprint, **fresh}), tz)
+                continue
+
+            pieces = {col: [table.column(col).slice(start + lo, k - lo).to_numpy()] for col in columns}
+            if lo:
+                for col in columns:
+                    pieces[col].insert(0, computed[0, lo][col].to_numpy())
+
+            if k == n:
+                self.hits += 1
+                try:
+                    os.utime(entry['path'])  # LRU: 最近使用
+                except FileNotFoundError:
+                    pass
+            else:
+                self.extensions += 1
+                fresh = {col: computed[tail_start, n][col].to_numpy()[k - tail_start:] for col in columns}
+                for col in columns:
+                    pieces[col].append(fresh[col])
+                new_rows = pa.table({TIME_COLUMN: times[k:], HASH_COLUMN: fingerprint[k:], **fresh})
+                self._write_table(entry, pa.concat_tables([table.slice(0, start + k), new_rows]), tz)
+
+            for col in columns:
+                outputs[col] = np.concatenate(pieces[col])
+
+        if stale:
+            self._evict(keep={entries[name]['path'] for name in needed})
+
+        # 与 calculate_all_indicators 相同的列顺序 Same column order as the uncached call
+        out_columns = [col for name in needed for col in Indicators.INDICATOR_COLUMNS[name]]
+        indicators = pd.DataFrame({col: outputs[col] for col in out_columns}, index=data.index)
+        existing = data.columns.intersection(out_columns)
+        return pd.concat([data.drop(columns=existing) if len(existing) else data, indicators], axis=1)
+
+    def size(self) -> int:
+        """缓存总字节数 Total bytes on disk"""
+        return sum(path.stat().st_size for path in self.root.rglob(f'*{ENTRY_SUFFIX}'))
+
+    def _evict(self, keep: set = frozenset()):
+        """按最近使用时间淘汰到 max_bytes 以内 Evict least recently used entries"""
+        entries = []
+        for path in self.root.rglob(f'*{ENTRY_SUFFIX}'):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:  # 被其他进程淘汰 Evicted by another process
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries, key=lambda entry: entry[0]):
+            if total <= self.max_bytes:
+                break
+            if path in keep:
+                continue
+            path.unlink(missing_ok=True)
+            total -= size
+            logger.debug(f"IndicatorCache evicted {path}")
+
+    def clear(self, symbol: Optional[str] = None):
+        """清空缓存 Remove all entries (or one symbol's)"""
+        directory = self.root / symbol.upper() if symbol else self.root
+        for path in directory.rglob(f'*{ENTRY_SUFFIX}'):
+            path.unlink()
@@ -1,3 +1,7 @@
 from .hybrid_optimized_strategy import HybridOptimizedStrategy, Signal, Position
+from .risk_ledger import RiskLedger
+from .trade_ledger import TradeLedger, TRADE_LEDGER_DTYPE
+from .trade_statistics import TradeStatistics
 
-__all__ = ['HybridOptimizedStrategy', 'Signal', 'Position']
+__all__ = ['HybridOptimizedStrategy', 'Signal', 'Position', 'RiskLedger', 'TradeLedger', 'TRADE_LEDGER_DTYPE',
+           'TradeStatistics']
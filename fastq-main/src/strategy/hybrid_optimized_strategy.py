@@ -22,6 +22,9 @@ import sys
 
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 from src.utils.news_calendar import NewsCalendar
+from src.strategy.risk_ledger import RiskLedger
+from src.strategy.trade_statistics import TradeStatistics
+from src.strategy.trade_ledger import TradeLedger
 
 
 @dataclass
@@ -77,6 +80,14 @@ class HybridOptimizedStrategy:
     4. 多重止盈目标 (1.5R, 2.5R, 4.0R)
     """
 
+    # 策略使用的指标列 Indicator columns read by generate_signals / check_exit
+    # 传给 Indicators.calculate_all_indicators(columns=...) 只计算需要的指标
+    REQUIRED_COLUMNS_1M = [
+        'kc_upper', 'kc_lower', 'bb_upper', 'bb_lower',
+        'macd', 'macd_signal', 'macd_crossover', 'cci', 'atr'
+    ]
+    REQUIRED_COLUMNS_5M = ['macd', 'macd_signal', 'cci']
+
     def __init__(self, config: dict, data_1m: Dict, data_5m: Dict):
         """
         初始化策略 Initialize Strategy
@@ -91,7 +102,8 @@ class HybridOptimizedStrategy:
         self.data_5m = data_5m
 
         self.positions: Dict[str, Position] = {}      # 当前持仓
-        self.closed_positions: List[Position] = []    # 已平仓记录
+        self.closed_positions = TradeLedger()         # 已平仓记录 (列式, 迭代/下标返回 Position)
+        self.trade_stats = TradeStatistics()          # 平仓统计 (O(1) 更新)
 
         # 策略参数 Strategy Parameters (需要先获取)
         strategy_config = config.get('strategy', {})
@@ -122,7 +134,7 @@ class HybridOptimizedStrategy:
         # 风险追踪 Risk Tracking
         self.daily_pnl = 0  # 当日盈亏
         self.current_day = None  # 当前日期
-        self.peak_capital = self.initial_capital  # 历史最高资金
+        self.ledger = RiskLedger(self.initial_capital)  # 已实现资金 / 历史最高 / 按日按月盈亏 (平仓时更新)
         self.trading_enabled = True  # 交易开关 (触发风控时关闭)
 
         # 激进度等级 (1=保守, 2=适中, 3=激进)
@@ -183,9 +195,31 @@ class HybridOptimizedStrategy:
         if len(data_1m) < 50 or len(data_5m) < 20:
             return None
 
-        latest_1m = data_1m.iloc[-1]
-        latest_5m = data_5m.iloc[-1]
+        return self._signal_from_bars(data_1m.iloc[-1], data_5m.iloc[-1], symbol, timestamp)
 
+    def generate_signal_for_bar(
+        self,
+        bar_1m,
+        bar_5m,
+        symbol: str,
+        timestamp: pd.Timestamp
+    ) -> Optional[Signal]:
+        """
+        单根K线信号 Signal from the current bar only
+
+        与 generate_signals 相同, 但直接接收最新一根K线 (pd.Series 或
+        BarRecord), 供事件驱动回测使用, 避免每根K线切片 DataFrame.
+        调用方负责预热 (至少50根1m / 20根5m).
+        Same as generate_signals but takes the latest bar (pd.Series or
+        BarRecord) directly; the caller is responsible for the warm-up.
+        """
+        if not self._check_risk_limits(timestamp):
+            return None
+
+        return self._signal_from_bars(bar_1m, bar_5m, symbol, timestamp)
+
+    def _signal_from_bars(self, latest_1m, latest_5m, symbol: str, timestamp: pd.Timestamp) -> Optional[Signal]:
+        """Entry logic on the latest 1m / 5m bar (anything with [] and .get)"""
         close = latest_1m['close']
         atr_1m = latest_1m.get('atr', 0.0001)
 
@@ -267,20 +301,11 @@ class HybridOptimizedStrategy:
                 close + (risk * 4.0)
             ]
 
-            signal = Signal(
-                symbol=symbol,
-                direction='long',
-                entry_price=close,
-                stop_loss=stop_loss,
-                take_profit=take_profits,
-                timestamp=timestamp,
-                confidence=self._calculate_confidence(latest_1m, latest_5m, 'long')
+            return self._make_signal(
+                symbol, 'long', close, stop_loss, take_profits, timestamp,
+                self._calculate_confidence(latest_1m, latest_5m, 'long'), cci_1m
             )
 
-            logger.info(f"🟢 LONG: {symbol} @ {close:.5f} | SL: {stop_loss:.5f} | "
-                       f"CCI: {cci_1m:.1f} | Level: {self.aggressiveness}")
-            return signal
-
         elif short_condition:
             stop_loss = max(kc_upper_1m, bb_upper_1m)
             risk = stop_loss - close
@@ -291,23 +316,14 @@ class HybridOptimizedStrategy:
                 close - (risk * 4.0)
             ]
 
-            signal = Signal(
-                symbol=symbol,
-                direction='short',
-                entry_price=close,
-                stop_loss=stop_loss,
-                take_profit=take_profits,
-                timestamp=timestamp,
-                confidence=self._calculate_confidence(latest_1m, latest_5m, 'short')
+            return self._make_signal(
+                symbol, 'short', close, stop_loss, take_profits, timestamp,
+                self._calculate_confidence(latest_1m, latest_5m, 'short'), cci_1m
             )
 
-            logger.info(f"🔴 SHORT: {symbol} @ {close:.5f} | SL: {stop_loss:.5f} | "
-                       f"CCI: {cci_1m:.1f} | Level: {self.aggressiveness}")
-            return signal
-
         return None
 
-    def _calculate_confidence(self, bar_1m: pd.Series, bar_5m: pd.Series, direction: str) -> float:
+    def _calculate_confidence(self, bar_1m, bar_5m, direction: str) -> float:
         """Calculate signal confidence"""
         confidence = 0.5
 
@@ -327,6 +343,154 @@ class HybridOptimizedStrategy:
 
         return min(confidence, 1.0)
 
+    # 信号表的列 Columns of generate_signal_frame
+    SIGNAL_FRAME_COLUMNS = [
+        'long', 'short', 'stop_loss',
+        'take_profit_1', 'take_profit_2', 'take_profit_3', 'confidence'
+    ]
+
+    def generate_signal_frame(self, data_1m: pd.DataFrame, data_5m_aligned: pd.DataFrame) -> pd.DataFrame:
+        """
+        向量化信号 Vectorized Signals for All Bars
+
+        一次计算所有K线的多/空条件、止损、三个止盈和置信度, 与逐根调用
+        _signal_from_bars 的结果一致 (包括缺列默认值和 NaN 比较).
+        风险限制和预热长度依赖回测状态, 不在这里处理, 由调用方逐根检查
+        (见 signal_from_frame).
+
+        Computes the entry conditions of generate_signals for every bar in one
+        pass. Risk limits and warm-up are state, left to the sequential loop.
+
+        Args:
+            data_1m: 1分钟数据 (含指标)
+            data_5m_aligned: 已对齐到 data_1m 的5分钟数据 (AlignedFrame, 或按 data_1m
+                索引对齐的 DataFrame)
+
+        Returns:
+            DataFrame indexed like data_1m with SIGNAL_FRAME_COLUMNS
+            (止损/止盈/置信度只在 long 或 short 为 True 的行有意义)
+        """
+        n = len(data_1m)
+
+        def column(data, name: str, default) -> np.ndarray:
+            # 与 Series.get(name, default) 相同: 缺列才用默认值, NaN 保留
+            if name in data.columns:
+                return np.asarray(data[name], dtype=np.float64)
+            return np.broadcast_to(np.asarray(default, dtype=np.float64), (n,))
+
+        close = column(data_1m, 'close', np.nan)
+        atr_1m = column(data_1m, 'atr', 0.0001)
+
+        kc_upper_1m = column(data_1m, 'kc_upper', close + atr_1m)
+        kc_lower_1m = column(data_1m, 'kc_lower', close - atr_1m)
+        bb_upper_1m = column(data_1m, 'bb_upper', close + atr_1m)
+        bb_lower_1m = column(data_1m, 'bb_lower', close - atr_1m)
+
+        macd_1m = column(data_1m, 'macd', 0)
+        macd_sig_1m = column(data_1m, 'macd_signal', 0)
+        macd_cross_1m = column(data_1m, 'macd_crossover', 0)
+
+        macd_5m = column(data_5m_aligned, 'macd', 0)
+        macd_sig_5m = column(data_5m_aligned, 'macd_signal', 0)
+
+        cci_1m = column(data_1m, 'cci', 0)
+        cci_5m = column(data_5m_aligned, 'cci', 0)
+
+        long_base = (close > kc_upper_1m) & (close > bb_upper_1m) & (macd_cross_1m == 1)
+        short_base = (close < kc_lower_1m) & (close < bb_lower_1m) & (macd_cross_1m == -1)
+
+        if self.aggressiveness == 1:  # Conservative
+            long_filter = (cci_1m > self.cci_threshold) & (macd_5m > macd_sig_5m) & (cci_5m > 0)
+            short_filter = (cci_1m < -self.cci_threshold) & (macd_5m < macd_sig_5m) & (cci_5m < 0)
+        elif self.aggressiveness == 2:  # Moderate
+            long_filter = (cci_1m > self.cci_threshold) & (macd_5m > macd_sig_5m)
+            short_filter = (cci_1m < -self.cci_threshold) & (macd_5m < macd_sig_5m)
+        else:  # Aggressive
+            long_filter = macd_1m > macd_sig_1m
+            short_filter = macd_1m < macd_sig_1m
+
+        long = long_base & long_filter
+        short = short_base & short_filter & ~long  # long 优先 (elif)
+
+        # min()/max() 语义: 第二个参数严格更小/更大时才取它 (NaN 时取第一个)
+        long_stop = np.where(bb_lower_1m < kc_lower_1m, bb_lower_1m, kc_lower_1m)
+        short_stop = np.where(bb_upper_1m > kc_upper_1m, bb_upper_1m, kc_upper_1m)
+        stop_loss = np.where(long, long_stop, np.where(short, short_stop, np.nan))
+
+        # 多单 close + risk * k (risk = close - SL), 空单 close - risk * k (risk = SL - close)
+        risk = np.where(long, close - stop_loss, stop_loss - close)
+        sign = np.where(long, 1.0, -1.0)
+        take_profits = [close + sign * (risk * k) for k in (1.5, 2.5, 4.0)]
+
+        long_strong = (cci_1m > 100) & (cci_5m > 100)
+        long_weak = (cci_1m > 0) & (cci_5m > 0)
+        short_strong = (cci_1m < -100) & (cci_5m < -100)
+        short_weak = (cci_1m < 0) & (cci_5m < 0)
+        strong = np.where(long, long_strong, short_strong)
+        weak = np.where(long, long_weak, short_weak)
+        confidence = np.where(strong, 0.5 + 0.3, np.where(weak, 0.5 + 0.2, 0.5))
+        confidence = np.where(long | short, confidence, np.nan)
+
+        return pd.DataFrame({
+            'long': long,
+            'short': short,
+            'stop_loss': stop_loss,
+            'take_profit_1': take_profits[0],
+            'take_profit_2': take_profits[1],
+            'take_profit_3': take_profits[2],
+            'confidence': confidence
+        }, index=data_1m.index)
+
+    def signal_from_frame(self, signals, bar_1m, symbol: str, timestamp: pd.Timestamp) -> Optional[Signal]:
+        """
+        从信号表取当前K线信号 Signal for the current bar of a signal frame
+
+        先做与 generate_signals 相同的风险检查, 再读 generate_signal_frame
+        的当前行 (pd.Series 或 BarRecord). bar_1m 提供入场价和日志用的 CCI.
+        """
+        if not self._check_risk_limits(timestamp):
+            return None
+
+        if signals['long']:
+            direction = 'long'
+        elif signals['short']:
+            direction = 'short'
+        else:
+            return None
+
+        return self._make_signal(
+            symbol, direction, bar_1m['close'], signals['stop_loss'],
+            [signals['take_profit_1'], signals['take_profit_2'], signals['take_profit_3']],
+            timestamp, signals['confidence'], bar_1m.get('cci', 0)
+        )
+
+    def _make_signal(
+        self,
+        symbol: str,
+        direction: str,
+        close: float,
+        stop_loss: float,
+        take_profits: List[float],
+        timestamp: pd.Timestamp,
+        confidence: float,
+        cci_1m: float
+    ) -> Signal:
+        """Build the Signal and log it"""
+        signal = Signal(
+            symbol=symbol,
+            direction=direction,
+            entry_price=close,
+            stop_loss=stop_loss,
+            take_profit=take_profits,
+            timestamp=timestamp,
+            confidence=confidence
+        )
+
+        emoji = "🟢" if direction == 'long' else "🔴"
+        logger.info(f"{emoji} {direction.upper()}: {symbol} @ {close:.5f} | SL: {stop_loss:.5f} | "
+                   f"CCI: {cci_1m:.1f} | Level: {self.aggressiveness}")
+        return signal
+
     def _check_risk_limits(self, current_time: pd.Timestamp) -> bool:
         """
         检查风险限制 Check Risk Limits
@@ -358,15 +522,8 @@ class HybridOptimizedStrategy:
                 self.trading_enabled = False
             return False
 
-        # 检查最大回撤 Check max drawdown
-        current_capital = self.initial_capital + sum([p.pnl for p in self.closed_positions])
-
-        # 更新历史最高 Update peak capital
-        if current_capital > self.peak_capital:
-            self.peak_capital = current_capital
-
-        # 计算当前回撤 Calculate current drawdown
-        current_drawdown = self.peak_capital - current_capital
+        # 检查最大回撤 Check max drawdown (历史最高在平仓时更新 Peak is updated on close)
+        current_drawdown = self.ledger.drawdown
 
         if current_drawdown >= self.max_drawdown_value:
             if self.trading_enabled:
@@ -380,6 +537,16 @@ class HybridOptimizedStrategy:
 
         return True
 
+    @property
+    def current_capital(self) -> float:
+        """已实现资金 Initial capital plus realized PnL (O(1))"""
+        return self.ledger.equity
+
+    @property
+    def peak_capital(self) -> float:
+        """已实现资金的历史最高 Peak realized capital"""
+        return self.ledger.peak_capital
+
     def _update_daily_pnl(self, pnl: float):
         """
         更新当日盈亏 Update Daily PnL
@@ -400,7 +567,7 @@ class HybridOptimizedStrategy:
             return
 
         # 计算当月盈利 Calculate monthly profit
-        current_capital = self.initial_capital + sum([p.pnl for p in self.closed_positions])
+        current_capital = self.ledger.equity
         monthly_profit = (current_capital - self.monthly_start_capital) / self.monthly_start_capital
 
         # 检查是否达到盈利阈值 Check if profit threshold is met
@@ -433,7 +600,15 @@ class HybridOptimizedStrategy:
         current_time: pd.Timestamp
     ) -> Tuple[bool, Optional[float], str]:
         """Check exit with trailing stop and news calendar"""
-        latest = data_1m.iloc[-1]
+        return self.check_exit_for_bar(position, data_1m.iloc[-1], current_time)
+
+    def check_exit_for_bar(
+        self,
+        position: Position,
+        latest,
+        current_time: pd.Timestamp
+    ) -> Tuple[bool, Optional[float], str]:
+        """Same as check_exit, on the latest bar (pd.Series or BarRecord)"""
         current_price = latest['close']
         atr = latest.get('atr', 0.0001)
 
@@ -538,39 +713,47 @@ class HybridOptimizedStrategy:
         self.positions[signal.symbol] = position
         return position
 
+    @staticmethod
+    def contract_multiplier(symbol: str) -> int:
+        """每手每单位价格变动的美元价值 USD per lot per unit price move (XAU: 100, FX: 100000)"""
+        return 100 if 'XAU' in symbol else 100000
+
     def close_position(
         self,
         position: Position,
         exit_price: float,
         exit_time: pd.Timestamp,
-        reason: str
+        reason: str,
+        costs: float = 0.0
     ) -> float:
-        """Close position and calculate PnL"""
+        """
+        Close position and calculate PnL
+        costs: 手续费等成交成本 (USD), 从盈亏中扣除 Trading costs deducted from the PnL
+        """
         if position.direction == 'long':
             pnl_pips = (exit_price - position.entry_price)
         else:
             pnl_pips = (position.entry_price - exit_price)
 
         # Calculate PnL in USD
-        if 'XAU' in position.symbol:
-            pnl = pnl_pips * position.size * 100
-        else:
-            pnl = pnl_pips * position.size * 100000
+        pnl = pnl_pips * position.size * self.contract_multiplier(position.symbol) - costs
 
         position.exit_price = exit_price
         position.exit_time = exit_time
         position.pnl = pnl
 
-        self.closed_positions.append(position)
+        self.closed_positions.append(position, reason)
         if position.symbol in self.positions:
             del self.positions[position.symbol]
 
-        # 更新当日盈亏 Update daily PnL
+        # 更新当日盈亏和风险账本 Update daily PnL and the risk ledger
         self._update_daily_pnl(pnl)
+        self.ledger.record(pnl, exit_time)
 
         # Calculate R-multiple
         risk = abs(position.entry_price - position.initial_stop_loss)
         r_multiple = pnl_pips / risk if risk > 0 else 0
+        self.trade_stats.update(pnl, r_multiple)
 
         emoji = "💰" if pnl > 0 else "❌"
         logger.info(
@@ -581,28 +764,9 @@ class HybridOptimizedStrategy:
         return pnl
 
     def get_statistics(self) -> Dict:
-        """Calculate statistics"""
-        if not self.closed_positions:
-            return {}
-
-        pnls = [p.pnl for p in self.closed_positions]
-        winning_trades = [p for p in self.closed_positions if p.pnl > 0]
-        losing_trades = [p for p in self.closed_positions if p.pnl < 0]
-
-        total_wins = sum([p.pnl for p in winning_trades])
-        total_losses = abs(sum([p.pnl for p in losing_trades]))
-
-        profit_factor = total_wins / total_losses if total_losses > 0 else 0
-
-        return {
-            'total_trades': len(self.closed_positions),
-            'winning_trades': len(winning_trades),
-            'losing_trades': len(losing_trades),
-            'win_rate': len(winning_trades) / len(self.closed_positions) if self.closed_positions else 0,
-            'total_pnl': sum(pnls),
-            'avg_win': np.mean([p.pnl for p in winning_trades]) if winning_trades else 0,
-            'avg_loss': np.mean([p.pnl for p in losing_trades]) if losing_trades else 0,
-            'largest_win': max(pnls) if pnls else 0,
-            'largest_loss': min(pnls) if pnls else 0,
-            'profit_factor': profit_factor
-        }
+        """
+        交易统计 Statistics of closed trades (read from the running accumulator)
+
+        除原有指标外还包括 expectancy, avg_r, r_std, sqn, max_consecutive_losses
+        """
+        return self.trade_stats.as_dict()
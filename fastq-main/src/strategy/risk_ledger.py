@@ -0,0 +1,159 @@
+"""
+风险账本 Running Risk Ledger
+
+每次平仓 O(1) 更新已实现资金, 历史最高资金和最大回撤, 代替每根K线
+initial_capital + sum(p.pnl for p in closed_positions) 的 O(交易数) 求和.
+按日 / 按月的盈亏和交易数存在紧凑数组里 (键为整数, 容量按倍数增长), 供报告使用.
+"""
+
+from datetime import date
+from typing import Tuple
+
+import numpy as np
+import pandas as pd
+
+
+def _day_key(time) -> int:
+    """日期键 Day key (proleptic ordinal)"""
+    day = time.date() if hasattr(time, 'date') else time
+    return day.toordinal()
+
+
+def _month_key(time) -> int:
+    """月份键 Month key (year * 12 + month - 1)"""
+    return time.year * 12 + time.month - 1
+
+
+class _PeriodTotals:
+    """按周期累计 Per-period PnL and trade count in growable arrays"""
+
+    def __init__(self, capacity: int = 64):
+        self.keys = np.empty(capacity, dtype=np.int32)
+        self.pnl = np.empty(capacity, dtype=np.float64)
+        self.trades = np.empty(capacity, dtype=np.int32)
+        self.size = 0
+
+    def add(self, key: int, pnl: float):
+        n = self.size
+        if n and self.keys[n - 1] == key:  # 常见情况: 与上一笔同一周期
+            i = n - 1
+        else:
+            i = int(np.searchsorted(self.keys[:n], key))
+            if i == n or self.keys[i] != key:
+                self._insert(i, key)
+        self.pnl[i] += pnl
+        self.trades[i] += 1
+
+    def _insert(self, i: int, key: int):
+        n = self.size
+        if n == len(self.keys):
+            for name in ('keys', 'pnl', 'trades'):
+                old = getattr(self, name)
+                grown = np.empty(2 * len(old), dtype=old.dtype)
+                grown[:n] = old[:n]
+                setattr(self, name, grown)
+        # 乱序平仓时后移 (按时间平仓时 i == n, 不移动) Shift for out-of-order closes
+        for array in (self.keys, self.pnl, self.trades):
+            array[i + 1:n + 1] = array[i:n].copy()
+        self.keys[i] = key
+        self.pnl[i] = 0.0
+        self.trades[i] = 0
+        self.size = n + 1
+
+    def get(self, key: int) -> Tuple[float, int]:
+        n = self.size
+        i = int(np.searchsorted(self.keys[:n], key))
+        if i < n and self.keys[i] == key:
+            return float(self.pnl[i]), int(self.trades[i])
+        return 0.0, 0
+
+    def view(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        n = self.size
+        return self.keys[:n], self.pnl[:n], self.trades[:n]
+
+
+class RiskLedger:
+    """
+    风险账本 Incremental realized equity, peak and drawdown
+
+    用法 Usage:
+        ledger = RiskLedger(initial_capital=10000)
+        ledger.record(pnl, exit_time)          # 每次平仓
+        ledger.equity, ledger.peak_capital     # O(1)
+        ledger.daily(), ledger.monthly()       # 报告
+    """
+
+    def __init__(self, initial_capital: float):
+        self.initial_capital = initial_capital
+        self.realized_pnl = 0.0
+        self.peak_capital = initial_capital  # 已实现资金的历史最高
+        self.max_drawdown = 0.0              # 已实现资金的最大回撤 (USD)
+        self.n_trades = 0
+        self._days = _PeriodTotals()
+        self._months = _PeriodTotals(capacity=16)
+
+    @property
+    def equity(self) -> float:
+        """当前已实现资金 Initial capital plus realized PnL"""
+        return self.initial_capital + self.realized_pnl
+
+    @property
+    def drawdown(self) -> float:
+        """当前回撤 (USD) Distance below the peak"""
+        return self.peak_capital - self.equity
+
+    def record(self, pnl: float, time: pd.Timestamp):
+        """记录一笔平仓 Record a closed trade at its exit time"""
+        self.realized_pnl += pnl
+        self.n_trades += 1
+
+        equity = self.equity
+        if equity > self.peak_capital:
+            self.peak_capital = equity
+        elif self.peak_capital - equity > self.max_drawdown:
+            self.max_drawdown = self.peak_capital - equity
+
+        self._days.add(_day_key(time), pnl)
+        self._months.add(_month_key(time), pnl)
+
+    def day_pnl(self, day) -> float:
+        """某日已实现盈亏 Realized PnL of trades closed on `day` (date or Timestamp)"""
+        return self._days.get(_day_key(day))[0]
+
+    def month_pnl(self, time) -> float:
+        """某月已实现盈亏 Realized PnL of trades closed in the month of `time`"""
+        return self._months.get(_month_key(time))[0]
+
+    def daily(self) -> pd.DataFrame:
+        """
+        按日汇总 Daily report
+
+        Returns:
+            DataFrame[pnl, trades, equity], 以日期为索引 (只含有平仓的日期);
+            equity 为当日收盘时的已实现资金
+        """
+        keys, pnl, trades = self._days.view()
+        index = pd.DatetimeIndex([pd.Timestamp(date.fromordinal(int(key))) for key in keys], name='date')
+        return pd.DataFrame({
+            'pnl': pnl.copy(),
+            'trades': trades.copy(),
+            'equity': self.initial_capital + np.cumsum(pnl),
+        }, index=index)
+
+    def monthly(self) -> pd.DataFrame:
+        """
+        按月汇总 Monthly report
+
+        Returns:
+            DataFrame[pnl, trades, return], 以月份 (Period) 为索引;
+            return 为当月盈亏 / 月初已实现资金
+        """
+        keys, pnl, trades = self._months.view()
+        start_equity = self.initial_capital + np.cumsum(pnl) - pnl
+        index = pd.PeriodIndex([pd.Period(year=int(key) // 12, month=int(key) % 12 + 1, freq='M') for key in keys],
+                               name='month')
+        return pd.DataFrame({
+            'pnl': pnl.copy(),
+            'trades': trades.copy(),
+            'return': pnl / start_equity,
+        }, index=index)
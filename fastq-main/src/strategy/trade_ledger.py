@@ -0,0 +1,226 @@
+"""
+交易账本 Columnar Trade Ledger
+
+已平仓交易按列存在 NumPy 结构化数组里 (TRADE_LEDGER_DTYPE, 每笔约 110 字节),
+分块增长, 不再为每笔交易保留一个 Position 对象 (__dict__, Python float,
+pd.Timestamp 和止盈列表). 品种和平仓原因存成整数编码.
+- 追加: append(position, reason) - O(1)
+- 向量化统计: ledger['pnl'], ledger.array(), ledger.r_multiples()
+- 导出: to_frame(), to_parquet(path)
+- 兼容: len(), 迭代, 下标和切片返回 Position, 旧代码 (p.pnl, p.exit_time,
+  closed_positions[-5:]) 照常工作. 返回的 Position 是记录的副本: 修改它不会
+  改变账本
+- 所有交易的时间戳必须同一时区 (第一笔交易的时区), 否则 append 抛出 ValueError
+"""
+
+import operator
+from typing import Iterator, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+# 每笔交易最多保存的止盈目标数 Take-profit targets kept per trade
+MAX_TAKE_PROFITS = 3
+
+TRADE_LEDGER_DTYPE = np.dtype([
+    ('symbol', np.int16),          # symbols 中的编码
+    ('direction', np.int8),        # 1 = long, -1 = short
+    ('entry_time', 'datetime64[ns]'),  # UTC
+    ('exit_time', 'datetime64[ns]'),   # UTC
+    ('entry_price', np.float64),
+    ('exit_price', np.float64),
+    ('initial_stop_loss', np.float64),
+    ('stop_loss', np.float64),
+    ('take_profit', np.float64, (MAX_TAKE_PROFITS,)),  # 不足时补 NaN
+    ('highest_price', np.float64),  # None 存为 NaN
+    ('lowest_price', np.float64),   # None 存为 NaN
+    ('size', np.float64),
+    ('pnl', np.float64),
+    ('reason', np.int8),           # reasons 中的编码
+    ('trailing_active', np.bool_),
+])
+
+_DIRECTIONS = {'long': 1, 'short': -1}
+
+
+class TradeLedger:
+    """
+    列式交易账本 Struct-of-arrays store of closed trades
+
+    用法 Usage:
+        ledger = TradeLedger()
+        ledger.append(position, 'take_profit')
+        ledger['pnl'].sum(), ledger[-1].exit_price
+        ledger.to_parquet('results/trades.parquet')
+    """
+
+    def __init__(self, chunk_size: int = 1024):
+        """
+        Args:
+            chunk_size: 每块的交易数 (满了再分配下一块, 已有数据不复制)
+        """
+        self.chunk_size = chunk_size
+        self.symbols: List[str] = []
+        self.reasons: List[str] = []
+        self.tz = None  # 时间戳的时区 (第一笔交易的时区, 之后的交易必须相同)
+        self._chunks: List[np.ndarray] = []
+        self._size = 0
+        self._array: Optional[np.ndarray] = None  # array() 的缓存
+
+    @staticmethod
+    def _code(table: List[str], value: str) -> int:
+        try:
+            return table.index(value)
+        except ValueError:
+            table.append(value)
+            return len(table) - 1
+
+    @staticmethod
+    def _same_tz(a, b) -> bool:
+        # 按名字比较: pytz / zoneinfo / datetime.timezone 的同一时区对象不一定相等
+        return str(a) == str(b)
+
+    @staticmethod
+    def _utc_ns(time: pd.Timestamp) -> np.datetime64:
+        return np.datetime64(pd.Timestamp(time).value, 'ns')
+
+    def __len__(self) -> int:
+        return self._size
+
+    def append(self, position, reason: str = ''):
+        """追加一笔已平仓交易 Append a closed Position"""
+        if len(position.take_profit) > MAX_TAKE_PROFITS:
+            raise ValueError(f"At most {MAX_TAKE_PROFITS} take-profit targets are stored, "
+                             f"got {len(position.take_profit)}")
+        tz = self.tz if self._size else pd.Timestamp(position.entry_time).tz
+        for time in (position.entry_time, position.exit_time):
+            if not self._same_tz(pd.Timestamp(time).tz, tz):
+                raise ValueError(f"Trade time {time} does not match the ledger time zone {tz}")
+        offset = self._size % self.chunk_size
+        if offset == 0:
+            self._chunks.append(np.empty(self.chunk_size, dtype=TRADE_LEDGER_DTYPE))
+        if self._size == 0:
+            self.tz = tz
+
+        record = self._chunks[-1][offset]
+        record['symbol'] = self._code(self.symbols, position.symbol)
+        record['direction'] = _DIRECTIONS[position.direction]
+        record['entry_time'] = self._utc_ns(position.entry_time)
+        record['exit_time'] = self._utc_ns(position.exit_time)
+        record['entry_price'] = position.entry_price
+        record['exit_price'] = position.exit_price
+        record['initial_stop_loss'] = position.initial_stop_loss
+        record['stop_loss'] = position.stop_loss
+        targets = np.full(MAX_TAKE_PROFITS, np.nan)
+        targets[:len(position.take_profit)] = position.take_profit
+        record['take_profit'] = targets
+        record['highest_price'] = np.nan if position.highest_price is None else position.highest_price
+        record['lowest_price'] = np.nan if position.lowest_price is None else position.lowest_price
+        record['size'] = position.size
+        record['pnl'] = position.pnl
+        record['reason'] = self._code(self.reasons, reason)
+        record['trailing_active'] = position.trailing_active
+
+        self._size += 1
+        self._array = None
+
+    def array(self) -> np.ndarray:
+        """全部交易 (TRADE_LEDGER_DTYPE, 连续数组) All trades as one structured array"""
+        if self._array is None:
+            if not self._chunks:
+                self._array = np.empty(0, dtype=TRADE_LEDGER_DTYPE)
+            elif len(self._chunks) == 1:
+                self._array = self._chunks[0][:self._size]
+            else:
+                self._array = np.concatenate(self._chunks)[:self._size]
+        return self._array
+
+    def __getitem__(self, key: Union[int, slice, str]):
+        """
+        ledger['pnl'] 返回列数组; ledger[i] 返回 Position, ledger[i:j] 返回 Position 列表
+        (与原来的 list 相同). Position 是副本, 修改它不会改变账本.
+        """
+        if isinstance(key, str):
+            return self.array()[key]
+        if isinstance(key, slice):
+            return [self[i] for i in range(*key.indices(self._size))]
+        key = operator.index(key)
+        if key < 0:
+            key += self._size
+        if not 0 <= key < self._size:
+            raise IndexError("trade index out of range")
+        return self._position(self._chunks[key // self.chunk_size][key % self.chunk_size])
+
+    def __iter__(self) -> Iterator:
+        for i in range(self._size):
+            yield self[i]
+
+    def _timestamp(self, value: np.datetime64) -> pd.Timestamp:
+        time = pd.Timestamp(value)
+        return time.tz_localize('UTC').tz_convert(self.tz) if self.tz is not None else time
+
+    @staticmethod
+    def _optional(value) -> Optional[float]:
+        return None if np.isnan(value) else float(value)
+
+    def _position(self, record):
+        """重建 Position (副本) Rebuild a Position from a record"""
+        from .hybrid_optimized_strategy import Position
+
+        direction = 'long' if record['direction'] == 1 else 'short'
+        take_profit = record['take_profit']
+        return Position(
+            symbol=self.symbols[record['symbol']],
+            direction=direction,
+            entry_price=float(record['entry_price']),
+            stop_loss=float(record['stop_loss']),
+            initial_stop_loss=float(record['initial_stop_loss']),
+            take_profit=[float(tp) for tp in take_profit[~np.isnan(take_profit)]],
+            size=float(record['size']),
+            entry_time=self._timestamp(record['entry_time']),
+            exit_price=float(record['exit_price']),
+            exit_time=self._timestamp(record['exit_time']),
+            pnl=float(record['pnl']),
+            highest_price=self._optional(record['highest_price']),
+            lowest_price=self._optional(record['lowest_price']),
+            trailing_active=bool(record['trailing_active']),
+        )
+
+    def r_multiples(self) -> np.ndarray:
+        """每笔的 R 倍数 (价格盈亏 / 初始止损距离) R-multiple of every trade"""
+        trades = self.array()
+        risk = np.abs(trades['entry_price'] - trades['initial_stop_loss'])
+        move = (trades['exit_price'] - trades['entry_price']) * trades['direction']
+        return np.divide(move, risk, out=np.zeros(len(trades)), where=risk > 0)
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        导出 DataFrame Export with decoded symbol / direction / reason
+
+        止盈目标展开为 take_profit_1 .. take_profit_3 列
+        """
+        trades = self.array()
+        frame = pd.DataFrame({
+            'symbol': pd.Categorical.from_codes(trades['symbol'], self.symbols),
+            'direction': np.where(trades['direction'] == 1, 'long', 'short'),
+            'entry_time': pd.DatetimeIndex(trades['entry_time']),
+            'exit_time': pd.DatetimeIndex(trades['exit_time']),
+        })
+        if self.tz is not None:
+            for column in ('entry_time', 'exit_time'):
+                frame[column] = frame[column].dt.tz_localize('UTC').dt.tz_convert(self.tz)
+        for name in ('entry_price', 'exit_price', 'initial_stop_loss', 'stop_loss'):
+            frame[name] = trades[name]
+        for k in range(MAX_TAKE_PROFITS):
+            frame[f'take_profit_{k + 1}'] = trades['take_profit'][:, k]
+        frame['highest_price'] = trades['highest_price']
+        frame['lowest_price'] = trades['lowest_price']
+        frame['size'] = trades['size']
+        frame['pnl'] = trades['pnl']
+        frame['reason'] = pd.Categorical.from_codes(trades['reason'], self.reasons)
+        frame['trailing_active'] = trades['trailing_active']
+        return frame
+
+    def to_parquet(self, path: str):
+        """导出 Parquet Write the trades to a Parquet file (requires pyarrow)"""
+        self.to_frame().to_parquet(path, index=False)
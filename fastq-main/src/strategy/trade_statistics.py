@@ -0,0 +1,111 @@
+"""
+交易统计 Streaming Trade Statistics
+
+每次平仓 O(1) 更新计数, 求和, 最大/最小值, 连续亏损和 R 倍数的
+Welford 均值/方差, get_statistics 直接读取, 不再每次扫描 closed_positions.
+"""
+
+import math
+from typing import Dict
+
+
+class TradeStatistics:
+    """
+    在线交易统计 Online accumulator of closed-trade statistics
+
+    用法 Usage:
+        stats = TradeStatistics()
+        stats.update(pnl, r_multiple)   # 每次平仓
+        stats.as_dict()                 # 与 get_statistics 相同的键 + 扩展指标
+    """
+
+    def __init__(self):
+        self.total_trades = 0
+        self.winning_trades = 0
+        self.losing_trades = 0
+        self.total_pnl = 0.0
+        self.gross_profit = 0.0   # 盈利交易之和
+        self.gross_loss = 0.0     # 亏损交易之和 (负数)
+        self.largest_win = -math.inf   # 最大单笔盈亏 max(pnl)
+        self.largest_loss = math.inf   # 最小单笔盈亏 min(pnl)
+        self.consecutive_losses = 0
+        self.max_consecutive_losses = 0
+        # Welford: R 倍数的均值和离差平方和 Running mean / sum of squared deviations
+        self.r_mean = 0.0
+        self._r_m2 = 0.0
+
+    def update(self, pnl: float, r_multiple: float):
+        """记录一笔平仓 Add one closed trade"""
+        pnl, r_multiple = float(pnl), float(r_multiple)
+        self.total_trades += 1
+        self.total_pnl += pnl
+        if pnl > self.largest_win:
+            self.largest_win = pnl
+        if pnl < self.largest_loss:
+            self.largest_loss = pnl
+
+        if pnl > 0:
+            self.winning_trades += 1
+            self.gross_profit += pnl
+        elif pnl < 0:
+            self.losing_trades += 1
+            self.gross_loss += pnl
+
+        if pnl < 0:
+            self.consecutive_losses += 1
+            if self.consecutive_losses > self.max_consecutive_losses:
+                self.max_consecutive_losses = self.consecutive_losses
+        else:
+            self.consecutive_losses = 0
+
+        delta = r_multiple - self.r_mean
+        self.r_mean += delta / self.total_trades
+        self._r_m2 += delta * (r_multiple - self.r_mean)
+
+    @property
+    def win_rate(self) -> float:
+        return self.winning_trades / self.total_trades if self.total_trades else 0
+
+    @property
+    def profit_factor(self) -> float:
+        """总盈利 / 总亏损 (没有亏损时为 0, 与原 get_statistics 相同)"""
+        return self.gross_profit / abs(self.gross_loss) if self.gross_loss < 0 else 0
+
+    @property
+    def r_std(self) -> float:
+        """R 倍数的样本标准差 Sample standard deviation of R"""
+        return math.sqrt(self._r_m2 / (self.total_trades - 1)) if self.total_trades > 1 else 0.0
+
+    @property
+    def expectancy(self) -> float:
+        """每笔期望盈亏 (USD) Average PnL per trade"""
+        return self.total_pnl / self.total_trades if self.total_trades else 0.0
+
+    @property
+    def sqn(self) -> float:
+        """系统质量数 System Quality Number: sqrt(N) * mean(R) / std(R)"""
+        r_std = self.r_std
+        return math.sqrt(self.total_trades) * self.r_mean / r_std if r_std > 0 else 0.0
+
+    def as_dict(self) -> Dict:
+        """统计字典 Statistics dict ({} before the first trade)"""
+        if not self.total_trades:
+            return {}
+        return {
+            'total_trades': self.total_trades,
+            'winning_trades': self.winning_trades,
+            'losing_trades': self.losing_trades,
+            'win_rate': self.win_rate,
+            'total_pnl': self.total_pnl,
+            'avg_win': self.gross_profit / self.winning_trades if self.winning_trades else 0,
+            'avg_loss': self.gross_loss / self.losing_trades if self.losing_trades else 0,
+            'largest_win': self.largest_win,
+            'largest_loss': self.largest_loss,
+            'profit_factor': self.profit_factor,
+            # 扩展指标 Extended metrics
+            'expectancy': self.expectancy,
+            'avg_r': self.r_mean,
+            'r_std': self.r_std,
+            'sqn': self.sqn,
+            'max_consecutive_losses': self.max_consecutive_losses,
+        }
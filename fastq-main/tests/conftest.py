@@ -0,0 +1,91 @@
+"""
+Shared test fixtures
+Synthetic OHLC data, so the suite runs without network or MT5
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+# calculate_all_indicators 的全部参数 Every parameter of calculate_all_indicators
+INDICATOR_PARAMS = {
+    'zigzag_depth': 12,
+    'keltner_params': {'ma_period': 15, 'atr_period': 10, 'atr_multiple': 0.5, 'ma_method': 1, 'ma_price': 4},
+    'bollinger_params': {'length': 15, 'deviation': 1.0},
+    'rsi_period': 14,
+    'macd_params': {'fast_period': 12, 'slow_period': 26, 'signal_period': 9},
+    'supertrend_params': {'period': 10, 'multiplier': 3.0},
+    'cci_period': 20,
+}
+
+# 策略 1m 入场 / 5m 确认周期的指标参数 Strategy indicator parameters for the 1m and 5m frames
+STRATEGY_PARAMS = {
+    '1m': {'zigzag_depth': 25, 'keltner_params': INDICATOR_PARAMS['keltner_params'],
+           'bollinger_params': INDICATOR_PARAMS['bollinger_params']},
+    '5m': {'zigzag_depth': 12},
+}
+
+
+def synthetic_bars(n: int = 4000, freq: str = '1min', seed: int = 11, start: str = '2024-01-01',
+                   price: float = 2000.0) -> pd.DataFrame:
+    """Random-walk OHLCV bars with realistic wicks"""
+    rng = np.random.default_rng(seed)
+    close = price * np.exp(np.cumsum(rng.normal(0, 5e-4, n)))
+    open_ = np.r_[price, close[:-1]]
+    wick = np.abs(rng.normal(0, 3e-4, (n, 2))) * close[:, None]
+    return pd.DataFrame({
+        'open': open_,
+        'high': np.maximum(open_, close) + wick[:, 0],
+        'low': np.minimum(open_, close) - wick[:, 1],
+        'close': close,
+        'volume': rng.integers(1, 100, n).astype(np.float64),
+    }, index=pd.date_range(start, periods=n, freq=freq))
+
+
+def resample_5m(data: pd.DataFrame) -> pd.DataFrame:
+    """5-minute bars labelled by open time"""
+    return data.resample('5min').agg({
+        'open': 'first', 'high': 'max', 'low': 'min', 'close': 'last', 'volume': 'sum'
+    }).dropna()
+
+
+def make_config(aggressiveness: int = 2, max_daily_loss: float = 1000, max_drawdown: float = 0.25,
+                progressive: bool = False, symbols: tuple = ('XAUUSD',)) -> dict:
+    """HybridOptimizedStrategy 的最小配置 Minimal HybridOptimizedStrategy config"""
+    return {
+        'trading': {'position_sizes': {symbol: 0.3 for symbol in symbols}},
+        'strategy': {
+            'aggressiveness': aggressiveness,
+            'progressive_lots': {'enabled': progressive, 'profit_threshold': 0.001, 'frequency_days': 1},
+        },
+        'backtesting': {'initial_capital': 10000},
+        'risk': {'max_daily_loss': max_daily_loss, 'max_drawdown': max_drawdown},
+    }
+
+
+@pytest.fixture(scope='session')
+def bars() -> pd.DataFrame:
+    """约三天的1分钟K线, 各测试共用 (只读) About three days of 1m bars shared by every test (read-only)"""
+    return synthetic_bars()
+
+
+@pytest.fixture(scope='session')
+def bars_5m(bars) -> pd.DataFrame:
+    return resample_5m(bars)
+
+
+@pytest.fixture(scope='session')
+def market(bars, bars_5m):
+    """策略需要的 1m / 5m 指标 (只读) The strategy's 1m and 5m indicator frames (read-only)"""
+    from src.indicators import Indicators
+    from src.strategy.hybrid_optimized_strategy import HybridOptimizedStrategy
+
+    return (Indicators.calculate_all_indicators(bars, **STRATEGY_PARAMS['1m'],
+                                                columns=HybridOptimizedStrategy.REQUIRED_COLUMNS_1M),
+            Indicators.calculate_all_indicators(bars_5m, **STRATEGY_PARAMS['5m'],
+                                                columns=HybridOptimizedStrategy.REQUIRED_COLUMNS_5M))
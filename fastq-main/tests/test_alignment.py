@@ -0,0 +1,67 @@
+"""
+多周期对齐 Multi-timeframe alignment vs a naive per-bar search
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.market import AlignedFrame, align_index, completed_bars
+from tests.conftest import resample_5m
+
+
+def naive_positions(fast_index, slow_index, fast_period, slow_period) -> np.ndarray:
+    """每根快周期K线收盘时, 最后一根已收盘的慢周期K线 (逐根查找)"""
+    positions = []
+    for fast_open in fast_index:
+        closed = [j for j, slow_open in enumerate(slow_index) if slow_open + slow_period <= fast_open + fast_period]
+        positions.append(closed[-1] if closed else -1)
+    return np.array(positions, dtype=np.int64)
+
+
+@pytest.mark.parametrize('tz', [None, 'America/New_York'])
+def test_align_index_matches_naive_search(bars, tz):
+    fast = bars.iloc[:180]
+    # 缺几根K线 (周末/断线) Drop a few bars, like gaps in real feeds
+    fast = fast.drop(fast.index[[7, 8, 9, 61, 62]])
+    slow = resample_5m(fast)
+    if tz:
+        fast = fast.tz_localize('UTC').tz_convert(tz)
+        slow = slow.tz_localize('UTC').tz_convert(tz)
+    expected = naive_positions(fast.index, slow.index, pd.Timedelta('1min'), pd.Timedelta('5min'))
+    np.testing.assert_array_equal(align_index(fast.index, slow.index, '1min', '5min'), expected)
+
+
+def test_aligned_frame_never_looks_ahead(bars):
+    fast = bars.iloc[:120]
+    slow = resample_5m(fast)
+    aligned = AlignedFrame.align(fast, slow)
+
+    # 10:04 收盘时第一根5分钟K线 (10:00-10:05) 才刚收盘
+    assert aligned.row(3) is None
+    assert aligned.row(4).name == slow.index[0]
+    for i, fast_open in enumerate(fast.index):
+        row = aligned.row(i)
+        if row is not None:
+            assert row.name + pd.Timedelta('5min') <= fast_open + pd.Timedelta('1min')
+
+    # to_frame 与按收盘时间的 reindex(ffill) 相同 Same as reindexing slow bars by close time
+    by_close = slow.set_axis(slow.index + pd.Timedelta('5min'))
+    expected = by_close.reindex(fast.index + pd.Timedelta('1min'), method='ffill').set_axis(fast.index)
+    pd.testing.assert_frame_equal(aligned.to_frame(), expected, check_freq=False)
+
+
+def test_mixed_timezones_raise(bars):
+    fast = bars.iloc[:20]
+    slow = resample_5m(fast).tz_localize('UTC')
+    with pytest.raises(ValueError):
+        align_index(fast.index, slow.index)
+
+
+def test_completed_bars_drops_the_forming_bar(bars_5m):
+    slow = bars_5m.iloc[:12]
+    as_of = slow.index[-1] + pd.Timedelta('3min')  # 最后一根还在形成
+    closed = completed_bars(slow, as_of)
+    pd.testing.assert_frame_equal(closed, slow.iloc[:-1])
+    pd.testing.assert_frame_equal(completed_bars(slow, slow.index[-1] + pd.Timedelta('5min')), slow)
+    assert len(completed_bars(slow, slow.index[0])) == 0
@@ -0,0 +1,144 @@
+"""
+回测路径对比 Backtest paths vs the per-bar slicing loop they replace
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.backtesting import BacktestEngine, ExecutionModel, run_execution, run_simulation
+from src.market import AlignedFrame
+from src.strategy.hybrid_optimized_strategy import HybridOptimizedStrategy
+from tests.conftest import make_config
+
+SYMBOL = 'XAUUSD'
+WARMUP = 50
+
+
+def trade_keys(strategy) -> list:
+    return [(p.entry_time, p.exit_time, p.direction, p.entry_price, p.exit_price, p.size, p.pnl)
+            for p in strategy.closed_positions]
+
+
+def run_baseline(config: dict, data_main: pd.DataFrame, data_5m: pd.DataFrame):
+    """
+    原来脚本的循环: 每根K线切片前缀 Original script loop, slicing a prefix per bar
+
+    5分钟数据按原脚本展开成 1m 长度 (reindex ffill), 但按收盘时间对齐, 没有未来数据
+    """
+    strategy = HybridOptimizedStrategy(config, {}, {})
+    data_5m_resampled = AlignedFrame.align(data_main, data_5m).to_frame()
+    equity = float(strategy.initial_capital)
+    equity_curve = [equity]
+    for i in range(WARMUP, len(data_main)):
+        current_time = data_main.index[i]
+        if SYMBOL in strategy.positions:
+            position = strategy.positions[SYMBOL]
+            should_exit, exit_price, reason = strategy.check_exit(position, data_main.iloc[:i + 1], current_time)
+            if should_exit:
+                equity += strategy.close_position(position, exit_price, current_time, reason)
+        if SYMBOL not in strategy.positions:
+            signal = strategy.generate_signals(data_main.iloc[:i + 1], data_5m_resampled.iloc[:i + 1],
+                                               SYMBOL, current_time)
+            if signal:
+                strategy.open_position(signal)
+        equity_curve.append(equity)
+    return strategy, equity_curve
+
+
+@pytest.mark.parametrize('aggressiveness', [1, 2, 3])
+def test_engine_matches_slicing_loop(market, aggressiveness):
+    data_main, data_5m = market
+    config = make_config(aggressiveness)
+    expected_strategy, expected_equity = run_baseline(config, data_main, data_5m)
+
+    strategy = HybridOptimizedStrategy(config, {}, {})
+    equity = BacktestEngine(strategy, SYMBOL, warmup=WARMUP).run(data_main, data_5m)
+
+    assert len(expected_strategy.closed_positions) > 0
+    assert trade_keys(strategy) == trade_keys(expected_strategy)
+    assert equity == expected_equity
+
+
+@pytest.mark.parametrize('aggressiveness,max_daily_loss,max_drawdown,progressive', [
+    (1, 1000, 0.25, False),
+    (2, 30, 0.9, True),
+    (3, 1e9, 0.01, False),
+    (3, 1e9, 0.9, True),
+])
+def test_simulator_matches_engine(market, aggressiveness, max_daily_loss, max_drawdown, progressive):
+    data_main, data_5m = market
+    config = make_config(aggressiveness, max_daily_loss, max_drawdown, progressive)
+
+    strategy = HybridOptimizedStrategy(config, {}, {})
+    expected_equity = BacktestEngine(strategy, SYMBOL, warmup=WARMUP).run(data_main, data_5m)
+
+    simulated = HybridOptimizedStrategy(config, {}, {})
+    trades, equity = run_simulation(simulated, SYMBOL, data_main, data_5m, warmup=WARMUP)
+
+    assert trade_keys(strategy) == [
+        (pd.Timestamp(t['entry_time']), pd.Timestamp(t['exit_time']), 'long' if t['direction'] == 1 else 'short',
+         t['entry_price'], t['exit_price'], t['size'], t['pnl'])
+        for t in trades
+    ]
+    assert [(p.stop_loss, p.trailing_active) for p in strategy.closed_positions] == \
+        [(t['stop_loss'], bool(t['trailing_active'])) for t in trades]
+    np.testing.assert_array_equal(equity, expected_equity)
+    # 模拟不修改策略状态 The simulator leaves the strategy untouched
+    assert len(simulated.closed_positions) == 0 and not simulated.positions
+
+
+def test_commission_only_changes_pnl(market):
+    data_main, data_5m = market
+    config = make_config(2)
+    free, free_equity = run_execution(HybridOptimizedStrategy(config, {}, {}), SYMBOL, data_main, data_5m,
+                                      model=ExecutionModel(), warmup=WARMUP)
+    paid, paid_equity = run_execution(HybridOptimizedStrategy(config, {}, {}), SYMBOL, data_main, data_5m,
+                                      model=ExecutionModel(commission=0.000035), warmup=WARMUP)
+
+    assert len(free) > 0
+    for name in ('entry_index', 'exit_index', 'entry_price', 'exit_price', 'size', 'reason'):
+        np.testing.assert_array_equal(paid[name], free[name])
+    assert (free['commission'] == 0).all() and (paid['commission'] > 0).all()
+    np.testing.assert_allclose(free['pnl'] - paid['pnl'], paid['commission'], rtol=1e-9)
+    assert paid_equity[-1] == pytest.approx(free_equity[-1] - paid['commission'].sum())
+
+
+def test_intrabar_engine_records_execution_trades(market):
+    data_main, data_5m = market
+    config = make_config(2, max_daily_loss=1e9, max_drawdown=1.0)  # 交易跨多个交易日 Trades span several days
+    config['backtesting'].update({'execution': 'intrabar', 'commission': 0.000035,
+                                  'slippage': {SYMBOL: 0.10}, 'spread': {SYMBOL: 0.30}})
+    trades, expected_equity = run_execution(HybridOptimizedStrategy(config, {}, {}), SYMBOL, data_main, data_5m,
+                                            warmup=WARMUP)
+
+    strategy = HybridOptimizedStrategy(config, {}, {})
+    equity = BacktestEngine(strategy, SYMBOL, warmup=WARMUP).run(data_main, data_5m)
+
+    np.testing.assert_array_equal(equity, expected_equity)
+    closed = list(strategy.closed_positions)
+    np.testing.assert_allclose([p.pnl for p in closed], trades['pnl'], rtol=1e-12)
+    np.testing.assert_array_equal([p.size for p in closed], trades['size'])
+    # 止盈目标随成交记录写回 Take-profit targets survive the replay
+    np.testing.assert_array_equal([p.take_profit for p in closed], trades['take_profit'])
+    assert not np.isnan(trades['take_profit']).any()
+
+    stats = strategy.get_statistics()
+    assert stats['total_trades'] == len(trades)
+    assert stats['total_pnl'] == pytest.approx(trades['pnl'].sum())
+    assert strategy.current_capital == pytest.approx(expected_equity[-1])
+
+    # 当日盈亏按交易日重置 Daily PnL only covers the last entry's trading day
+    entry_days = data_main.index[trades['entry_index']].date
+    assert len(set(entry_days)) > 1
+    last_day = entry_days == strategy.current_day
+    assert strategy.current_day == entry_days[-1]
+    assert strategy.daily_pnl == pytest.approx(trades['pnl'][last_day].sum())
+
+
+def test_unknown_execution_mode_raises(market):
+    data_main, data_5m = market
+    config = make_config(2)
+    config['backtesting']['execution'] = 'tick'
+    with pytest.raises(ValueError):
+        BacktestEngine(HybridOptimizedStrategy(config, {}, {}), SYMBOL).run(data_main, data_5m)
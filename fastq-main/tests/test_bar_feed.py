@@ -0,0 +1,58 @@
+"""
+LiveBarFeed vs refetching and recomputing indicators every bar
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.indicators import Indicators
+from src.live.bar_feed import LiveBarFeed
+from src.live.mock_mt5 import MockMT5
+from src.strategy.hybrid_optimized_strategy import HybridOptimizedStrategy
+from tests.conftest import STRATEGY_PARAMS
+COLUMNS = {'1m': HybridOptimizedStrategy.REQUIRED_COLUMNS_1M, '5m': HybridOptimizedStrategy.REQUIRED_COLUMNS_5M}
+TIMEFRAMES = {'1m': MockMT5.TIMEFRAME_M1, '5m': MockMT5.TIMEFRAME_M5}
+
+
+def batch_window(mt5: MockMT5, symbol: str, timeframe: str, start: int, bars: int) -> pd.DataFrame:
+    """原来的做法: 取全部已收盘K线, 全量重算指标 Refetch closed bars and recompute everything"""
+    rates = mt5.copy_rates_from_pos(symbol, TIMEFRAMES[timeframe], 0, 100000)[:-1]
+    rates = rates[rates['time'] >= start]
+    data = pd.DataFrame({'open': rates['open'], 'high': rates['high'], 'low': rates['low'],
+                         'close': rates['close'], 'volume': rates['tick_volume'].astype(np.float64)},
+                        index=pd.to_datetime(rates['time'], unit='s'))
+    frame = Indicators.calculate_all_indicators(data, **STRATEGY_PARAMS[timeframe], columns=COLUMNS[timeframe])
+    return frame[['open', 'high', 'low', 'close', 'volume'] + COLUMNS[timeframe]].iloc[-bars:]
+
+
+@pytest.mark.parametrize('timeframe', ['1m', '5m'])
+def test_incremental_window_matches_recompute(timeframe):
+    mt5 = MockMT5(['XAUUSD'], latency=0, now=pd.Timestamp('2024-03-04 12:00:30'), history=6000)
+    feed = LiveBarFeed(mt5, bars=100, warmup=400, params=STRATEGY_PARAMS, columns=COLUMNS,
+                       clock=lambda: mt5.now.timestamp())
+
+    window, new_bars = feed.update('XAUUSD', timeframe)
+    assert new_bars == 400
+    start = int(window.index[0].value // 10**9) - 300 * (5 if timeframe == '5m' else 1) * 60
+
+    fetched = feed.rows_fetched
+    for step in range(40):
+        mt5.advance(60)
+        window, new_bars = feed.update('XAUUSD', timeframe)
+        expected = batch_window(mt5, 'XAUUSD', timeframe, start, 100)
+        np.testing.assert_array_equal(window.index.as_unit('ns').asi8, expected.index.as_unit('ns').asi8)
+        np.testing.assert_allclose(window.to_numpy(), expected.to_numpy(), rtol=1e-9, atol=1e-9)
+    # 每次只取新K线 + 锚点 + 正在形成的K线 Only a few rows per update
+    assert feed.rows_fetched - fetched <= 40 * 3
+    assert feed.backfills == 1
+
+
+def test_gap_triggers_backfill():
+    mt5 = MockMT5(['XAUUSD'], latency=0, now=pd.Timestamp('2024-03-04 12:00:30'), history=3000)
+    feed = LiveBarFeed(mt5, bars=100, warmup=400, params=STRATEGY_PARAMS, columns=COLUMNS)  # 本地时钟不随模拟推进
+    feed.update('XAUUSD', '1m')
+    mt5.advance(600 * 60)
+    window, new_bars = feed.update('XAUUSD', '1m')
+    assert feed.backfills == 2 and new_bars == 400
+    assert window.index[-1] == pd.Timestamp('2024-03-04 21:59:00')
@@ -0,0 +1,63 @@
+"""
+BarStore vs slicing the in-memory frame
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.store import BarStore
+from tests.conftest import synthetic_bars
+
+
+@pytest.fixture
+def data():
+    # 跨两个月 Spans a month boundary
+    return synthetic_bars(3000, freq='30min', start='2024-01-15')
+
+
+def assert_same_bars(result, expected):
+    pd.testing.assert_frame_equal(result, expected, check_freq=False, check_names=False, check_index_type=False)
+    np.testing.assert_array_equal(result.index.as_unit('ns').asi8, expected.index.as_unit('ns').asi8)
+
+
+@pytest.mark.parametrize('tz', [None, 'UTC'])
+def test_read_matches_frame_slices(tmp_path, data, tz):
+    if tz:
+        data = data.tz_localize(tz)
+    store = BarStore(str(tmp_path))
+    assert store.append('XAUUSD', '30m', data.iloc[:2000]) == 2000
+    # 重叠部分以新数据为准 Overlapping bars are replaced by the newer data
+    revised = data.iloc[1900:].copy()
+    revised['close'] += 1.0
+    assert store.append('XAUUSD', '30m', revised) == 1000
+    expected = pd.concat([data.iloc[:1900], revised])
+
+    assert len(store.months('XAUUSD', '30m')) == 3
+    assert_same_bars(store.read('XAUUSD', '30m'), expected)
+    start, end = expected.index[500], expected.index[2500]
+    assert_same_bars(store.read('XAUUSD', '30m', start, end), expected.loc[start:end])
+    assert_same_bars(store.read('XAUUSD', '30m', start, end, columns=['close']), expected.loc[start:end, ['close']])
+    assert store.time_range('XAUUSD', '30m') == (expected.index[0], expected.index[-1])
+    assert not list(tmp_path.rglob('*.tmp'))
+
+
+class RecordingFetcher:
+    """只记录请求的区间 Serves bars from a frame and records requested ranges"""
+
+    def __init__(self, data):
+        self.data = data
+        self.requests = []
+
+    def get_historical_data(self, symbol, timeframe, start_date, end_date):
+        self.requests.append((pd.Timestamp(start_date), pd.Timestamp(end_date)))
+        return self.data.loc[start_date:end_date]
+
+
+def test_load_fetches_only_missing_tail(tmp_path, data):
+    store = BarStore(str(tmp_path))
+    store.append('XAUUSD', '30m', data.iloc[:1000])
+    fetcher = RecordingFetcher(data)
+    result = store.load('XAUUSD', '30m', data.index[200], data.index[-1], fetcher=fetcher)
+    assert fetcher.requests == [(data.index[999], data.index[-1])]
+    assert_same_bars(result, data.iloc[200:])
@@ -0,0 +1,103 @@
+"""
+IndicatorCache vs uncached Indicators.calculate_all_indicators
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.indicators import Indicators
+from src.store import IndicatorCache
+from tests.conftest import INDICATOR_PARAMS
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return IndicatorCache(root=str(tmp_path), warmup=300)
+
+
+@pytest.fixture(scope='module')
+def data(bars):
+    return bars.iloc[:2000]
+
+
+def uncached(data, **kwargs):
+    return Indicators.calculate_all_indicators(data, **dict(INDICATOR_PARAMS, **kwargs))
+
+
+def assert_frames_close(result, expected):
+    assert list(result.columns) == list(expected.columns)
+    for column in expected.columns:
+        np.testing.assert_allclose(result[column].to_numpy(dtype=np.float64),
+                                   expected[column].to_numpy(dtype=np.float64),
+                                   rtol=1e-9, atol=1e-9, equal_nan=True, err_msg=column)
+
+
+def test_miss_then_hit(cache, data):
+    expected = uncached(data)
+    first = cache.calculate_all_indicators('XAUUSD', '1m', data, **INDICATOR_PARAMS)
+    second = cache.calculate_all_indicators('XAUUSD', '1m', data, **INDICATOR_PARAMS)
+    pd.testing.assert_frame_equal(first, expected)
+    pd.testing.assert_frame_equal(second, expected)
+    assert cache.misses > 0 and cache.hits == cache.misses and cache.extensions == 0
+
+
+def test_prefix_is_served_from_cache(cache, data):
+    cache.calculate_all_indicators('XAUUSD', '1m', data, **INDICATOR_PARAMS)
+    misses = cache.misses
+    result = cache.calculate_all_indicators('XAUUSD', '1m', data.iloc[:1200], **INDICATOR_PARAMS)
+    pd.testing.assert_frame_equal(result, uncached(data.iloc[:1200]))
+    assert cache.misses == misses and cache.hits > 0
+
+
+def test_rolling_window_reuses_history_after_warmup(cache, data, tmp_path):
+    # 滚动的 now - days 窗口: 起点每次后移, 末尾追加新K线 A rolling window: later start, new bars at the end
+    cache.calculate_all_indicators('XAUUSD', '1m', data.iloc[:1500], **INDICATOR_PARAMS)
+    misses = cache.misses
+    for window in (data.iloc[400:1500], data.iloc[500:1700], data.iloc[600:2000]):
+        result = cache.calculate_all_indicators('XAUUSD', '1m', window, **INDICATOR_PARAMS)
+        expected = uncached(window)
+        # 递推指标取决于历史起点: 前 warmup 行从请求起点重算, 之后与全量计算只差舍入
+        pd.testing.assert_frame_equal(result.iloc[:cache.warmup], expected.iloc[:cache.warmup], check_exact=True)
+        assert_frames_close(result, expected)
+
+    # 只有 ZigZag 全量重算; 每个指标一个条目 Only ZigZag is recomputed in full; one entry per indicator
+    assert cache.misses - misses == 3
+    assert cache.hits > 0 and cache.extensions > 0
+    assert len(list(tmp_path.rglob('*.arrow'))) == len(Indicators.INDICATOR_COLUMNS)
+
+
+def test_appended_bars_extend_the_entry(cache, data):
+    cache.calculate_all_indicators('XAUUSD', '1m', data.iloc[:1500], **INDICATOR_PARAMS)
+    result = cache.calculate_all_indicators('XAUUSD', '1m', data, **INDICATOR_PARAMS)
+    assert cache.extensions > 0
+    assert_frames_close(result, uncached(data))
+
+
+def test_revised_bar_is_recomputed(cache, data):
+    cache.calculate_all_indicators('XAUUSD', '1m', data, **INDICATOR_PARAMS)
+    revised = data.copy()
+    revised.iloc[-1, revised.columns.get_loc('close')] += 5.0
+    result = cache.calculate_all_indicators('XAUUSD', '1m', revised, **INDICATOR_PARAMS)
+    expected = uncached(revised)
+    np.testing.assert_allclose(result['macd'].to_numpy(), expected['macd'].to_numpy(),
+                               rtol=1e-9, atol=1e-9, equal_nan=True)
+    assert result['close'].iloc[-1] == revised['close'].iloc[-1]
+
+
+
+def test_recalculating_replaces_columns(cache, data):
+    first = cache.calculate_all_indicators('XAUUSD', '1m', data, **INDICATOR_PARAMS)
+    second = cache.calculate_all_indicators('XAUUSD', '1m', first, **INDICATOR_PARAMS)
+    assert not second.columns.has_duplicates
+    pd.testing.assert_frame_equal(second, first)
+
+
+def test_column_subset_and_no_temporary_files(cache, data, tmp_path):
+    columns = ['macd', 'macd_signal', 'cci']
+    result = cache.calculate_all_indicators('XAUUSD', '5m', data, **INDICATOR_PARAMS, columns=columns)
+    pd.testing.assert_frame_equal(result, uncached(data, columns=columns))
+    assert not list(tmp_path.rglob('*.tmp'))
+    assert cache.size() > 0
+    cache.clear()
+    assert cache.size() == 0
@@ -0,0 +1,77 @@
+"""
+Indicators.calculate_all_indicators vs the baseline implementation
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.indicators import Indicators
+from src.strategy.hybrid_optimized_strategy import HybridOptimizedStrategy
+from tests.baseline_indicators import Indicators as BaselineIndicators
+from tests.conftest import INDICATOR_PARAMS
+
+OUTPUT_COLUMNS = [column for columns in Indicators.INDICATOR_COLUMNS.values() for column in columns]
+
+
+def assert_columns_match(result, expected, columns):
+    for column in columns:
+        np.testing.assert_allclose(result[column].to_numpy(dtype=np.float64),
+                                   expected[column].to_numpy(dtype=np.float64),
+                                   rtol=1e-9, atol=1e-9, equal_nan=True, err_msg=column)
+
+
+@pytest.mark.parametrize('window', [slice(0, 600), slice(2000, 2600)])
+def test_all_indicators_match_baseline(bars, window):
+    data = bars.iloc[window]
+    original = data.copy()
+    expected = BaselineIndicators.calculate_all_indicators(data.copy(), **INDICATOR_PARAMS)
+    result = Indicators.calculate_all_indicators(data, **INDICATOR_PARAMS)
+    assert set(result.columns) == set(expected.columns)
+    assert_columns_match(result, expected, OUTPUT_COLUMNS)
+    # 输入不被修改 The input frame is left untouched
+    pd.testing.assert_frame_equal(data, original)
+
+
+@pytest.mark.parametrize('columns', [
+    HybridOptimizedStrategy.REQUIRED_COLUMNS_1M,
+    HybridOptimizedStrategy.REQUIRED_COLUMNS_5M,
+    ['supertrend_direction'],
+    ['kc_upper', 'bb_lower'],
+])
+def test_column_subset_matches_full_run(bars, columns):
+    data = bars.iloc[:600]
+    full = Indicators.calculate_all_indicators(data, **INDICATOR_PARAMS)
+    subset = Indicators.calculate_all_indicators(data, **INDICATOR_PARAMS, columns=columns)
+    assert set(columns) <= set(subset.columns)
+    assert set(subset.columns) <= set(full.columns)
+    assert_columns_match(subset, full, columns)
+
+
+def test_shared_intermediates_match_standalone_functions(bars):
+    # 每个函数单独调用时自建上下文 Each function called alone builds its own context
+    data = bars.iloc[:600]
+    result = Indicators.calculate_all_indicators(data, **INDICATOR_PARAMS)
+    bollinger = {k: v for k, v in INDICATOR_PARAMS['bollinger_params'].items() if k in ('length', 'deviation')}
+    standalone = {
+        ('kc_mid', 'kc_upper', 'kc_lower'): Indicators.keltner_channel(data, **INDICATOR_PARAMS['keltner_params']),
+        ('bb_mid', 'bb_upper', 'bb_lower'): Indicators.bollinger_bands(data['close'], **bollinger),
+        ('macd', 'macd_signal', 'macd_histogram'): Indicators.macd(data['close'], **INDICATOR_PARAMS['macd_params']),
+        ('supertrend', 'supertrend_direction'): Indicators.supertrend(data, **INDICATOR_PARAMS['supertrend_params']),
+        ('cci',): (Indicators.cci(data, period=INDICATOR_PARAMS['cci_period']),),
+        ('atr',): (Indicators.atr(data, period=14),),
+    }
+    for names, values in standalone.items():
+        for name, series in zip(names, values):
+            np.testing.assert_array_equal(result[name].to_numpy(), series.to_numpy(), err_msg=name)
+    for name in OUTPUT_COLUMNS:
+        assert result[name].dtype == (np.int64 if name in Indicators.INT_COLUMNS else np.float64), name
+
+
+def test_recalculating_replaces_columns(bars):
+    data = bars.iloc[:400]
+    first = Indicators.calculate_all_indicators(data, **INDICATOR_PARAMS)
+    second = Indicators.calculate_all_indicators(first, **INDICATOR_PARAMS)
+    assert not second.columns.has_duplicates
+    assert list(second.columns) == list(first.columns)
+    pd.testing.assert_frame_equal(second, first)
@@ -0,0 +1,58 @@
+"""
+Compiled indicator kernels vs the baseline pandas implementations
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.indicators.indicators import Indicators
+from tests.baseline_indicators import Indicators as BaselineIndicators
+
+# 同一份K线的不同区段 Different stretches of the shared bars
+WINDOWS = [slice(0, 400), slice(2000, 2400)]
+
+
+@pytest.mark.parametrize('depth', [5, 12, 35])
+@pytest.mark.parametrize('window', WINDOWS)
+def test_zigzag_matches_baseline(bars, depth, window):
+    data = bars.iloc[window]
+    expected = BaselineIndicators.zigzag(data['high'], data['low'], depth=depth)
+    result = Indicators.zigzag(data['high'], data['low'], depth=depth)
+    np.testing.assert_array_equal(result.to_numpy(), expected.to_numpy())
+    assert result.index.equals(data.index)
+
+
+def test_zigzag_ties_and_flat_prices():
+    # Repeated highs/lows exercise the deque tie handling
+    high = pd.Series([1.0, 2.0, 2.0, 1.0, 3.0, 3.0, 3.0, 1.0, 0.5, 0.5, 2.0, 2.0] * 5)
+    low = high - 0.5
+    for depth in (1, 2, 3):
+        expected = BaselineIndicators.zigzag(high, low, depth=depth)
+        np.testing.assert_array_equal(Indicators.zigzag(high, low, depth=depth).to_numpy(), expected.to_numpy())
+
+
+@pytest.mark.parametrize('period,multiplier', [(10, 3.0), (7, 1.5)])
+def test_supertrend_matches_baseline(bars, period, multiplier):
+    data = bars.iloc[:500]
+    expected_line, expected_direction = BaselineIndicators.supertrend(data, period=period, multiplier=multiplier)
+    line, direction = Indicators.supertrend(data, period=period, multiplier=multiplier)
+    np.testing.assert_allclose(line.to_numpy(), expected_line.to_numpy(), rtol=1e-12, equal_nan=True)
+    np.testing.assert_array_equal(direction.to_numpy(), expected_direction.to_numpy())
+
+
+@pytest.mark.parametrize('period', [5, 20])
+def test_cci_matches_baseline(bars, period):
+    data = bars.iloc[1000:1400]
+    expected = BaselineIndicators.cci(data, period=period)
+    result = Indicators.cci(data, period=period)
+    np.testing.assert_allclose(result.to_numpy(), expected.to_numpy(), rtol=1e-9, atol=1e-9, equal_nan=True)
+    assert result.isna().sum() == expected.isna().sum()
+
+
+def test_rolling_mad_matches_apply(bars):
+    from src.indicators.kernels import rolling_mad
+
+    values = bars['close'].to_numpy()[:300]
+    expected = pd.Series(values).rolling(14).apply(lambda x: np.abs(x - x.mean()).mean()).to_numpy()
+    np.testing.assert_allclose(rolling_mad(values, 14), expected, rtol=1e-10, equal_nan=True)
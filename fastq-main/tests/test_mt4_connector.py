@@ -0,0 +1,63 @@
+"""
+MT4Connector caches vs querying the terminal on every call
+"""
+
+import pandas as pd
+import pytest
+
+from src.live.mock_mt5 import MockMT5
+from src.mt4.mt4_connector import MT4Connector
+
+MAGIC = 234000
+
+
+@pytest.fixture
+def terminal():
+    mt5 = MockMT5(['XAUUSD', 'EURUSD', 'GBPUSD'], latency=0, now=pd.Timestamp('2024-03-04 12:00:30'), history=100)
+    connector = MT4Connector({'mt4': {'account': None, 'password': None, 'server': None,
+                                      'magic_number': MAGIC}}, mt5_api=mt5)
+    assert connector.connect()
+    return mt5, connector
+
+
+def test_symbol_info_is_loaded_once(terminal):
+    mt5, connector = terminal
+    calls = mt5.calls
+    spec = connector.get_symbol_info('XAUUSD')
+    assert connector.get_symbol_info('XAUUSD') is spec
+    assert mt5.calls == calls + 1
+    assert spec['contract_size'] == mt5.symbol_info('XAUUSD').trade_contract_size
+    assert connector.get_symbol_info('UNKNOWN') is None
+
+
+def test_snapshot_matches_direct_queries(terminal):
+    mt5, connector = terminal
+    for symbol, direction in (('XAUUSD', 'long'), ('EURUSD', 'short'), ('XAUUSD', 'short')):
+        assert connector.open_position(symbol, direction, 0.1, 0.0, 0.0)
+    mt5.order_send({'action': mt5.TRADE_ACTION_DEAL, 'symbol': 'GBPUSD', 'type': mt5.ORDER_TYPE_BUY,
+                    'volume': 0.1, 'magic': MAGIC + 1})  # 其他 EA 的持仓 Another EA's position
+
+    connector.invalidate_snapshot()
+    calls = mt5.calls
+    by_symbol = {symbol: connector.get_open_positions(symbol) for symbol in ('XAUUSD', 'EURUSD', 'GBPUSD')}
+    everything = connector.get_open_positions()
+    account = connector.get_account_info()
+    # 一次 positions_get + 一次 account_info One snapshot read for every consumer
+    assert mt5.calls == calls + 2
+
+    # 原来的做法: 每个品种单独查询 Baseline: one positions_get per symbol
+    for symbol, positions in by_symbol.items():
+        direct = [p for p in mt5.positions_get(symbol=symbol) if p.magic == MAGIC]
+        assert [p['ticket'] for p in positions] == [p.ticket for p in direct]
+        assert [p['direction'] for p in positions] == \
+            ['long' if p.type == mt5.ORDER_TYPE_BUY else 'short' for p in direct]
+    assert sorted(p['ticket'] for p in everything) == [1, 2, 3]
+    assert account['balance'] == mt5.account_info().balance
+
+
+def test_orders_invalidate_the_snapshot(terminal):
+    mt5, connector = terminal
+    ticket = connector.open_position('XAUUSD', 'long', 0.1, 0.0, 0.0)
+    assert [p['ticket'] for p in connector.get_open_positions('XAUUSD')] == [ticket]
+    assert connector.close_position(ticket)
+    assert connector.get_open_positions('XAUUSD') == []
@@ -0,0 +1,54 @@
+"""
+ParameterOptimizer vs running BacktestEngine on every config
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.backtesting import BacktestEngine, ParameterOptimizer, grid_search_space
+from src.backtesting.optimizer import indicator_params, set_config_value
+from src.indicators import Indicators
+from src.strategy.hybrid_optimized_strategy import HybridOptimizedStrategy
+from tests.conftest import make_config
+
+GRID = grid_search_space({
+    'strategy.aggressiveness': [1, 3],
+    'strategy.keltner': [
+        {'ma_period': 15, 'atr_period': 10, 'atr_multiple': 0.5, 'ma_method': 1, 'ma_price': 4},
+        {'ma_period': 20, 'atr_period': 14, 'atr_multiple': 1.0, 'ma_method': 1, 'ma_price': 4},
+    ],
+})
+
+
+def engine_result(params: dict, data_1m: pd.DataFrame, data_5m: pd.DataFrame) -> tuple:
+    """每个配置单独算指标并逐根回测 Baseline: fresh indicators and the event-driven engine"""
+    config = make_config()
+    for path, value in params.items():
+        set_config_value(config, path, value)
+    params_1m, params_5m = indicator_params(config)
+    strategy = HybridOptimizedStrategy(config, {}, {})
+    equity = BacktestEngine(strategy, 'XAUUSD').run(Indicators.calculate_all_indicators(data_1m, **params_1m),
+                                                    Indicators.calculate_all_indicators(data_5m, **params_5m))
+    return len(strategy.closed_positions), sum(p.pnl for p in strategy.closed_positions), np.asarray(equity)
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_sweep_matches_engine(bars, bars_5m, workers):
+    results = ParameterOptimizer(make_config(), 'XAUUSD', bars, bars_5m, workers=workers).run(GRID)
+    assert len(results) == len(GRID)
+    assert results['total_trades'].any()
+
+    for row in results.to_dict('records'):
+        params = {path: row[path] for path in GRID[0]}
+        trades, pnl, equity = engine_result(params, bars, bars_5m)
+        peak = np.maximum.accumulate(equity)
+        assert row['total_trades'] == trades
+        assert row['total_pnl'] == pytest.approx(pnl, rel=1e-12, abs=1e-9)
+        assert row['max_drawdown'] == pytest.approx(abs(((equity - peak) / peak).min()) * 100, rel=1e-12)
+
+
+def test_run_ranks_results(bars, bars_5m):
+    results = ParameterOptimizer(make_config(), 'XAUUSD', bars, bars_5m, workers=1).run(GRID, rank_by='total_pnl')
+    assert list(results['rank']) == list(range(1, len(GRID) + 1))
+    assert results['total_pnl'].is_monotonic_decreasing
@@ -0,0 +1,49 @@
+"""
+BarRingBuffer vs pd.concat + iloc[-capacity:]
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.market import OHLCV_COLUMNS, BarRingBuffer
+
+
+def test_append_and_extend_match_concat_window(bars):
+    data = bars.iloc[:250].set_axis(bars.index[:250].as_unit('ns'))  # 缓冲区按纳秒保存时间
+    buffer = BarRingBuffer(64, OHLCV_COLUMNS)
+    buffer.extend(data.index[:100], {name: data[name].to_numpy()[:100] for name in OHLCV_COLUMNS})
+
+    window = data.iloc[:100].iloc[-64:]
+    for i in range(100, len(data)):
+        bar = data.iloc[i]
+        buffer.append(data.index[i], bar.to_dict())
+        # 原来每根K线: concat + 截取最后 capacity 根
+        window = pd.concat([window, data.iloc[i:i + 1]]).iloc[-64:]
+
+        assert len(buffer) == 64
+        assert buffer.last_time == data.index[i]
+        pd.testing.assert_frame_equal(buffer.frame(), window, check_names=False, check_freq=False)
+        np.testing.assert_array_equal(buffer.column('close', 10), window['close'].to_numpy()[-10:])
+
+
+def test_frame_is_a_view_and_missing_columns_are_nan():
+    buffer = BarRingBuffer(4, OHLCV_COLUMNS + ['macd'])
+    times = pd.date_range('2024-01-01', periods=6, freq='1min')
+    for i, time in enumerate(times):
+        buffer.append(time, {'open': i, 'high': i, 'low': i, 'close': float(i)})
+
+    closes = buffer['close']
+    assert np.shares_memory(closes, buffer.frame()['close'].to_numpy())
+    np.testing.assert_array_equal(closes, [2.0, 3.0, 4.0, 5.0])
+    assert buffer.has_nan(['macd']) and not buffer.has_nan(['close'])
+    assert list(buffer.index()) == list(times[-4:])
+
+
+def test_invalid_arguments_raise():
+    with pytest.raises(ValueError):
+        BarRingBuffer(0)
+    with pytest.raises(ValueError):
+        BarRingBuffer(4, ['close', 'close'])
+    with pytest.raises(KeyError):
+        BarRingBuffer(4).extend(pd.date_range('2024-01-01', periods=2, freq='1min'), {'macd': np.zeros(2)})
@@ -0,0 +1,42 @@
+"""
+RiskLedger vs summing closed_positions on every check
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.strategy.risk_ledger import RiskLedger
+
+
+def test_running_totals_match_full_sums():
+    rng = np.random.default_rng(0)
+    pnls = rng.normal(0, 50, 300)
+    times = pd.Timestamp('2024-01-30') + pd.to_timedelta(np.sort(rng.uniform(0, 60 * 24 * 6, 300)), unit='min')
+    ledger = RiskLedger(initial_capital=10000)
+
+    peak, max_drawdown = 10000.0, 0.0
+    for i, (pnl, time) in enumerate(zip(pnls, times)):
+        ledger.record(pnl, time)
+        # 原来的做法: 每次重新求和 The baseline re-sums every closed trade
+        equity = 10000 + sum(pnls[:i + 1])
+        peak = max(peak, equity)
+        max_drawdown = max(max_drawdown, peak - equity)
+        assert ledger.equity == pytest.approx(equity, abs=1e-9)
+        assert ledger.peak_capital == pytest.approx(peak, abs=1e-9)
+        assert ledger.drawdown == pytest.approx(peak - equity, abs=1e-9)
+        assert ledger.max_drawdown == pytest.approx(max_drawdown, abs=1e-9)
+    assert ledger.n_trades == len(pnls)
+
+    frame = pd.DataFrame({'pnl': pnls}, index=times)
+    daily = frame['pnl'].groupby(frame.index.normalize()).agg(['sum', 'count'])
+    report = ledger.daily()
+    np.testing.assert_allclose(report['pnl'], daily['sum'])
+    np.testing.assert_array_equal(report['trades'], daily['count'])
+    np.testing.assert_allclose(report['equity'], 10000 + daily['sum'].cumsum())
+    for day, total in daily['sum'].items():
+        assert ledger.day_pnl(day) == pytest.approx(total)
+
+    monthly = frame['pnl'].groupby(frame.index.to_period('M')).sum()
+    np.testing.assert_allclose(ledger.monthly()['pnl'], monthly)
+    assert ledger.month_pnl(times[0]) == pytest.approx(monthly.iloc[0])
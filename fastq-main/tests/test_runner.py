@@ -0,0 +1,55 @@
+"""
+MultiSymbolRunner: process pool vs in-process runs
+"""
+
+import pandas as pd
+import pytest
+
+from src.backtesting import BacktestEngine, MultiSymbolRunner
+from src.indicators import Indicators
+from src.strategy.hybrid_optimized_strategy import HybridOptimizedStrategy
+from tests.conftest import STRATEGY_PARAMS, make_config, resample_5m, synthetic_bars
+
+SEEDS = {'XAUUSD': 51, 'XAGUSD': 52}
+PERIODS = [1, 2]
+CONFIG = make_config(3, max_daily_loss=1e9, max_drawdown=1.0, symbols=tuple(SEEDS))
+
+
+# 模块级函数, 进程池按引用 pickle Module-level so the pool can pickle them
+def load_data(symbol: str, days: int):
+    if symbol not in SEEDS:
+        raise KeyError(f"Unknown symbol: {symbol}")
+    data = synthetic_bars(3 * 1440, seed=SEEDS[symbol])
+    data = data.loc[data.index[-1] - pd.Timedelta(days=days):]
+    return (Indicators.calculate_all_indicators(data, **STRATEGY_PARAMS['1m'],
+                                                columns=HybridOptimizedStrategy.REQUIRED_COLUMNS_1M),
+            Indicators.calculate_all_indicators(resample_5m(data), **STRATEGY_PARAMS['5m'],
+                                                columns=HybridOptimizedStrategy.REQUIRED_COLUMNS_5M))
+
+
+def run_window(symbol: str, days: int, data_main: pd.DataFrame, data_5m: pd.DataFrame) -> dict:
+    strategy = HybridOptimizedStrategy(CONFIG, {}, {})
+    equity = BacktestEngine(strategy, symbol).run(data_main, data_5m)
+    return {'bars': len(data_main), 'trades': len(strategy.closed_positions), 'final_equity': equity[-1]}
+
+
+def baseline_results():
+    """原来的串行循环 The original per-period loop: load each (symbol, days) window, then backtest it"""
+    results = {}
+    for days in PERIODS:
+        for symbol in SEEDS:
+            results[symbol, days] = (run_window(symbol, days, *load_data(symbol, days)), type(None))
+    return results
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_runner_matches_sequential_loop(workers):
+    jobs = MultiSymbolRunner(load_data, run_window, workers=workers, log_level=None).run(
+        [*SEEDS, 'UNKNOWN'], PERIODS)
+    results = {(job.symbol, job.days): (job.result, type(job.error)) for job in jobs}
+
+    # 加载失败作为结果返回, 不中断其他任务 Load errors come back as values
+    assert [results.pop(('UNKNOWN', days)) for days in PERIODS] == [(None, KeyError)] * len(PERIODS)
+    expected = baseline_results()
+    assert results == expected
+    assert any(result['trades'] for result, _ in expected.values())
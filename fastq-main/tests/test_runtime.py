@@ -0,0 +1,69 @@
+"""
+LiveRuntime: concurrent symbol pipelines vs processing symbols one by one
+"""
+
+import asyncio
+import time
+from pathlib import Path
+
+import pandas as pd
+import yaml
+
+from src.live.bar_feed import LiveBarFeed, indicator_params
+from src.live.mock_mt5 import MockMT5, mock_symbols
+from src.live.runtime import LiveRuntime
+from src.mt4.mt4_connector import MT4Connector
+from src.strategy.hybrid_optimized_strategy import HybridOptimizedStrategy
+
+CONFIG_PATH = Path(__file__).resolve().parent.parent / 'config' / 'config_hybrid_level1.yaml'
+
+
+def make_live_config(symbols: list) -> dict:
+    with open(CONFIG_PATH) as f:
+        config = yaml.safe_load(f)
+    config['trading'] = dict(config['trading'], symbols=symbols, position_sizes={symbol: 0.1 for symbol in symbols})
+    config['strategy']['aggressiveness'] = 3
+    return config
+
+
+def run_live(workers: int, cycles: int = 30, serial: bool = False):
+    symbols = mock_symbols(12)
+    config = make_live_config(symbols)
+    mt5 = MockMT5(symbols, latency=0.001, now=pd.Timestamp('2024-03-04 12:00:30'), seed=3)
+    connector = MT4Connector(config, mt5_api=mt5)
+    connector.connect()
+    feed = LiveBarFeed(mt5, clock=lambda: mt5.now.timestamp(),
+                       params={timeframe: indicator_params(config, timeframe) for timeframe in ('1m', '5m')},
+                       columns={'1m': HybridOptimizedStrategy.REQUIRED_COLUMNS_1M,
+                                '5m': HybridOptimizedStrategy.REQUIRED_COLUMNS_5M})
+    runtime = LiveRuntime(config, feed, connector, max_workers=workers)
+
+    async def cycle_serially(bar_close):
+        # 原来的循环: 一个品种处理完再处理下一个 Original loop, one symbol at a time
+        connector.invalidate_snapshot()
+        for symbol in symbols:
+            await runtime.process_symbol(symbol, bar_close)
+        return {}
+
+    async def run():
+        for _ in range(cycles):
+            mt5.advance(60)
+            errors = await (cycle_serially(time.time()) if serial else runtime.run_cycle(time.time()))
+            assert not any(errors.values())
+
+    try:
+        asyncio.run(run())
+    finally:
+        runtime.close()
+    # 入场/出场时间取自墙上时钟, 不参与比较 Entry/exit times come from the wall clock
+    trades = sorted((p.symbol, p.direction, p.entry_price, p.stop_loss, p.exit_price, p.pnl)
+                    for p in runtime.strategy.closed_positions)
+    open_positions = sorted((p.symbol, p.type, p.price_open, p.sl) for p in mt5.positions_get())
+    return trades, open_positions, runtime.order_latency.count
+
+
+def test_concurrent_cycles_match_serial_processing():
+    expected = run_live(workers=1, serial=True)
+    result = run_live(workers=8)
+    assert len(expected[0]) > 0
+    assert result == expected
@@ -0,0 +1,72 @@
+"""
+BarCloseScheduler vs a fixed sleep(60) loop
+"""
+
+import time
+
+import pytest
+
+from src.live.scheduler import BarCloseScheduler, LatencyStats, timeframe_seconds
+
+
+class ShiftedClock:
+    """真实流逝的时钟, 起点和跳跃可控 Real-time clock with a chosen start that tests can jump forward"""
+
+    def __init__(self, start: float):
+        self.start = start
+        self._origin = time.monotonic()
+
+    def __call__(self) -> float:
+        return self.start + time.monotonic() - self._origin
+
+    def jump(self, seconds: float):
+        self.start += seconds
+
+
+def test_wakes_on_bar_closes_despite_processing_time():
+    clock = ShiftedClock(1019.95)
+    scheduler = BarCloseScheduler('1m', offset=0.02, clock=clock)
+    assert scheduler.wait() == 1020
+
+    # sleep(60) 之后再处理会逐渐漂移; 调度器不管处理多久, 都在下一根K线收盘后醒来
+    closes = []
+    for _ in range(4):
+        clock.jump(scheduler.next_close() - clock() - 0.03)  # 处理结束时离收盘还有 30ms
+        closes.append(scheduler.wait())
+        assert closes[-1] <= clock() - 0.02
+    assert closes == [1080, 1140, 1200, 1260]
+    assert scheduler.skipped == 0
+
+
+def test_skips_bars_missed_while_busy():
+    clock = ShiftedClock(1019.95)
+    scheduler = BarCloseScheduler('1m', offset=0.0, clock=clock)
+    assert scheduler.wait() == 1020
+    clock.jump(181.0)  # 1080, 1140 没有处理
+    assert scheduler.wait() == 1200
+    assert scheduler.skipped == 2
+
+
+def test_tick_wakes_before_offset_and_stop_returns_none():
+    clock = ShiftedClock(1020.2)
+    scheduler = BarCloseScheduler('1m', offset=30.0, clock=clock)
+    scheduler.last_close = 960
+    scheduler.notify_tick(1020.1)  # 新K线的第一笔: 1020 的K线已收盘
+    started = time.monotonic()
+    assert scheduler.wait() == 1020
+    assert time.monotonic() - started < 1.0
+    scheduler.stop()
+    assert scheduler.wait() is None
+
+
+def test_latency_stats_and_timeframes():
+    stats = LatencyStats(window=3)
+    assert stats.summary() == {}
+    for seconds in (0.1, 0.2, 0.3, 0.4):
+        stats.record(seconds)
+    summary = stats.summary()
+    assert summary['count'] == 4 and summary['last'] == 0.4
+    assert summary['mean'] == pytest.approx(0.3) and summary['max'] == 0.4
+    assert timeframe_seconds('5m') == 300
+    with pytest.raises(ValueError):
+        timeframe_seconds('2m')
@@ -0,0 +1,34 @@
+"""
+generate_signal_frame vs generate_signal_for_bar on every bar
+"""
+
+import numpy as np
+import pytest
+
+from src.strategy.hybrid_optimized_strategy import HybridOptimizedStrategy
+from tests.conftest import make_config
+
+
+@pytest.mark.parametrize('aggressiveness', [1, 2, 3])
+@pytest.mark.parametrize('drop', [[], ['cci'], ['kc_upper', 'kc_lower', 'atr']])
+def test_signal_frame_matches_per_bar_signals(market, aggressiveness, drop):
+    data_1m, data_5m = market
+    data_1m = data_1m.iloc[:1500].drop(columns=drop)
+    data_5m = data_5m.reindex(data_1m.index, method='ffill')
+    strategy = HybridOptimizedStrategy(make_config(aggressiveness, max_daily_loss=1e9, max_drawdown=1.0), {}, {})
+    frame = strategy.generate_signal_frame(data_1m, data_5m)
+
+    signals = 0
+    for i in range(len(data_1m)):
+        signal = strategy.generate_signal_for_bar(data_1m.iloc[i], data_5m.iloc[i], 'XAUUSD', data_1m.index[i])
+        row = frame.iloc[i]
+        assert bool(row['long']) == (signal is not None and signal.direction == 'long')
+        assert bool(row['short']) == (signal is not None and signal.direction == 'short')
+        if signal is not None:
+            signals += 1
+            np.testing.assert_array_equal(
+                [row['stop_loss'], row['take_profit_1'], row['take_profit_2'], row['take_profit_3'],
+                 row['confidence']],
+                [signal.stop_loss, *signal.take_profit, signal.confidence])
+    # 缺列时用默认值, 可能完全没有信号 Defaults for missing columns may rule out every entry
+    assert signals > 0 or drop
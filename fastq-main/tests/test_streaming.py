@@ -0,0 +1,74 @@
+"""
+Streaming indicators vs Indicators.calculate_all_indicators
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.indicators import Indicators, StreamingIndicatorSet
+from src.indicators.streaming import StreamingMean, StreamingStd
+from src.strategy.hybrid_optimized_strategy import HybridOptimizedStrategy
+from tests.conftest import INDICATOR_PARAMS
+
+OHLCV = ['open', 'high', 'low', 'close', 'volume']
+
+
+def assert_columns_match(streamed, batch, columns):
+    # Kahan / Welford 在线更新与 pandas 的舍入不同 Online updates round differently from pandas
+    for column in columns:
+        np.testing.assert_allclose(streamed[column].to_numpy(dtype=np.float64),
+                                   batch[column].to_numpy(dtype=np.float64),
+                                   rtol=1e-9, atol=1e-9, equal_nan=True, err_msg=column)
+
+
+def test_update_frame_matches_batch(bars):
+    data = bars.iloc[:600]
+    batch = Indicators.calculate_all_indicators(data, **INDICATOR_PARAMS)
+    streamed = StreamingIndicatorSet(**INDICATOR_PARAMS).update_frame(data)
+    assert set(streamed.columns) == set(batch.columns)
+    assert_columns_match(streamed, batch, batch.columns.difference(OHLCV))
+
+
+def test_bar_by_bar_after_warmup_matches_batch(bars):
+    data = bars.iloc[1000:1600]
+    batch = Indicators.calculate_all_indicators(data, **INDICATOR_PARAMS)
+
+    indicators = StreamingIndicatorSet(**INDICATOR_PARAMS)
+    indicators.update_frame(data.iloc[:400])
+    rows = [indicators.update(data.iloc[i]) for i in range(400, len(data))]
+    assert indicators.bars_seen == len(data)
+    streamed = pd.DataFrame(rows, index=data.index[400:])
+    assert_columns_match(streamed, batch.iloc[400:], streamed.columns)
+
+
+@pytest.mark.parametrize('columns', [
+    HybridOptimizedStrategy.REQUIRED_COLUMNS_1M,
+    HybridOptimizedStrategy.REQUIRED_COLUMNS_5M,
+    ['rsi_crossover'],
+])
+def test_column_subset_matches_batch(bars, columns):
+    data = bars.iloc[2000:2500]
+    batch = Indicators.calculate_all_indicators(data, **INDICATOR_PARAMS, columns=columns)
+    indicators = StreamingIndicatorSet(**INDICATOR_PARAMS, columns=columns)
+    streamed = indicators.update_frame(data.iloc[:300])
+    assert set(columns) <= set(indicators.columns) < set(StreamingIndicatorSet.COLUMNS)
+    assert list(streamed.columns) == list(batch.columns)
+
+    rows = [indicators.update(data.iloc[i]) for i in range(300, len(data))]
+    assert all(list(values) == indicators.columns for values in rows)
+    assert_columns_match(streamed, batch.iloc[:300], columns)
+    assert_columns_match(pd.DataFrame(rows, index=data.index[300:]), batch.iloc[300:], columns)
+
+
+@pytest.mark.parametrize('window', [5, 14, 34])
+def test_rolling_mean_and_std_match_pandas(bars, window):
+    # 长序列检查累计误差, NaN 检查缺失K线 A long series for drift, NaNs for missing bars
+    values = bars['close'].to_numpy().copy()
+    values[[100, 101, 2500]] = np.nan
+    mean, std = StreamingMean(window), StreamingStd(window)
+    streamed = np.array([(mean.update(x), std.update(x)) for x in values])
+
+    series = pd.Series(values)
+    np.testing.assert_allclose(streamed[:, 0], series.rolling(window).mean(), rtol=1e-9, equal_nan=True)
+    np.testing.assert_allclose(streamed[:, 1], series.rolling(window).std(), rtol=1e-9, atol=1e-9, equal_nan=True)
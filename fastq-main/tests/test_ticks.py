@@ -0,0 +1,73 @@
+"""
+逐笔聚合 Tick aggregation vs pandas resample
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.market import TICK_DTYPE, TickBarBuilder, aggregate_tick_bars, aggregate_ticks
+
+
+def synthetic_ticks(n: int = 5000, seed: int = 0) -> np.ndarray:
+    """逐笔数据, 有同一毫秒的多笔成交 Ticks with several trades per millisecond"""
+    rng = np.random.default_rng(seed)
+    ticks = np.empty(n, dtype=TICK_DTYPE)
+    gaps_ms = rng.choice([0, 0, 1, 7, 250, 4000], size=n)
+    ticks['time'] = pd.Timestamp('2024-01-01').value + np.cumsum(gaps_ms) * 1_000_000
+    ticks['bid'] = 2000.0 + np.cumsum(rng.normal(0, 0.05, n))
+    ticks['ask'] = ticks['bid'] + rng.uniform(0.1, 0.4, n)
+    ticks['volume'] = rng.integers(1, 10, n)
+    return ticks
+
+
+@pytest.mark.parametrize('freq', ['1min', '5min'])
+def test_aggregate_ticks_matches_resample(freq):
+    ticks = synthetic_ticks()
+    frame = pd.DataFrame({'bid': ticks['bid'], 'volume': ticks['volume'].astype(np.float64)},
+                         index=pd.to_datetime(ticks['time']))
+    resampled = frame['bid'].resample(freq).ohlc()
+    resampled['volume'] = frame['volume'].resample(freq).sum()
+    resampled['tick_count'] = frame['bid'].resample(freq).count()
+    expected = resampled[resampled['tick_count'] > 0]
+
+    bars = aggregate_ticks(ticks, freq)
+    np.testing.assert_array_equal(bars.index.asi8, expected.index.as_unit('ns').asi8)
+    for column in ('open', 'high', 'low', 'close', 'volume', 'tick_count'):
+        np.testing.assert_allclose(bars[column].to_numpy(dtype=np.float64),
+                                   expected[column].to_numpy(dtype=np.float64), err_msg=column)
+
+
+
+def test_tick_count_bars_match_groupby():
+    ticks = synthetic_ticks(seed=3)
+    frame = pd.DataFrame({'bid': ticks['bid'], 'volume': ticks['volume'].astype(np.float64)})
+    groups = frame.groupby(np.arange(len(ticks)) // 100)
+    expected = groups['bid'].agg(['first', 'max', 'min', 'last'])
+
+    bars = aggregate_tick_bars(ticks, 100)
+    np.testing.assert_array_equal(bars.index.asi8, ticks['time'][::100])
+    np.testing.assert_allclose(bars[['open', 'high', 'low', 'close']].to_numpy(), expected.to_numpy())
+    np.testing.assert_allclose(bars['volume'], groups['volume'].sum())
+
+
+def test_builder_with_overlapping_batches_matches_batch_aggregation():
+    ticks = synthetic_ticks(seed=1)
+    builder = TickBarBuilder('1min')
+    closed = []
+    rng = np.random.default_rng(2)
+    start = 0
+    while start < len(ticks):
+        end = min(start + int(rng.integers(1, 200)), len(ticks))
+        # copy_ticks_from(last_time) 会再次返回 last_time 那一毫秒的逐笔
+        if builder.last_time is not None:
+            start = int(np.searchsorted(ticks['time'], builder.last_time, side='left'))
+        bars = builder.update(ticks[start:end])
+        if len(bars):
+            closed.append(bars)
+        start = end
+
+    result = pd.concat(closed + [builder.current_bar().to_frame().T])
+    expected = aggregate_ticks(ticks, '1min')
+    np.testing.assert_array_equal(result.index.asi8, expected.index.asi8)
+    np.testing.assert_allclose(result.to_numpy(dtype=np.float64), expected.to_numpy(dtype=np.float64))
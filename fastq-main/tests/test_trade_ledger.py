@@ -0,0 +1,83 @@
+"""
+TradeLedger vs the list of Position objects it replaces
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.strategy.hybrid_optimized_strategy import Position
+from src.strategy.trade_ledger import TradeLedger
+
+
+def closed_positions(n: int, tz=None) -> list:
+    rng = np.random.default_rng(0)
+    positions = []
+    for i in range(n):
+        entry_time = pd.Timestamp('2024-01-01', tz=tz) + pd.Timedelta(minutes=7 * i)
+        direction = 'long' if i % 3 else 'short'
+        sign = 1 if direction == 'long' else -1
+        entry = 2000.0 + rng.normal(0, 5)
+        exit_price = entry + rng.normal(0, 2)
+        positions.append(Position(
+            symbol='XAUUSD' if i % 2 else 'EURUSD',
+            direction=direction,
+            entry_price=entry,
+            stop_loss=entry - sign * 1.5,
+            initial_stop_loss=entry - sign * 2.0,
+            take_profit=[entry + sign * 2.0, entry + sign * 4.0][:i % 3],
+            size=0.3,
+            entry_time=entry_time,
+            exit_price=exit_price,
+            exit_time=entry_time + pd.Timedelta(minutes=5),
+            pnl=(exit_price - entry) * sign * 30,
+            highest_price=entry + 1.0 if direction == 'long' else None,
+            lowest_price=entry - 1.0 if direction == 'short' else None,
+            trailing_active=bool(i % 2),
+        ))
+    return positions
+
+
+@pytest.mark.parametrize('tz', [None, 'America/New_York'])
+def test_ledger_reads_back_like_a_list(tz):
+    positions = closed_positions(10, tz)
+    ledger = TradeLedger(chunk_size=4)
+    for i, position in enumerate(positions):
+        ledger.append(position, 'take_profit' if i % 2 else 'stop_loss')
+
+    assert len(ledger) == len(positions)
+    assert list(ledger) == positions
+    for key in (0, 3, 4, -1, -10, np.int64(5)):
+        assert ledger[key] == positions[key]
+    for key in (slice(-5, None), slice(2, 9, 3), slice(None, None, -1), slice(20, 30)):
+        assert ledger[key] == positions[key]
+    with pytest.raises(IndexError):
+        ledger[10]
+
+    np.testing.assert_array_equal(ledger['pnl'], [p.pnl for p in positions])
+    assert list(ledger.to_frame()['reason'][:2]) == ['stop_loss', 'take_profit']
+    assert list(ledger.to_frame()['exit_time']) == [p.exit_time for p in positions]
+    np.testing.assert_array_equal(ledger.to_frame()['highest_price'],
+                                  [np.nan if p.highest_price is None else p.highest_price for p in positions])
+
+
+def test_returned_positions_are_copies():
+    ledger = TradeLedger()
+    ledger.append(closed_positions(1)[0], 'stop_loss')
+    ledger[0].pnl = 1e9
+    ledger[:1][0].pnl = 1e9
+    assert ledger['pnl'][0] != 1e9
+
+
+def test_mismatched_time_zone_is_rejected():
+    ledger = TradeLedger()
+    ledger.append(closed_positions(1, 'America/New_York')[0], 'stop_loss')
+    for tz in (None, 'UTC'):
+        with pytest.raises(ValueError):
+            ledger.append(closed_positions(1, tz)[0], 'stop_loss')
+    assert len(ledger) == 1
+
+    position = closed_positions(1)[0]
+    position.exit_time = position.exit_time.tz_localize('UTC')
+    with pytest.raises(ValueError):
+        TradeLedger().append(position, 'stop_loss')
@@ -0,0 +1,58 @@
+"""
+TradeStatistics vs the original list-based get_statistics
+"""
+
+import numpy as np
+import pytest
+
+from src.strategy.trade_statistics import TradeStatistics
+
+
+def baseline_statistics(pnls: list) -> dict:
+    """原来的 get_statistics (每次扫描全部交易) Original get_statistics"""
+    if not pnls:
+        return {}
+    wins = [pnl for pnl in pnls if pnl > 0]
+    losses = [pnl for pnl in pnls if pnl < 0]
+    total_losses = abs(sum(losses))
+    return {
+        'total_trades': len(pnls),
+        'winning_trades': len(wins),
+        'losing_trades': len(losses),
+        'win_rate': len(wins) / len(pnls),
+        'total_pnl': sum(pnls),
+        'avg_win': np.mean(wins) if wins else 0,
+        'avg_loss': np.mean(losses) if losses else 0,
+        'largest_win': max(pnls),
+        'largest_loss': min(pnls),
+        'profit_factor': sum(wins) / total_losses if total_losses > 0 else 0,
+    }
+
+
+@pytest.mark.parametrize('pnls', [
+    [],
+    [12.5],
+    [-3.0, -4.0],
+    [10.0, 0.0, -5.0, 0.0],
+    list(np.random.default_rng(0).normal(2, 40, 500)),
+])
+def test_statistics_match_baseline(pnls):
+    stats = TradeStatistics()
+    r_multiples = [pnl / 25 for pnl in pnls]
+    for pnl, r in zip(pnls, r_multiples):
+        stats.update(pnl, r)
+
+    result = stats.as_dict()
+    expected = baseline_statistics(pnls)
+    assert {key: result[key] for key in expected} == pytest.approx(expected, rel=1e-12, abs=1e-12)
+    if len(pnls) > 1:
+        assert result['avg_r'] == pytest.approx(np.mean(r_multiples), rel=1e-12)
+        assert result['r_std'] == pytest.approx(np.std(r_multiples, ddof=1), rel=1e-12)
+
+
+def test_max_consecutive_losses():
+    stats = TradeStatistics()
+    for pnl in [-1, -2, 3, -1, -1, -1, 0, -4]:
+        stats.update(pnl, 0.0)
+    assert stats.max_consecutive_losses == 3
+    assert stats.consecutive_losses == 1
@@ -0,0 +1,55 @@
+"""
+WalkForwardOptimizer vs backtesting each test window on its own
+"""
+
+import pytest
+
+from src.backtesting import BacktestEngine, WalkForwardOptimizer, grid_search_space
+from src.backtesting.optimizer import config_with, indicator_params
+from src.indicators import Indicators
+from src.strategy.hybrid_optimized_strategy import HybridOptimizedStrategy
+from tests.conftest import make_config
+
+
+@pytest.fixture(scope='module')
+def walk_forward(bars, bars_5m):
+    wf = WalkForwardOptimizer(make_config(), 'XAUUSD', bars, bars_5m, train_days=1, test_days=0.5,
+                              workers=1, min_trades=1)
+    return wf, wf.run(grid_search_space({'strategy.aggressiveness': [1, 2, 3]}), rank_by='total_pnl')
+
+
+def test_folds_tile_the_history(walk_forward, bars):
+    wf, report = walk_forward
+    folds = wf.make_folds()
+    assert len(folds) == len(report['folds']) > 1
+    for previous, fold in zip(folds, folds[1:]):
+        assert fold['test_start'] == previous['test_stop']
+    for fold in folds:
+        assert fold['train_start'] < fold['train_stop'] == fold['test_start'] < fold['test_stop'] <= len(bars)
+
+
+def test_test_windows_match_engine_on_slices(walk_forward, bars, bars_5m):
+    wf, report = walk_forward
+    for fold, row in zip(wf.make_folds(), report['folds'].to_dict('records')):
+        config = config_with(make_config(), {'strategy.aggressiveness': row['strategy.aggressiveness']})
+        params_1m, params_5m = indicator_params(config)
+        # 指标在全量历史上计算, 再按位置切片 Indicators over the full history, then sliced
+        indicators_1m = Indicators.calculate_all_indicators(bars, **params_1m)
+        indicators_5m = Indicators.calculate_all_indicators(bars_5m, **params_5m)
+        strategy = HybridOptimizedStrategy(config, {}, {})
+        BacktestEngine(strategy, 'XAUUSD', warmup=0).run(
+            indicators_1m.iloc[fold['test_start']:fold['test_stop']], indicators_5m)
+
+        assert row['test_total_trades'] == len(strategy.closed_positions)
+        assert row['test_total_pnl'] == pytest.approx(sum(p.pnl for p in strategy.closed_positions), abs=1e-9)
+
+
+def test_stitched_equity_covers_test_windows(walk_forward, bars):
+    wf, report = walk_forward
+    folds = wf.make_folds()
+    equity = report['equity']
+    assert equity.index.is_monotonic_increasing and not equity.index.has_duplicates
+    assert equity.index[0] == bars.index[folds[0]['test_start']]
+    assert equity.index[-1] == bars.index[folds[-1]['test_stop'] - 1]
+    assert equity.iloc[-1] - 10000 == pytest.approx(report['folds']['test_total_pnl'].sum(), abs=1e-6)
+    assert report['oos_metrics']['total_trades'] == report['folds']['test_total_trades'].sum()